@@ -0,0 +1,106 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+
+def get_git_commit():
+    """
+    Возвращает хэш текущего коммита или None, если git недоступен
+    """
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+            text=True,
+        )
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(benchmark, rows, output=None):
+    """
+    Сохраняет результаты бенчмарка в JSON и печатает их в виде таблицы
+    """
+    report = {
+        "benchmark": benchmark,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": get_git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "rows": rows,
+    }
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в {output}")
+
+    print_table(rows)
+    return report
+
+
+def compare_results(rows, baseline_path, threshold=1.2, key="name", metric="median_ms"):
+    """
+    Сравнивает результаты с сохраненным прогоном по метрике metric.
+
+    Печатает таблицу с отношением текущего значения к базовому и возвращает
+    список ключей, замедлившихся сильнее threshold раз.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    baseline_rows = {row[key]: row for row in baseline.get("rows", [])}
+    print(f"Сравнение с {baseline_path} (коммит {baseline.get('git_commit')}), метрика {metric}:")
+
+    comparison = []
+    regressions = []
+    for row in rows:
+        base_row = baseline_rows.get(row[key])
+        if base_row is None or not base_row.get(metric):
+            continue
+
+        ratio = row[metric] / base_row[metric]
+        comparison.append({
+            key: row[key],
+            "baseline": base_row[metric],
+            "current": row[metric],
+            "ratio": ratio,
+            "regression": ratio > threshold,
+        })
+        if ratio > threshold:
+            regressions.append(row[key])
+
+    print_table(comparison)
+    if regressions:
+        print(f"Замедление больше чем в {threshold} раза: {', '.join(regressions)}")
+    return regressions
+
+
+def print_table(rows):
+    """
+    Печатает строки результатов в виде выровненной таблицы
+    """
+    if not rows:
+        print("Нет результатов")
+        return
+
+    columns = list(rows[0].keys())
+    cells = [[_format_cell(row.get(column)) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(row[i]) for row in cells)) for i, column in enumerate(columns)]
+
+    print("  ".join(column.ljust(widths[i]) for i, column in enumerate(columns)))
+    for row in cells:
+        print("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)))
+
+
+def _format_cell(value):
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
@@ -0,0 +1,118 @@
+"""
+Задержка генерации и пиковая память для профилей инференса.
+
+Каждый профиль (INFERENCE_PROFILE и TORCH_COMPILE) измеряется в отдельном
+процессе, чтобы пиковый RSS не смешивался между прогонами.
+
+Запуск: python -m app.benchmarks.inference --model Xenova/distilgpt2 --output inference.json
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+# Добавляем директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.benchmarks.common import write_results
+from app.config import CODE_MODEL
+
+BENCHMARK_PROMPT = "import React from 'react';\n\nconst Slide = () => {"
+
+# Сравниваемые варианты: (название, INFERENCE_PROFILE, TORCH_COMPILE)
+VARIANTS = [
+    ("baseline", "baseline", "0"),
+    ("lean", "lean", "0"),
+    ("lean+compile", "lean", "1"),
+]
+
+
+def _measure(model_name, inference_profile, torch_compile, new_tokens, rounds, results):
+    # Настройки читаются при импорте app.config, поэтому задаем их до импорта
+    os.environ["INFERENCE_PROFILE"] = inference_profile
+    os.environ["TORCH_COMPILE"] = torch_compile
+
+    import resource
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    from app.utils.runtime import configure_torch_threads, get_model_load_kwargs, prepare_model_for_inference
+
+    configure_torch_threads()
+
+    load_start = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name, **get_model_load_kwargs())
+    model = prepare_model_for_inference(model)
+    load_seconds = time.perf_counter() - load_start
+
+    inputs = tokenizer(BENCHMARK_PROMPT, return_tensors="pt").to(model.device)
+    generation_kwargs = {
+        "max_new_tokens": new_tokens,
+        "min_new_tokens": new_tokens,
+        "do_sample": False,
+        "pad_token_id": tokenizer.eos_token_id,
+    }
+
+    with torch.inference_mode():
+        # Прогрев: первая генерация включает компиляцию и выделение буферов
+        model.generate(inputs["input_ids"], **generation_kwargs)
+
+        latencies = []
+        for _ in range(rounds):
+            start_time = time.perf_counter()
+            model.generate(inputs["input_ids"], **generation_kwargs)
+            latencies.append(time.perf_counter() - start_time)
+
+    latencies.sort()
+    results.put({
+        "dtype": str(model.dtype).replace("torch.", ""),
+        "load_seconds": load_seconds,
+        "latency_p50_ms": latencies[len(latencies) // 2] * 1000,
+        "tokens_per_sec": new_tokens * rounds / sum(latencies),
+        # ru_maxrss в Linux измеряется в килобайтах
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def run(model_name, variant, inference_profile, torch_compile, new_tokens, rounds):
+    """
+    Измеряет один вариант в отдельном процессе и возвращает строку результатов
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(
+        target=_measure,
+        args=(model_name, inference_profile, torch_compile, new_tokens, rounds, results),
+    )
+    process.start()
+    measurement = results.get()
+    process.join()
+
+    row = {"model": model_name, "variant": variant}
+    row.update(measurement)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк профилей инференса")
+    parser.add_argument("--model", default=CODE_MODEL, help="Модель для генерации")
+    parser.add_argument("--new-tokens", type=int, default=64, help="Токенов за один вызов generate")
+    parser.add_argument("--rounds", type=int, default=5, help="Замеряемых вызовов generate")
+    parser.add_argument("--variants", nargs="+", default=[name for name, _, _ in VARIANTS], help="Варианты")
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    args = parser.parse_args()
+
+    rows = []
+    for variant, inference_profile, torch_compile in VARIANTS:
+        if variant not in args.variants:
+            continue
+        print(f"Вариант {variant}...")
+        rows.append(run(args.model, variant, inference_profile, torch_compile, args.new_tokens, args.rounds))
+
+    write_results("inference", rows, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Сравнение ONNX Runtime и transformers для модели кода.
+
+На промптах генерации кода для нескольких типовых слайдов запускает жадное
+декодирование в обоих бэкендах, проверяет совпадение сгенерированных
+токенов и измеряет скорость в токенах в секунду.
+
+Запуск: python -m app.benchmarks.onnx --new-tokens 64 --output onnx.json
+"""
+import argparse
+import os
+import sys
+
+# Добавляем директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.benchmarks.common import write_results
+from app.config import CODE_MODEL, CODE_PROMPT_COMPACTION
+from app.services.backends import create_backend
+from app.services.code_generator import CodeGenerator
+from app.services.code_prompts import get_code_prompt
+
+# Типовые слайды разных типов для промптов генерации кода
+SAMPLE_SLIDES = [
+    "# Искусственный интеллект в образовании\n\n## Введение в тему\n\nКак ИИ меняет обучение.",
+    "# Ключевые цифры\n\n* 75% школ используют онлайн-платформы\n* 2.5x рост рынка\n* 1200+ курсов",
+    "# Сравнение подходов\n\n## Традиционное обучение:\n* Лекции\n\n## Адаптивное обучение:\n* Персонализация",
+    "# Заключение\n\n* ИИ уже в классах\n* Нужны новые навыки\n\n## Будущее за гибридными моделями",
+]
+
+
+def build_prompts(compaction=CODE_PROMPT_COMPACTION):
+    """
+    Строит промпты генерации кода для SAMPLE_SLIDES так же, как генератор кода, но без загрузки его модели
+    """
+    # Определение типа и макета слайда не использует состояние генератора
+    prompt_builder = CodeGenerator.__new__(CodeGenerator)
+    prompt_template = get_code_prompt(compaction)
+
+    prompts = []
+    for slide_content in SAMPLE_SLIDES:
+        slide_type = prompt_builder._determine_slide_type(slide_content)
+        layout = prompt_builder._select_layout_for_slide(slide_type)
+        prompts.append(prompt_template.render(
+            slide_content=slide_content, slide_type=slide_type, layout=layout, theme="light"
+        ))
+
+    return prompts
+
+
+def _run(backend, prompt, new_tokens):
+    result = backend.generate_batch([prompt], max_new_tokens=new_tokens, do_sample=False)[0]
+    return result.token_ids, result.seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк ONNX Runtime против transformers для модели кода")
+    parser.add_argument("--model", default=CODE_MODEL, help="Модель кода")
+    parser.add_argument("--new-tokens", type=int, default=64, help="Токенов за один вызов generate")
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    args = parser.parse_args()
+
+    backends = {name: create_backend(name, "code", args.model) for name in ("transformers", "onnx")}
+
+    prompts = build_prompts()
+
+    outputs = {name: [] for name in backends}
+    timings = {name: 0.0 for name in backends}
+    for name, backend in backends.items():
+        # Прогрев, чтобы не измерять выделение памяти и оптимизацию графа
+        _run(backend, prompts[0], 4)
+        for prompt in prompts:
+            tokens, elapsed = _run(backend, prompt, args.new_tokens)
+            outputs[name].append(tokens)
+            timings[name] += elapsed
+
+    matches = sum(1 for reference, candidate in zip(outputs["transformers"], outputs["onnx"]) if reference == candidate)
+
+    rows = []
+    for name in backends:
+        generated_tokens = sum(len(tokens) for tokens in outputs[name])
+        rows.append({
+            "backend": name,
+            "model": args.model,
+            "prompts": len(prompts),
+            "generated_tokens": generated_tokens,
+            "seconds": timings[name],
+            "tokens_per_sec": generated_tokens / timings[name] if timings[name] else 0.0,
+            "greedy_parity": matches / len(prompts),
+        })
+
+    write_results("onnx", rows, args.output)
+
+    # Ненулевой код возврата, если жадный вывод бэкендов расходится
+    return 0 if matches == len(prompts) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
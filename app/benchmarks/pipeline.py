@@ -0,0 +1,291 @@
+"""
+Бенчмарк конвейера генерации презентаций без весов моделей.
+
+Измеряет отдельные этапы и весь запрос целиком на заглушке модели (бэкенд
+stub): построение промптов (_create_detailed_prompt), рендеринг каждого
+шаблона _get_*_slide_template, разбор markdown слайдов, сохранение
+презентации в БД и полный запрос POST /generate_presentation через
+ASGI-приложение. По умолчанию используется SQLite во временном каталоге.
+
+Результаты сохраняются в JSON; с --compare они сравниваются с сохраненным
+прогоном другого коммита, и код возврата ненулевой при замедлении этапа
+сильнее порога.
+
+Запуск: python -m app.benchmarks.pipeline --output pipeline.json --compare baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+# Добавляем директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+# Настройки читаются при импорте app.config, поэтому задаем их до импорта приложения
+os.environ["CONTENT_BACKEND"] = "stub"
+os.environ["CODE_BACKEND"] = "stub"
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCHMARK_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'icreator-benchmark.db')}"
+)
+
+from app.benchmarks.common import compare_results, write_results
+from app.database import SessionLocal
+from app.main import app
+from app.models.generation_job import GenerationJob, GenerationJobSlide
+from app.models.presentation import Presentation, Slide
+from app.routers.presentations import content_generator, code_generator
+
+BENCHMARK_TOPIC = "Искусственный интеллект в образовании"
+
+# Типовые слайды: на каждом шаблоне и разборщике markdown есть подходящий пример
+SAMPLE_SLIDES = {
+    "title": "# Искусственный интеллект в образовании\n## Введение в тему\n\nКак ИИ меняет обучение.",
+    "conclusion": "# Заключение\n\n* ИИ уже в классах\n* Нужны новые навыки\n* Данные важнее алгоритмов\n\n"
+                  "## Будущее за гибридными моделями",
+    "comparison": "# Сравнение подходов\n\n## Традиционное обучение:\n* Лекции\n* Экзамены\n\n"
+                  "## Адаптивное обучение:\n* Персонализация\n* Непрерывная оценка",
+    "timeline": "# История развития\n\n## 1960\nПервые обучающие машины\n\n## 1990\nДистанционное обучение\n\n"
+                "## 2020\nАдаптивные платформы",
+    "data": "# Ключевые цифры\n\n* 75% школ используют онлайн-платформы\n* 2.5x рост рынка\n* 1200+ курсов",
+    "list": "# Преимущества\n\n* Персонализация\n* Доступность\n* Мгновенная обратная связь\n* Аналитика",
+    "general": "# Роль преподавателя\n\nПреподаватель становится наставником и куратором.\n\n"
+               "## Новые задачи\nПодбор материалов и поддержка мотивации.",
+}
+
+# Разборщики markdown генератора кода
+EXTRACTORS = [
+    "_extract_title",
+    "_extract_bullet_points",
+    "_extract_comparison_sections",
+    "_extract_timeline_items",
+    "_extract_data_items",
+    "_extract_list_items",
+    "_determine_slide_type",
+]
+
+
+def measure(name, func, repeat, number=1):
+    """
+    Вызывает func number раз в каждом из repeat замеров и возвращает строку
+    результатов со временем одного вызова в миллисекундах
+    """
+    # Прогрев: первый вызов может заполнять кэши и компилировать регулярные выражения
+    func()
+
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start_time) * 1000 / number)
+
+    timings.sort()
+    return {
+        "name": name,
+        "calls": repeat * number,
+        "min_ms": timings[0],
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.mean(timings),
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+def benchmark_prompts(slides, repeat):
+    rows = []
+    seen_types = set()
+
+    for slide_number in range(1, slides + 1):
+        slide_type, slide_structure = content_generator._get_slide_structure(slide_number, slides)
+        if slide_type in seen_types:
+            continue
+        seen_types.add(slide_type)
+
+        rows.append(measure(
+            f"prompt:{slide_type}",
+            lambda: content_generator._create_detailed_prompt(
+                BENCHMARK_TOPIC, slide_number, slides, slide_type, slide_structure
+            ),
+            repeat,
+            number=100,
+        ))
+
+    return rows
+
+
+def benchmark_templates(repeat):
+    rows = []
+    template_names = sorted(
+        name for name in dir(code_generator) if re.fullmatch(r"_get_\w+_slide_template", name)
+    )
+
+    for name in template_names:
+        template = getattr(code_generator, name)
+        slide_kind = name[len("_get_"):-len("_slide_template")]
+        slide_content = SAMPLE_SLIDES.get(slide_kind, SAMPLE_SLIDES["general"])
+
+        # Шаблоны списков и универсальный принимают еще и макет
+        if template.__code__.co_argcount == 4:
+            func = lambda: template(slide_content, "two-column", "light")
+        else:
+            func = lambda: template(slide_content, "light")
+
+        rows.append(measure(f"template:{slide_kind}", func, repeat, number=20))
+
+    return rows
+
+
+def benchmark_markdown(repeat):
+    rows = []
+    contents = list(SAMPLE_SLIDES.values())
+
+    for name in EXTRACTORS:
+        extractor = getattr(code_generator, name)
+        rows.append(measure(
+            f"markdown:{name.lstrip('_')}",
+            lambda: [extractor(slide_content) for slide_content in contents],
+            repeat,
+            number=20,
+        ))
+
+    return rows
+
+
+def benchmark_db(slides, repeat):
+    contents = list(SAMPLE_SLIDES.values())
+    code = code_generator._get_template_code(SAMPLE_SLIDES["list"])
+    created_ids = []
+
+    def persist():
+        db = SessionLocal()
+        try:
+            presentation = Presentation(topic=BENCHMARK_TOPIC, slides_count=slides)
+            db.add(presentation)
+            db.commit()
+            db.refresh(presentation)
+
+            for slide_number in range(1, slides + 1):
+                db.add(Slide(
+                    presentation_id=presentation.id,
+                    slide_number=slide_number,
+                    content=contents[slide_number % len(contents)],
+                    code=code,
+                ))
+            db.commit()
+            created_ids.append(presentation.id)
+        finally:
+            db.close()
+
+    row = measure(f"db:persist_{slides}_slides", persist, repeat)
+    _cleanup(created_ids)
+    return [row]
+
+
+def benchmark_endpoint(slides, repeat, mode):
+    created_ids = []
+    body = {"topic": BENCHMARK_TOPIC, "slides_count": slides}
+    if mode:
+        body["mode"] = mode
+
+    def generate():
+        status_code, response = asyncio.run(_asgi_request("POST", "/generate_presentation", body))
+        if status_code != 201:
+            raise RuntimeError(f"/generate_presentation вернул {status_code}: {response}")
+        created_ids.append(response["presentation_id"])
+
+    row = measure(f"endpoint:generate_presentation_{slides}_slides{f'_{mode}' if mode else ''}", generate, repeat)
+    _cleanup(created_ids)
+    return [row]
+
+
+async def _asgi_request(method, path, body):
+    """
+    Выполняет запрос к ASGI-приложению в памяти, без сети и HTTP-клиента
+    """
+    payload = json.dumps(body).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    request_sent = False
+    status_code = None
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if request_sent:
+            return {"type": "http.disconnect"}
+        request_sent = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status_code, json.loads(b"".join(chunks) or b"null")
+
+
+def _cleanup(presentation_ids):
+    """
+    Удаляет презентации, созданные бенчмарком
+    """
+    if not presentation_ids:
+        return
+
+    db = SessionLocal()
+    try:
+        job_ids = db.query(GenerationJob.id).filter(GenerationJob.presentation_id.in_(presentation_ids))
+        db.query(GenerationJobSlide).filter(GenerationJobSlide.job_id.in_(job_ids)).delete(synchronize_session=False)
+        db.query(GenerationJob).filter(GenerationJob.presentation_id.in_(presentation_ids)).delete(synchronize_session=False)
+        db.query(Slide).filter(Slide.presentation_id.in_(presentation_ids)).delete(synchronize_session=False)
+        db.query(Presentation).filter(Presentation.id.in_(presentation_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейера генерации на заглушке модели")
+    parser.add_argument("--slides", type=int, default=14, help="Число слайдов в презентации")
+    parser.add_argument("--repeat", type=int, default=20, help="Число замеров каждого этапа")
+    parser.add_argument("--mode", choices=["sequential", "outline"], help="Режим генерации контента для запроса")
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    parser.add_argument("--compare", help="JSON-файл с результатами другого коммита для сравнения")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Допустимое замедление медианы при сравнении")
+    args = parser.parse_args()
+
+    rows = []
+    rows += benchmark_prompts(args.slides, args.repeat)
+    rows += benchmark_templates(args.repeat)
+    rows += benchmark_markdown(args.repeat)
+    rows += benchmark_db(args.slides, args.repeat)
+    rows += benchmark_endpoint(args.slides, max(args.repeat // 4, 1), args.mode)
+
+    write_results("pipeline", rows, args.output)
+
+    if args.compare:
+        regressions = compare_results(rows, args.compare, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
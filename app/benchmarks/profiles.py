@@ -0,0 +1,128 @@
+"""
+Матрица профилей генерации: скорость декодирования и доля корректного вывода.
+
+Для каждого профиля из GENERATION_PROFILES генерирует контент слайдов и код
+для них, измеряя число сгенерированных токенов в секунду и долю ответов,
+прошедших проверку: для кода - _is_valid_react_code, для контента - наличие
+заголовка после пост-обработки.
+
+Запуск: python -m app.benchmarks.profiles --slides 5 --output profiles.json
+"""
+import argparse
+import os
+import sys
+
+# Добавляем директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.benchmarks.common import write_results
+from app.config import CONTENT_MODEL, CODE_MODEL
+from app.services.content_generator import ContentGenerator
+from app.services.code_generator import CodeGenerator
+from app.services.generation_profiles import GENERATION_PROFILES
+
+BENCHMARK_TOPIC = "Искусственный интеллект в образовании"
+
+
+def _generate(generator, prompt, generation_kwargs):
+    """
+    Запускает generate и возвращает (ответ без промпта, число новых токенов, секунды)
+    """
+    result = generator.backend.generate_batch([prompt], **generation_kwargs)[0]
+    return result.text, result.generated_tokens, result.seconds
+
+
+def benchmark_content(content_generator, profile, slides):
+    """
+    Измеряет генерацию контента слайдов для профиля
+    """
+    generated_tokens = 0
+    elapsed = 0.0
+    valid = 0
+    contents = []
+
+    for slide_number in range(1, slides + 1):
+        slide_type, slide_structure = content_generator._get_slide_structure(slide_number, slides)
+        prompt = content_generator._create_detailed_prompt(
+            BENCHMARK_TOPIC, slide_number, slides, slide_type, slide_structure
+        )
+        budget = content_generator._get_slide_budget(slide_type, slide_structure, profile)
+        generation_kwargs = content_generator._get_generation_kwargs(profile, max_new_tokens=budget)
+
+        text, tokens, seconds = _generate(content_generator, prompt, generation_kwargs)
+        generated_tokens += tokens
+        elapsed += seconds
+
+        # Ответ считается корректным, если модель сама написала заголовок слайда
+        if text.lstrip().startswith("#"):
+            valid += 1
+
+        contents.append(content_generator._post_process_content(text, slide_type, slide_number))
+
+    row = _make_row(profile, CONTENT_MODEL, "content", slides, generated_tokens, elapsed, valid)
+    return row, contents
+
+
+def benchmark_code(code_generator, profile, contents):
+    """
+    Измеряет генерацию кода слайдов для профиля
+    """
+    generated_tokens = 0
+    elapsed = 0.0
+    valid = 0
+
+    for slide_content in contents:
+        slide_type = code_generator._determine_slide_type(slide_content)
+        layout = code_generator._select_layout_for_slide(slide_type)
+        prompt = code_generator._create_code_generation_prompt(slide_content, slide_type, layout, "light")
+
+        text, tokens, seconds = _generate(code_generator, prompt, code_generator._get_generation_kwargs(profile))
+        generated_tokens += tokens
+        elapsed += seconds
+
+        if code_generator._is_valid_react_code(code_generator._extract_and_clean_code(text)):
+            valid += 1
+
+    return _make_row(profile, CODE_MODEL, "code", len(contents), generated_tokens, elapsed, valid)
+
+
+def _make_row(profile, model, kind, samples, generated_tokens, elapsed, valid):
+    return {
+        "profile": profile,
+        "model": model,
+        "kind": kind,
+        "samples": samples,
+        "generated_tokens": generated_tokens,
+        "seconds": elapsed,
+        "tokens_per_sec": generated_tokens / elapsed if elapsed else 0.0,
+        "valid_rate": valid / samples if samples else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк профилей генерации")
+    parser.add_argument("--slides", type=int, default=5, help="Число слайдов на профиль")
+    parser.add_argument("--profiles", nargs="+", default=list(GENERATION_PROFILES), help="Профили для сравнения")
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    args = parser.parse_args()
+
+    content_generator = ContentGenerator()
+    code_generator = CodeGenerator()
+
+    if not content_generator.model_ready or not code_generator.model_ready:
+        print("Модели не загружены, бенчмарк профилей невозможен")
+        return 1
+
+    rows = []
+    for profile in args.profiles:
+        print(f"Профиль {profile}...")
+        content_row, contents = benchmark_content(content_generator, profile, args.slides)
+        rows.append(content_row)
+        rows.append(benchmark_code(code_generator, profile, contents))
+
+    write_results("profiles", rows, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
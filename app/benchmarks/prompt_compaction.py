@@ -0,0 +1,118 @@
+"""
+Отчет о числе токенов промптов при разных уровнях сжатия.
+
+Для каждого типа слайда собирает промпт контента и промпт генерации кода
+на уровнях none, whitespace и abbreviated и считает их токены
+токенизаторами моделей контента и кода. Так видно, сколько токенов prefill
+экономит сжатие для каждого типа слайда. Загружаются только токенизаторы,
+веса моделей не нужны.
+
+Запуск: python -m app.benchmarks.prompt_compaction --output prompt_compaction.json
+"""
+import argparse
+import os
+import sys
+
+# Добавляем директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+# Генераторы нужны только для сборки промптов, модели не загружаются
+os.environ["CONTENT_BACKEND"] = "stub"
+os.environ["CODE_BACKEND"] = "stub"
+
+from app.benchmarks.common import write_results
+from app.config import CONTENT_MODEL, CODE_MODEL
+from app.services.code_generator import CodeGenerator
+from app.services.code_prompts import get_code_prompt
+from app.services.content_generator import ContentGenerator
+from app.services.content_prompts import get_content_prompts
+from app.services.prompt_templates import PROMPT_COMPACTION_LEVELS
+from app.utils.model_loader import load_tokenizer
+
+BENCHMARK_TOPIC = "Искусственный интеллект в образовании"
+
+
+def content_rows(content_generator, tokenizer, slides, with_outline):
+    rows = []
+    seen_types = set()
+    outline = [f"Пункт плана {slide_number}" for slide_number in range(1, slides + 1)] if with_outline else None
+
+    for slide_number in range(1, slides + 1):
+        slide_type, slide_structure = content_generator._get_slide_structure(slide_number, slides)
+        if slide_type in seen_types:
+            continue
+        seen_types.add(slide_type)
+
+        counts = {}
+        for compaction in PROMPT_COMPACTION_LEVELS:
+            content_generator.prompts = get_content_prompts(compaction)
+            prompt = content_generator._create_detailed_prompt(
+                BENCHMARK_TOPIC, slide_number, slides, slide_type, slide_structure, outline=outline
+            )
+            counts[compaction] = len(tokenizer(str(prompt))["input_ids"])
+
+        rows.append(_row(f"content{':outline' if with_outline else ''}:{slide_type}", counts))
+
+    return rows
+
+
+def code_rows(content_generator, code_generator, tokenizer, slides):
+    rows = []
+    seen_types = set()
+
+    for slide_number in range(1, slides + 1):
+        # Текст слайда - заглушка контента для этой позиции, тип слайда определяет генератор кода
+        slide_content = content_generator._get_fallback_content(BENCHMARK_TOPIC, slide_number, slides)
+        slide_type = code_generator._determine_slide_type(slide_content)
+        if slide_type in seen_types:
+            continue
+        seen_types.add(slide_type)
+
+        layout = code_generator._select_layout_for_slide(slide_type)
+        theme = code_generator._select_theme_for_slide(slide_type)
+
+        counts = {}
+        for compaction in PROMPT_COMPACTION_LEVELS:
+            prompt = get_code_prompt(compaction).render(
+                slide_content=slide_content, slide_type=slide_type, layout=layout, theme=theme
+            )
+            counts[compaction] = len(tokenizer(str(prompt))["input_ids"])
+
+        rows.append(_row(f"code:{slide_type}", counts))
+
+    return rows
+
+
+def _row(name, counts):
+    row = {"name": name}
+    for compaction, tokens in counts.items():
+        row[f"{compaction}_tokens"] = tokens
+    for compaction in PROMPT_COMPACTION_LEVELS[1:]:
+        row[f"{compaction}_saved_pct"] = (1 - counts[compaction] / counts["none"]) * 100 if counts["none"] else 0.0
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Число токенов промптов при разных уровнях сжатия")
+    parser.add_argument("--content-model", default=CONTENT_MODEL, help="Модель, чей токенизатор считает промпты контента")
+    parser.add_argument("--code-model", default=CODE_MODEL, help="Модель, чей токенизатор считает промпты кода")
+    parser.add_argument("--slides", type=int, default=14, help="Число слайдов в презентации")
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    args = parser.parse_args()
+
+    content_generator = ContentGenerator()
+    code_generator = CodeGenerator()
+    content_tokenizer = load_tokenizer(args.content_model)
+    code_tokenizer = load_tokenizer(args.code_model)
+
+    rows = []
+    rows += content_rows(content_generator, content_tokenizer, args.slides, with_outline=False)
+    rows += content_rows(content_generator, content_tokenizer, args.slides, with_outline=True)
+    rows += code_rows(content_generator, code_generator, code_tokenizer, args.slides)
+
+    write_results("prompt_compaction", rows, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Проверка и замер токенизации промптов по частям (PromptTokenCache).
+
+Для токенизатора каждой модели собирает промпты всех типов слайдов (с
+планом презентации и без него) по нескольким темам и сравнивает id
+токенов, собранные из кэша статических частей, с полной токенизацией
+промпта. Печатает число расхождений и время токенизации обоими способами;
+код возврата ненулевой, если для какой-либо модели токены разошлись.
+Загружаются только токенизаторы, веса моделей не нужны.
+
+Запуск: python -m app.benchmarks.prompt_tokens --models microsoft/phi-2 Xenova/distilgpt2
+"""
+import argparse
+import os
+import sys
+import time
+
+# Добавляем директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+# Генератор нужен только для сборки промптов, модель не загружается
+os.environ["CONTENT_BACKEND"] = "stub"
+
+from app.benchmarks.common import write_results
+from app.config import CONTENT_MODEL, CODE_MODEL
+from app.services.content_generator import ContentGenerator
+from app.services.prompt_templates import PromptTokenCache
+from app.utils.model_loader import load_tokenizer
+
+# Темы с разными границами слов: кириллица, латиница, цифры, апострофы и пробелы по краям
+BENCHMARK_TOPICS = [
+    "Искусственный интеллект в образовании",
+    "ИИ в образовании",
+    "5G networks and IoT",
+    "Python's asyncio",
+    " История древнего Рима ",
+]
+
+
+def build_prompts(content_generator, slides):
+    prompts = []
+    outline = [f"Пункт плана {slide_number}" for slide_number in range(1, slides + 1)]
+
+    for topic in BENCHMARK_TOPICS:
+        for slide_number in range(1, slides + 1):
+            slide_type, slide_structure = content_generator._get_slide_structure(slide_number, slides)
+            for slide_outline in (None, outline):
+                prompts.append(content_generator._create_detailed_prompt(
+                    topic, slide_number, slides, slide_type, slide_structure, outline=slide_outline
+                ))
+
+    return prompts
+
+
+def benchmark_model(model_name, prompts, repeat):
+    tokenizer = load_tokenizer(model_name)
+
+    # Сверка отключена: здесь каждый промпт сравнивается с полной токенизацией явно
+    cache = PromptTokenCache(tokenizer, verify_uses=0)
+    mismatches = sum(1 for prompt in prompts if cache.encode(prompt) != tokenizer(str(prompt))["input_ids"])
+
+    full_seconds = _measure(lambda: [tokenizer(str(prompt))["input_ids"] for prompt in prompts], repeat)
+    cached_seconds = _measure(lambda: [cache.encode(prompt) for prompt in prompts], repeat)
+
+    return {
+        "name": model_name,
+        "tokenizer": type(tokenizer).__name__,
+        "prompts": len(prompts),
+        "mismatches": mismatches,
+        "full_ms_per_prompt": full_seconds * 1000 / len(prompts),
+        "cached_ms_per_prompt": cached_seconds * 1000 / len(prompts),
+        "speedup": full_seconds / cached_seconds if cached_seconds else 0.0,
+    }
+
+
+def _measure(func, repeat):
+    """
+    Минимальное время из repeat прогонов; первый прогон заполняет кэш
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка токенизации промптов по частям")
+    parser.add_argument("--models", nargs="+", default=[CONTENT_MODEL, CODE_MODEL], help="Модели, чьи токенизаторы проверяются")
+    parser.add_argument("--slides", type=int, default=14, help="Число слайдов в презентации")
+    parser.add_argument("--repeat", type=int, default=5, help="Число замеров")
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    args = parser.parse_args()
+
+    prompts = build_prompts(ContentGenerator(), args.slides)
+    rows = [benchmark_model(model_name, prompts, args.repeat) for model_name in args.models]
+
+    write_results("prompt_tokens", rows, args.output)
+
+    return 1 if any(row["mismatches"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
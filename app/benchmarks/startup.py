@@ -0,0 +1,89 @@
+"""
+Холодный старт и память воркеров для режимов загрузки модели.
+
+Для каждого режима MODEL_LOAD_MODE запускает несколько процессов, которые
+одновременно загружают модель, как воркеры uvicorn на одной машине, и
+измеряет время загрузки и уникальную память (USS) каждого процесса.
+В режиме mmap веса разделяются через page cache и не входят в USS.
+
+Запуск: python -m app.benchmarks.startup --model microsoft/phi-2 --workers 2 --output startup.json
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+
+# Добавляем директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.benchmarks.common import write_results
+from app.config import CONTENT_MODEL
+
+
+def _worker(model_name, mode, loaded_barrier, results):
+    # Настройки читаются при импорте app.config, поэтому задаем их до импорта
+    os.environ["MODEL_LOAD_MODE"] = mode
+
+    from app.utils.model_loader import load_causal_lm, LOAD_STATS
+    from app.utils.runtime import get_process_memory, get_process_uptime
+
+    model = load_causal_lm(model_name, mode)
+
+    # Память снимаем, когда все воркеры загрузили модель и страницы уже общие
+    loaded_barrier.wait()
+    results.put({
+        "effective_mode": LOAD_STATS[model_name]["mode"],
+        "load_seconds": LOAD_STATS[model_name]["load_seconds"],
+        "time_to_ready_seconds": get_process_uptime(),
+        **get_process_memory(),
+    })
+    loaded_barrier.wait()
+    del model
+
+
+def run(model_name, mode, workers):
+    """
+    Запускает воркеры и возвращает строки результатов по каждому процессу
+    """
+    context = multiprocessing.get_context("spawn")
+    loaded_barrier = context.Barrier(workers)
+    results = context.Queue()
+
+    processes = [
+        context.Process(target=_worker, args=(model_name, mode, loaded_barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    rows = []
+    for index in range(workers):
+        row = {"model": model_name, "mode": mode, "worker": index}
+        row.update(results.get())
+        rows.append(row)
+
+    for process in processes:
+        process.join()
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк холодного старта и памяти воркеров")
+    parser.add_argument("--model", default=CONTENT_MODEL, help="Модель для загрузки")
+    parser.add_argument("--workers", type=int, default=2, help="Число одновременно загружающихся воркеров")
+    parser.add_argument("--modes", nargs="+", default=["standard", "mmap"], help="Режимы MODEL_LOAD_MODE")
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    args = parser.parse_args()
+
+    rows = []
+    for mode in args.modes:
+        print(f"Режим {mode}, воркеров: {args.workers}...")
+        rows.extend(run(args.model, mode, args.workers))
+
+    write_results("startup", rows, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Суммарная скорость генерации в зависимости от числа процессов-воркеров.
+
+Запускает N процессов (как N воркеров uvicorn на одной машине), каждый
+загружает модель и генерирует фиксированное число токенов. Сравнивает
+разбиение ядер между воркерами (configure_torch_threads) с режимом, когда
+каждый процесс занимает все ядра.
+
+Запуск: python -m app.benchmarks.workers --workers 1 2 4 --output workers.json
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+# Добавляем директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.benchmarks.common import write_results
+from app.config import CODE_MODEL
+
+BENCHMARK_PROMPT = "import React from 'react';\n\nconst Slide = () => {"
+
+
+def _worker(model_name, workers, worker_index, partition, new_tokens, rounds, start_barrier, results):
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    from app.utils.runtime import configure_torch_threads
+
+    if partition:
+        configure_torch_threads(workers, worker_index)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name, low_cpu_mem_usage=True).eval()
+    inputs = tokenizer(BENCHMARK_PROMPT, return_tensors="pt")
+
+    # Все воркеры начинают замер одновременно, после загрузки модели
+    start_barrier.wait()
+
+    generated_tokens = 0
+    start_time = time.perf_counter()
+    with torch.inference_mode():
+        for _ in range(rounds):
+            outputs = model.generate(
+                inputs["input_ids"],
+                max_new_tokens=new_tokens,
+                min_new_tokens=new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.eos_token_id,
+            )
+            generated_tokens += outputs.shape[1] - inputs["input_ids"].shape[1]
+    elapsed = time.perf_counter() - start_time
+
+    results.put((generated_tokens, elapsed, torch.get_num_threads()))
+
+
+def run(model_name, workers, partition, new_tokens, rounds):
+    """
+    Запускает воркеры и возвращает строку результатов
+    """
+    context = multiprocessing.get_context("spawn")
+    start_barrier = context.Barrier(workers)
+    results = context.Queue()
+
+    processes = [
+        context.Process(
+            target=_worker,
+            args=(model_name, workers, index, partition, new_tokens, rounds, start_barrier, results),
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    worker_results = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    total_tokens = sum(tokens for tokens, _, _ in worker_results)
+    wall_time = max(elapsed for _, elapsed, _ in worker_results)
+
+    return {
+        "model": model_name,
+        "workers": workers,
+        "partition": partition,
+        "threads_per_worker": worker_results[0][2],
+        "generated_tokens": total_tokens,
+        "seconds": wall_time,
+        "aggregate_tokens_per_sec": total_tokens / wall_time if wall_time else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк числа воркеров и потоков PyTorch")
+    parser.add_argument("--model", default=CODE_MODEL, help="Модель для генерации")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Числа воркеров")
+    parser.add_argument("--new-tokens", type=int, default=64, help="Токенов за один вызов generate")
+    parser.add_argument("--rounds", type=int, default=5, help="Вызовов generate на воркер")
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    args = parser.parse_args()
+
+    rows = []
+    for workers in args.workers:
+        for partition in (False, True):
+            print(f"Воркеров: {workers}, разбиение ядер: {'да' if partition else 'нет'}...")
+            rows.append(run(args.model, workers, partition, args.new_tokens, args.rounds))
+
+    write_results("workers", rows, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
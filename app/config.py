@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -15,4 +16,91 @@ CODE_MODEL = os.getenv("CODE_MODEL", "Xenova/distilgpt2")  # Полностью
 CACHE_DIR = os.getenv("CACHE_DIR", "/app/model_cache")
 
 # Отключаем квантизацию для CPU
-QUANTIZATION = "none"
\ No newline at end of file
+QUANTIZATION = "none"
+
+# Настройки пакетной генерации кода
+CODE_BATCH_SIZE = int(os.getenv("CODE_BATCH_SIZE", "8"))  # Промптов в одном вызове модели
+MAX_FRONTEND_BATCH_SIZE = int(os.getenv("MAX_FRONTEND_BATCH_SIZE", "100"))  # Слайдов в одном запросе
+
+# Ограничения размера презентации
+MAX_SLIDES_COUNT = int(os.getenv("MAX_SLIDES_COUNT", "50"))  # Слайдов в одной презентации
+SLIDES_COMMIT_CHUNK = int(os.getenv("SLIDES_COMMIT_CHUNK", "5"))  # Слайдов в одной транзакции при генерации
+
+# Задачи генерации презентаций: восстановление после перезапуска воркера
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "30"))  # Секунд между heartbeat задач воркера
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "120"))  # Секунд без heartbeat, после которых задачу забирает другой воркер
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # Попыток выполнения задачи до статуса failed
+RESUME_JOBS_ON_STARTUP = os.getenv("RESUME_JOBS_ON_STARTUP", "1") == "1"  # Догенерировать брошенные задачи в фоне
+
+# Кэш готовых презентаций по похожим темам (app/services/topic_cache.py)
+TOPIC_CACHE = os.getenv("TOPIC_CACHE", "0") == "1"  # Отдавать готовую презентацию с похожей темой вместо генерации
+TOPIC_CACHE_THRESHOLD = float(os.getenv("TOPIC_CACHE_THRESHOLD", "0.85"))  # Минимальное сходство тем от 0 до 1
+TOPIC_CACHE_SIZE = int(os.getenv("TOPIC_CACHE_SIZE", "1000"))  # Презентаций в кэше воркера
+TOPIC_CACHE_NGRAM = int(os.getenv("TOPIC_CACHE_NGRAM", "3"))  # Длина символьных n-грамм для сравнения тем
+
+# Контроль нагрузки: задачи генерации в одном воркере
+GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", "1"))  # Одновременно выполняемых задач
+GENERATION_QUEUE_SIZE = int(os.getenv("GENERATION_QUEUE_SIZE", "8"))  # Задач в очереди, остальные получают 503
+GENERATION_QUEUE_TIMEOUT = float(os.getenv("GENERATION_QUEUE_TIMEOUT", "600"))  # Секунд ожидания в очереди
+GENERATION_INTERACTIVE_WEIGHT = int(os.getenv("GENERATION_INTERACTIVE_WEIGHT", "4"))  # Слотов interactive подряд на один bulk
+
+# Настройки рендеринга шаблонов
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "512"))  # Вариантов шаблонов в кэше рендеринга
+
+# Токенизация промптов из шаблонов: id статических частей кэшируются, токенизируются только слоты
+PROMPT_TOKEN_CACHE = os.getenv("PROMPT_TOKEN_CACHE", "1") == "1"
+PROMPT_TOKEN_CACHE_VERIFY = int(os.getenv("PROMPT_TOKEN_CACHE_VERIFY", "1"))  # Первых промптов шаблона, сверяемых с полной токенизацией
+
+# Сжатие промптов для каждой модели: none (как написано), whitespace (без отступов) или abbreviated (сокращенные инструкции).
+# По умолчанию none: промпты не меняются, пока нет отчета app.benchmarks.prompt_compaction и проверки качества
+CONTENT_PROMPT_COMPACTION = os.getenv("CONTENT_PROMPT_COMPACTION", "none")
+CODE_PROMPT_COMPACTION = os.getenv("CODE_PROMPT_COMPACTION", "none")
+
+# Настройки генерации контента
+CONTENT_GENERATION_MODE = os.getenv("CONTENT_GENERATION_MODE", "sequential")  # sequential или outline
+CONTENT_BATCH_SIZE = int(os.getenv("CONTENT_BATCH_SIZE", "4"))  # Слайдов в одном вызове модели (режим outline)
+OUTLINE_TOKENS_PER_SLIDE = int(os.getenv("OUTLINE_TOKENS_PER_SLIDE", "24"))  # Бюджет плана на один слайд
+
+# Бюджеты max_new_tokens для слайдов разных типов
+TOKEN_BUDGET_MODE = os.getenv("TOKEN_BUDGET_MODE", "static")  # static или learned
+SLIDE_MAX_NEW_TOKENS = int(os.getenv("SLIDE_MAX_NEW_TOKENS", "512"))  # Верхняя граница бюджета слайда
+# Токенов на строку структуры слайда. По умолчанию 0: бюджет любого слайда равен SLIDE_MAX_NEW_TOKENS, и короткие
+# типы слайдов не экономят токены, пока не задана стоимость строки, SLIDE_TOKEN_BUDGETS или режим learned
+SLIDE_TOKENS_PER_LINE = int(os.getenv("SLIDE_TOKENS_PER_LINE", "0"))
+SLIDE_TOKEN_BUDGETS = json.loads(os.getenv("SLIDE_TOKEN_BUDGETS", "{}"))  # Явные бюджеты: {"Заключение": 256}
+TOKEN_BUDGET_PERCENTILE = float(os.getenv("TOKEN_BUDGET_PERCENTILE", "95"))  # Перцентиль длины в режиме learned
+TOKEN_BUDGET_WINDOW = int(os.getenv("TOKEN_BUDGET_WINDOW", "200"))  # Последних наблюдений на тип слайда
+TOKEN_BUDGET_MIN_SAMPLES = int(os.getenv("TOKEN_BUDGET_MIN_SAMPLES", "20"))  # Наблюдений до обучения бюджета
+
+# Профиль генерации по умолчанию: quality или fast
+GENERATION_PROFILE = os.getenv("GENERATION_PROFILE", "quality")
+
+# Настройки потоков PyTorch для инференса на CPU
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))  # Число процессов-воркеров uvicorn на машине
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", "0"))  # Потоков внутри операций, 0 - поровну между воркерами
+TORCH_INTEROP_THREADS = int(os.getenv("TORCH_INTEROP_THREADS", "1"))  # Потоков между операциями
+CPU_AFFINITY = os.getenv("CPU_AFFINITY", "none")  # none, auto (свой набор ядер на воркер) или список, например 0-3,8
+
+# Настройки инференса
+# baseline (float32) или lean (bf16 на CPU с поддержкой); по умолчанию baseline, пока нет замеров app.benchmarks.inference
+INFERENCE_PROFILE = os.getenv("INFERENCE_PROFILE", "baseline")
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "0") == "1"  # Компилировать forward модели через torch.compile
+MODEL_LOAD_MODE = os.getenv("MODEL_LOAD_MODE", "standard")  # standard или mmap (веса safetensors отображаются в память)
+
+# Локальные проверенные снимки моделей (готовит app/utils/download_models.py)
+MODEL_SNAPSHOT_DIR = os.getenv("MODEL_SNAPSHOT_DIR", os.path.join(CACHE_DIR, "snapshots"))
+OFFLINE_MODELS = os.getenv("OFFLINE_MODELS", "0") == "1"  # Загружать модели только из локальных снимков
+VERIFY_SNAPSHOT_CHECKSUMS = os.getenv("VERIFY_SNAPSHOT_CHECKSUMS", "0") == "1"  # Сверять sha256 снимка при запуске
+
+# Бэкенды инференса (app/services/backends); stub - детерминированная заглушка без модели
+CONTENT_BACKEND = os.getenv("CONTENT_BACKEND", "transformers")  # transformers или stub
+CODE_BACKEND = os.getenv("CODE_BACKEND", "transformers")  # transformers, onnx или stub
+CODE_ONNX_FILE = os.getenv("CODE_ONNX_FILE", "onnx/decoder_model_merged.onnx")  # Граф с KV-кэшем внутри репозитория модели
+
+# Заглушка модели для нагрузочного тестирования (бэкенд stub)
+STUB_TOKENS_PER_SEC = float(os.getenv("STUB_TOKENS_PER_SEC", "0"))  # Скорость декодирования, 0 - без задержек
+STUB_PREFILL_TOKENS_PER_SEC = float(os.getenv("STUB_PREFILL_TOKENS_PER_SEC", "0"))  # Скорость обработки промпта, 0 - мгновенно
+STUB_LENGTH_RATIO = float(os.getenv("STUB_LENGTH_RATIO", "0.6"))  # Медианная длина ответа как доля max_new_tokens
+STUB_LENGTH_SIGMA = float(os.getenv("STUB_LENGTH_SIGMA", "0.35"))  # Разброс длины ответа (логнормальное распределение)
+STUB_LATENCY_SIGMA = float(os.getenv("STUB_LATENCY_SIGMA", "0.2"))  # Разброс задержки (логнормальный множитель)
+STUB_SEED = int(os.getenv("STUB_SEED", "0"))  # Зерно: при одном зерне ответы и задержки повторяются
@@ -1,9 +1,20 @@
+import os
+import time
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from app.config import RESUME_JOBS_ON_STARTUP
 from app.database import engine, Base
 from app.routers import presentations
+from app.services import generation_jobs
+from app.utils.metrics import (
+    REQUEST_DURATION, start_request_trace, finish_request_trace, format_server_timing, render_metrics
+)
+from app.utils.model_loader import LOAD_STATS
+from app.utils.runtime import get_process_memory, get_process_uptime
 
 # Создаем таблицы базы данных
 Base.metadata.create_all(bind=engine)
@@ -24,13 +35,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# Время запроса и его этапов: гистограммы для /metrics и заголовок Server-Timing в ответе
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    trace_token = start_request_trace()
+    start_time = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        finish_request_trace(trace_token)
+        raise
+
+    duration = time.perf_counter() - start_time
+    stage_totals = finish_request_trace(trace_token)
+
+    # Метка по обработчику, а не по пути, чтобы id презентаций не размножали ряды метрик
+    handler = getattr(request.scope.get("endpoint"), "__name__", "unmatched")
+    REQUEST_DURATION.observe(duration, method=request.method, handler=handler, status=response.status_code)
+
+    stage_totals["total"] = duration
+    response.headers["Server-Timing"] = format_server_timing(stage_totals)
+    return response
+
+
 # Подключаем роутеры
 app.include_router(presentations.router, tags=["presentations"])
 
+# Статистика запуска процесса, заполняется, когда приложение готово принимать запросы
+startup_stats = {}
+
+
+@app.on_event("startup")
+def record_startup_stats():
+    startup_stats["time_to_ready_seconds"] = get_process_uptime()
+    startup_stats["memory_at_ready"] = get_process_memory()
+    startup_stats["models"] = LOAD_STATS
+
+    memory = startup_stats["memory_at_ready"]
+    print(f"Процесс {os.getpid()} готов за {startup_stats['time_to_ready_seconds'] or 0:.2f} секунд, "
+          f"RSS {memory.get('rss_mb', 0):.0f} МБ, уникальная память {memory.get('uss_mb', 0):.0f} МБ")
+
+
+# Heartbeat задач воркера и догенерация задач, брошенных перезапущенными или упавшими воркерами
+@app.on_event("startup")
+def start_generation_jobs():
+    # Без heartbeat задачи этого воркера через JOB_STALE_AFTER секунд считаются брошенными
+    generation_jobs.start_heartbeat()
+    if RESUME_JOBS_ON_STARTUP:
+        presentations.start_job_recovery()
+
+
 # Корневой эндпоинт
 @app.get("/")
 def read_root():
     return {"message": "Добро пожаловать в API генератора презентаций"}
 
+
+# Время запуска и память текущего воркера
+@app.get("/startup")
+def read_startup_stats():
+    return {
+        "pid": os.getpid(),
+        **startup_stats,
+        "memory_now": get_process_memory()
+    }
+
+
+# Метрики воркера в текстовом формате Prometheus
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
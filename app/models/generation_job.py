@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class GenerationJob(Base):
+    """
+    Задача генерации презентации.
+
+    Хранит параметры генерации и владельца задачи. Воркер-владелец
+    периодически обновляет heartbeat_at; задачу с устаревшим heartbeat
+    другой воркер может забрать и догенерировать недостающие слайды.
+    План режима outline сохраняется в задаче при первой генерации, чтобы
+    догенерированные слайды не расходились с уже сохраненными.
+    """
+    __tablename__ = "generation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    presentation_id = Column(Integer, ForeignKey("presentations.id"), unique=True, index=True, nullable=False)
+    # pending, running, completed или failed
+    status = Column(String(16), index=True, nullable=False, default="pending")
+    mode = Column(String(16), nullable=True)
+    profile = Column(String(16), nullable=True)
+    # План презентации режима outline (JSON-список заголовков): догенерация раскрывает тот же план
+    outline = Column(Text, nullable=True)
+    # Воркер, выполняющий задачу: "хост:pid:uuid"
+    worker_id = Column(String(128), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    slides = relationship(
+        "GenerationJobSlide",
+        back_populates="job",
+        cascade="all, delete-orphan",
+        order_by="GenerationJobSlide.slide_number"
+    )
+
+
+class GenerationJobSlide(Base):
+    """
+    Состояние одного слайда задачи генерации: pending, done или failed
+    """
+    __tablename__ = "generation_job_slides"
+    __table_args__ = (UniqueConstraint("job_id", "slide_number"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("generation_jobs.id"), index=True, nullable=False)
+    slide_number = Column(Integer, nullable=False)
+    status = Column(String(16), nullable=False, default="pending")
+    error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    job = relationship("GenerationJob", back_populates="slides")
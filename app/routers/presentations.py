@@ -1,11 +1,26 @@
+import threading
+import time
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from app.database import get_db
+from app.config import (
+    CONTENT_GENERATION_MODE, GENERATION_PROFILE, JOB_HEARTBEAT_INTERVAL, MAX_FRONTEND_BATCH_SIZE, MAX_SLIDES_COUNT,
+    SLIDES_COMMIT_CHUNK, TOPIC_CACHE
+)
+from app.database import SessionLocal, get_db
+from app.models.generation_job import GenerationJob
 from app.models.presentation import Presentation, Slide
+from app.services import generation_jobs
 from app.services.content_generator import ContentGenerator
 from app.services.code_generator import CodeGenerator
+from app.services.coalescing import SingleFlight, normalize_topic
+from app.services.generation_profiles import GENERATION_PROFILES
+from app.services.scheduler import GenerationRejected, GenerationScheduler
+from app.services.topic_cache import TopicCache
+from app.utils.metrics import generation_telemetry, span, summarize_generation_telemetry
 
 router = APIRouter()
 
@@ -13,6 +28,15 @@ router = APIRouter()
 content_generator = ContentGenerator()
 code_generator = CodeGenerator()
 
+# Ограничение числа одновременных задач генерации и очереди к ним
+generation_scheduler = GenerationScheduler()
+
+# Одинаковые одновременные запросы презентаций (например, повторы из интерфейса) получают одну генерацию
+presentation_flights = SingleFlight("generate_presentation")
+
+# Готовые презентации по похожим темам, включается TOPIC_CACHE=1
+topic_cache = TopicCache()
+
 
 @router.post("/generate_presentation", status_code=status.HTTP_201_CREATED)
 async def generate_presentation(
@@ -22,6 +46,10 @@ async def generate_presentation(
     # Извлекаем параметры из запроса
     topic = request.get("topic")
     slides_count = request.get("slides_count", 14)  # По умолчанию 14 слайдов
+    mode = request.get("mode")  # sequential или outline, по умолчанию из настроек
+    profile = request.get("profile")  # quality или fast, по умолчанию из настроек
+    include_telemetry = bool(request.get("telemetry", False))  # Добавить в ответ телеметрию генерации
+    use_cache = TOPIC_CACHE and bool(request.get("cache", True))  # Искать готовую презентацию по похожей теме
 
     if not topic:
         raise HTTPException(
@@ -29,48 +57,237 @@ async def generate_presentation(
             detail="Необходимо указать тему"
         )
 
+    if not isinstance(slides_count, int) or isinstance(slides_count, bool) \
+            or not 1 <= slides_count <= MAX_SLIDES_COUNT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Количество слайдов должно быть целым числом от 1 до {MAX_SLIDES_COUNT}"
+        )
+
+    _validate_mode(mode)
+    _validate_profile(profile)
+
+    if use_cache:
+        cached = topic_cache.lookup(db, topic, slides_count, mode, profile)
+        if cached is not None:
+            presentation_id, similarity = cached
+            response = {
+                "status": "success",
+                "presentation_id": presentation_id,
+                "message": "Найдена готовая презентация по похожей теме",
+                "cached": True,
+                "similarity": round(similarity, 3)
+            }
+            if include_telemetry:
+                response["telemetry"] = summarize_generation_telemetry([])
+            return response
+
+    # Ключ - нормализованные параметры, влияющие на результат; телеметрия собирается всегда
+    key = (normalize_topic(topic), slides_count, mode or CONTENT_GENERATION_MODE, profile or GENERATION_PROFILE)
+
+    # Презентация - задача bulk: правки отдельных слайдов выполняются между ее вызовами модели.
+    # Сессию БД задача открывает сама: сессия запроса закрывается при его отмене, а задача продолжается
+    result, coalesced = await presentation_flights.run(
+        key, _run_generation, "bulk", _generate_presentation, topic, slides_count, mode, profile
+    )
+
+    response = {name: value for name, value in result.items() if name != "telemetry"}
+    if coalesced:
+        response["coalesced"] = True
+    elif TOPIC_CACHE:
+        topic_cache.add(result["presentation_id"], topic, slides_count, mode, profile)
+    if include_telemetry:
+        response["telemetry"] = result["telemetry"]
+
+    return response
+
+
+def _generate_presentation(topic, slides_count, mode, profile):
+    """
+    Генерирует и сохраняет презентацию в собственной сессии БД; выполняется в пуле потоков
+    """
+    db = SessionLocal()
+    try:
+        return _create_and_generate_presentation(db, topic, slides_count, mode, profile)
+    finally:
+        db.close()
+
+
+def _create_and_generate_presentation(db, topic, slides_count, mode, profile):
     # Создаем запись презентации
     db_presentation = Presentation(
         topic=topic,
         slides_count=slides_count
     )
     db.add(db_presentation)
-    db.commit()
+    db.flush()
+
+    # Задача генерации с состоянием слайдов: после перезапуска воркера ее догенерирует другой воркер
+    job = generation_jobs.create_job(db, db_presentation, mode, profile)
+    with span("db_commit"):
+        db.commit()
     db.refresh(db_presentation)
 
-    # Генерируем контент для всех слайдов
+    # Генерируем контент и код всех слайдов, сохраняя их частями
+    with generation_telemetry() as telemetry:
+        _generate_and_store_slides(db, db_presentation, job, range(1, slides_count + 1), mode, profile)
+
+    return {
+        "status": "success",
+        "presentation_id": db_presentation.id,
+        "message": "Презентация успешно сгенерирована",
+        "telemetry": summarize_generation_telemetry(telemetry)
+    }
+
+
+@router.post("/presentation/{presentation_id}/resume")
+async def resume_presentation(
+        presentation_id: int,
+        mode: Optional[str] = None,
+        profile: Optional[str] = None,
+        telemetry: bool = False,
+        db: Session = Depends(get_db)
+):
+    _validate_mode(mode)
+    _validate_profile(profile)
+
+    db_presentation = db.query(Presentation).filter(Presentation.id == presentation_id).first()
+
+    if not db_presentation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Презентация не найдена"
+        )
+
+    # Догенерируем только слайды, которые не были сохранены
+    missing_numbers = _get_missing_slide_numbers(db, db_presentation)
+
+    if missing_numbers:
+        job = generation_jobs.get_job(db, presentation_id)
+        if job is None:
+            # Презентация создана до появления задач генерации
+            job = generation_jobs.create_job(db, db_presentation, mode, profile)
+            db.commit()
+        elif not generation_jobs.claim_job(db, job.id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Презентация уже генерируется другим воркером"
+            )
+        db.refresh(job)
+
+        # Без явных параметров продолжаем с параметрами исходной генерации
+        mode = mode or job.mode
+        profile = profile or job.profile
+
+        try:
+            generations = await _run_generation(
+                "bulk", _resume_presentation, db, db_presentation, job, missing_numbers, mode, profile
+            )
+        except HTTPException as e:
+            if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                generation_jobs.release_job(db, job.id)
+            raise
+    else:
+        generations = []
+
+    response = {
+        "status": "success",
+        "presentation_id": db_presentation.id,
+        "generated_slides": missing_numbers
+    }
+    if telemetry:
+        response["telemetry"] = summarize_generation_telemetry(generations)
+
+    return response
+
+
+def _resume_presentation(db, db_presentation, job, slide_numbers, mode, profile):
+    """
+    Догенерирует недостающие слайды презентации; выполняется в пуле потоков
+    """
+    with generation_telemetry() as generations:
+        _generate_and_store_slides(db, db_presentation, job, slide_numbers, mode, profile)
+
+    return generations
+
+
+def _get_missing_slide_numbers(db, db_presentation):
+    """
+    Возвращает номера слайдов презентации, которых нет в базе
+    """
+    saved_numbers = {
+        slide_number for (slide_number,) in
+        db.query(Slide.slide_number).filter(Slide.presentation_id == db_presentation.id).all()
+    }
+    return [
+        slide_number for slide_number in range(1, db_presentation.slides_count + 1)
+        if slide_number not in saved_numbers
+    ]
+
+
+def _generate_and_store_slides(db, db_presentation, job, slide_numbers, mode, profile):
+    """
+    Генерирует слайды и сохраняет их транзакциями по SLIDES_COMMIT_CHUNK слайдов.
+
+    Вместе с каждой частью слайдов фиксируется их состояние в задаче
+    генерации. Ошибка откатывает только текущую часть: уже сохраненные
+    слайды остаются, а недостающие можно догенерировать через
+    /presentation/{id}/resume.
+    """
+    saved = 0
+    pending = []
+
     try:
-        slides_content = content_generator.generate_all_slides(topic, slides_count)
+        outline = None
+        if (mode or CONTENT_GENERATION_MODE) == "outline":
+            # План сохраняется до первого слайда: догенерация раскроет те же пункты плана
+            outline = generation_jobs.get_outline(job, db_presentation.slides_count)
+            if outline is None:
+                outline = content_generator.generate_outline(
+                    db_presentation.topic, db_presentation.slides_count, profile
+                )
+                generation_jobs.save_outline(db, job, outline)
+                with span("db_commit"):
+                    db.commit()
 
-        # Генерируем код и сохраняем слайды
-        for slide_data in slides_content:
+        for slide_data in content_generator.iter_slides(
+                db_presentation.topic, db_presentation.slides_count, mode, profile, slide_numbers, outline
+        ):
             slide_content = slide_data["content"]
-            slide_number = slide_data["slide_number"]
 
             # Генерируем код фронтенда для слайда
-            frontend_code = code_generator.generate_frontend_code(slide_content)
+            frontend_code = code_generator.generate_frontend_code(slide_content, profile=profile)
 
             # Создаем запись слайда
-            db_slide = Slide(
+            db.add(Slide(
                 presentation_id=db_presentation.id,
-                slide_number=slide_number,
+                slide_number=slide_data["slide_number"],
                 content=slide_content,
                 code=frontend_code
-            )
-            db.add(db_slide)
+            ))
+            pending.append(slide_data["slide_number"])
 
-        db.commit()
+            if len(pending) >= SLIDES_COMMIT_CHUNK:
+                generation_jobs.mark_slides(db, job, pending, "done")
+                with span("db_commit"):
+                    db.commit()
+                saved += len(pending)
+                pending = []
 
-        return {
-            "status": "success",
-            "presentation_id": db_presentation.id,
-            "message": "Презентация успешно сгенерирована"
-        }
+        if pending:
+            generation_jobs.mark_slides(db, job, pending, "done")
+            with span("db_commit"):
+                db.commit()
+
+        generation_jobs.finish_job(db, job)
     except Exception as e:
         db.rollback()
+        # Незафиксированная часть отмечается неудачной, сохраненные слайды остаются готовыми
+        generation_jobs.fail_job(db, job, pending, str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Ошибка при генерации презентации: {str(e)}"
+            detail=f"Ошибка при генерации презентации: {str(e)}. Сохранено слайдов: {saved}, "
+                   f"продолжить генерацию: POST /presentation/{db_presentation.id}/resume"
         )
 
 
@@ -107,6 +324,153 @@ async def get_presentation(
     }
 
 
+@router.post("/presentation/{presentation_id}/render")
+async def render_presentation(
+        presentation_id: int,
+        theme: str = "auto",
+        layout: str = "auto",
+        persist: bool = False,
+        db: Session = Depends(get_db)
+):
+    db_presentation = db.query(Presentation).filter(Presentation.id == presentation_id).first()
+
+    if not db_presentation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Презентация не найдена"
+        )
+
+    db_slides = db.query(Slide).filter(Slide.presentation_id == presentation_id).order_by(Slide.slide_number).all()
+
+    try:
+        # Перерисовываем код из сохраненного содержимого без запуска модели
+        slides = []
+        for slide in db_slides:
+            code = code_generator.render_template_code(slide.content, layout, theme)
+
+            if persist:
+                slide.code = code
+
+            slides.append({
+                "slide_id": slide.slide_number,
+                "content": slide.content,
+                "code": code
+            })
+
+        if persist:
+            with span("db_commit"):
+                db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка при рендеринге презентации: {str(e)}"
+        )
+
+    return {
+        "presentation_id": db_presentation.id,
+        "topic": db_presentation.topic,
+        "theme": theme,
+        "layout": layout,
+        "slides": slides
+    }
+
+
+@router.post("/presentation/{presentation_id}/slides/{slide_number}/regenerate")
+async def regenerate_slide(
+        presentation_id: int,
+        slide_number: int,
+        theme: str = "auto",
+        layout: str = "auto",
+        profile: Optional[str] = None,
+        telemetry: bool = False,
+        db: Session = Depends(get_db)
+):
+    _validate_profile(profile)
+
+    db_presentation = db.query(Presentation).filter(Presentation.id == presentation_id).first()
+
+    if not db_presentation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Презентация не найдена"
+        )
+
+    if slide_number < 1 or slide_number > db_presentation.slides_count:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Слайд не найден"
+        )
+
+    db_slide = db.query(Slide).filter(
+        Slide.presentation_id == presentation_id,
+        Slide.slide_number == slide_number
+    ).first()
+
+    try:
+        slide_content, frontend_code, generations = await _run_generation(
+            "interactive", _generate_slide, db_presentation, slide_number, layout, theme, profile
+        )
+
+        if db_slide:
+            db_slide.content = slide_content
+            db_slide.code = frontend_code
+        else:
+            # Слайд мог не сохраниться при первой генерации
+            db_slide = Slide(
+                presentation_id=db_presentation.id,
+                slide_number=slide_number,
+                content=slide_content,
+                code=frontend_code
+            )
+            db.add(db_slide)
+
+        # Слайд готов: догенерация задачи не должна перезаписать его
+        job = generation_jobs.get_job(db, db_presentation.id)
+        if job:
+            generation_jobs.mark_slides(db, job, [slide_number], "done")
+
+        with span("db_commit"):
+            db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка при генерации слайда: {str(e)}"
+        )
+
+    response = {
+        "status": "success",
+        "presentation_id": db_presentation.id,
+        "slide_id": slide_number,
+        "content": slide_content,
+        "code": frontend_code
+    }
+    if telemetry:
+        response["telemetry"] = summarize_generation_telemetry(generations)
+
+    return response
+
+
+def _generate_slide(db_presentation, slide_number, layout, theme, profile):
+    """
+    Генерирует содержимое и код одного слайда; выполняется в пуле потоков
+    """
+    with generation_telemetry() as generations:
+        # Перегенерируем только этот слайд с той же темой и общим числом слайдов
+        slide_content = content_generator.generate_slide_content(
+            db_presentation.topic,
+            slide_number,
+            db_presentation.slides_count,
+            profile=profile
+        )
+        frontend_code = code_generator.generate_frontend_code(slide_content, layout, theme, profile)
+
+    return slide_content, frontend_code, generations
+
+
 @router.post("/generate_frontend_code")
 async def generate_frontend_code(
         request: Dict[str, Any]
@@ -114,6 +478,7 @@ async def generate_frontend_code(
     slide_content = request.get("slide_content")
     layout = request.get("layout", "single-column")
     theme = request.get("theme", "light")
+    profile = request.get("profile")
 
     if not slide_content:
         raise HTTPException(
@@ -121,16 +486,172 @@ async def generate_frontend_code(
             detail="Необходимо указать содержимое слайда"
         )
 
+    _validate_profile(profile)
+
     try:
         # Генерируем код фронтенда
-        code = code_generator.generate_frontend_code(slide_content, layout, theme)
+        code = await _run_generation("interactive", code_generator.generate_frontend_code, slide_content, layout, theme, profile)
 
         return {
             "status": "success",
             "code": code
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при генерации кода: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/generate_frontend_code/batch")
+async def generate_frontend_code_batch(
+        request: Dict[str, Any]
+):
+    items = request.get("items")
+    profile = request.get("profile")
+
+    if not items or not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Необходимо указать непустой список слайдов"
+        )
+
+    if len(items) > MAX_FRONTEND_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Слишком много слайдов в запросе (максимум {MAX_FRONTEND_BATCH_SIZE})"
+        )
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("slide_content"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Необходимо указать содержимое слайда (элемент {index})"
+            )
+
+    _validate_profile(profile)
+
+    batch = [
+        {
+            "slide_content": item["slide_content"],
+            "layout": item.get("layout", "single-column"),
+            "theme": item.get("theme", "light")
+        }
+        for item in items
+    ]
+
+    try:
+        # Генерируем код для всех слайдов одним пакетом
+        codes = await _run_generation("bulk", code_generator.generate_frontend_code_batch, batch, profile)
+
+        return {
+            "status": "success",
+            "codes": codes
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка при генерации кода: {str(e)}"
+        )
+
+
+def _validate_mode(mode):
+    """
+    Проверяет режим генерации контента из запроса
+    """
+    if mode is not None and mode not in ("sequential", "outline"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Режим генерации должен быть sequential или outline"
+        )
+
+
+def _validate_profile(profile):
+    """
+    Проверяет, что профиль генерации из запроса существует
+    """
+    if profile is not None and profile not in GENERATION_PROFILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Профиль генерации должен быть одним из: {', '.join(GENERATION_PROFILES)}"
+        )
+
+
+async def _run_generation(priority, func, *args):
+    """
+    Выполняет задачу генерации в пуле потоков под контролем планировщика.
+
+    priority - класс приоритета задачи: interactive для одного слайда,
+    bulk для презентации или пакета слайдов.
+
+    Модель занимает процессор на минуты, поэтому задача не блокирует цикл
+    событий, а при заполненной очереди или истекшем ожидании запрос
+    отклоняется с 503 и заголовком Retry-After.
+    """
+    try:
+        with generation_scheduler.admit(priority) as admission:
+            return await run_in_threadpool(admission.run, func, *args)
+    except GenerationRejected as e:
+        if e.reason == "queue_full":
+            detail = "Сервер занят генерацией, очередь заполнена. Повторите запрос позже"
+        else:
+            detail = "Истекло время ожидания в очереди генерации. Повторите запрос позже"
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def start_job_recovery():
+    """
+    Запускает поток, догенерирующий брошенные задачи
+    """
+    threading.Thread(target=_recover_generation_jobs, name="job-recovery", daemon=True).start()
+
+
+def _recover_generation_jobs():
+    """
+    Периодически забирает задачи генерации, владелец которых перестал
+    обновлять heartbeat (воркер перезапущен или упал), и догенерирует
+    их недостающие слайды как задачи bulk.
+    """
+    while True:
+        db = SessionLocal()
+        try:
+            for job_id in generation_jobs.find_stale_jobs(db):
+                if generation_jobs.claim_job(db, job_id):
+                    _recover_generation_job(db, job_id)
+        except Exception as e:
+            db.rollback()
+            print(f"Ошибка при восстановлении задач генерации: {e}")
+        finally:
+            db.close()
+
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+
+
+def _recover_generation_job(db, job_id):
+    job = db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+    db_presentation = db.query(Presentation).filter(Presentation.id == job.presentation_id).first()
+    missing_numbers = _get_missing_slide_numbers(db, db_presentation)
+
+    if not missing_numbers:
+        generation_jobs.finish_job(db, job)
+        return
+
+    print(f"Продолжаем генерацию презентации {db_presentation.id}: "
+          f"слайды {missing_numbers}, попытка {job.attempts}")
+    try:
+        with generation_scheduler.admit("bulk") as admission:
+            admission.run(
+                _generate_and_store_slides, db, db_presentation, job, missing_numbers, job.mode, job.profile
+            )
+    except GenerationRejected:
+        # Воркер занят: задачу заберет следующий проход восстановления
+        generation_jobs.release_job(db, job_id)
+    except HTTPException as e:
+        print(f"Не удалось продолжить генерацию презентации {db_presentation.id}: {e.detail}")
@@ -0,0 +1,18 @@
+def create_backend(backend_name, model_kind, model_name):
+    """
+    Создает и загружает бэкенд инференса по имени: transformers, onnx или stub
+    """
+    if backend_name == "transformers":
+        from app.services.backends.transformers_backend import TransformersBackend
+        backend = TransformersBackend(model_kind, model_name)
+    elif backend_name == "onnx":
+        from app.services.backends.onnx_backend import OnnxBackend
+        backend = OnnxBackend(model_kind, model_name)
+    elif backend_name == "stub":
+        from app.services.backends.stub_backend import StubBackend
+        backend = StubBackend(model_kind, model_name)
+    else:
+        raise ValueError(f"Неизвестный бэкенд инференса: {backend_name}")
+
+    backend.load()
+    return backend
@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class GenerationResult:
+    """
+    Результат генерации для одного промпта.
+
+    Время (seconds, prefill_seconds, decode_seconds) относится ко всему
+    вызову generate_batch, в котором промпт обрабатывался вместе с
+    batch_size - 1 другими.
+    """
+    text: str
+    token_ids: List[int] = field(default_factory=list)
+    prompt_tokens: int = 0
+    generated_tokens: int = 0
+    seconds: float = 0.0
+    prefill_seconds: float = 0.0
+    decode_seconds: float = 0.0
+    batch_size: int = 1
+
+
+class InferenceBackend:
+    """
+    Общий интерфейс бэкендов инференса для генераторов контента и кода.
+
+    Бэкенд отвечает за загрузку модели, токенизацию и генерацию, поэтому
+    пакетная обработка, кэширование и альтернативные среды выполнения
+    подключаются в одном месте для обоих генераторов. Генераторы передают
+    промпты и параметры generate, а получают GenerationResult с текстом
+    ответа без промпта и числом токенов.
+    """
+
+    name = "base"
+
+    def __init__(self, model_kind, model_name):
+        # model_kind - "content" или "code", model_name - имя или путь модели
+        self.model_kind = model_kind
+        self.model_name = model_name
+
+    def load(self):
+        """
+        Загружает модель; при ошибке выбрасывает исключение
+        """
+        raise NotImplementedError
+
+    def tokenize(self, text):
+        """
+        Возвращает список id токенов текста
+        """
+        raise NotImplementedError
+
+    def generate_batch(self, prompts, **generation_kwargs):
+        """
+        Генерирует продолжения для списка промптов и возвращает список GenerationResult
+        """
+        raise NotImplementedError
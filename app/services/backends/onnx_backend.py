@@ -0,0 +1,220 @@
+import json
+import os
+
+import numpy as np
+import torch
+
+from app.config import CACHE_DIR, CODE_ONNX_FILE, TORCH_INTEROP_THREADS
+from app.services.backends.transformers_backend import TransformersBackend
+from app.utils.model_loader import resolve_model_source
+
+# Типы входов ONNX и соответствующие типы numpy
+ONNX_DTYPES = {
+    "tensor(float)": np.float32,
+    "tensor(float16)": np.float16,
+}
+
+
+class OnnxBackend(TransformersBackend):
+    """
+    Бэкенд на ONNX Runtime: токенизатор transformers и граф ONNX вместо модели PyTorch
+    """
+
+    name = "onnx"
+
+    def _load_model(self):
+        print("Используется ONNX Runtime (CPU)")
+        return OnnxCausalLM(self.model_name)
+
+
+class OnnxCausalLM:
+    """
+    Декодерная языковая модель, экспортированная в ONNX, на ONNX Runtime (CPU).
+
+    Повторяет ту часть интерфейса transformers, которой пользуются генераторы:
+    атрибут device и метод generate, принимающий и возвращающий тензоры torch.
+    Декодирование идет с KV-кэшем: на каждом шаге в граф подается только
+    новый токен и сохраненные ключи/значения внимания, поэтому накладные
+    расходы Python на токен ограничиваются одним вызовом session.run.
+    """
+
+    def __init__(self, model_name, onnx_file=CODE_ONNX_FILE):
+        import onnxruntime
+
+        source, local_files_only = resolve_model_source(model_name)
+        model_path = self._resolve_file(source, onnx_file, local_files_only)
+        config = self._read_config(source, local_files_only)
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # Потоки ONNX Runtime согласованы с бюджетом потоков PyTorch для этого воркера
+        session_options.intra_op_num_threads = torch.get_num_threads()
+        session_options.inter_op_num_threads = TORCH_INTEROP_THREADS
+
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=session_options, providers=["CPUExecutionProvider"]
+        )
+        self.device = torch.device("cpu")
+        self.eos_token_id = config.get("eos_token_id")
+
+        inputs = {node.name: node for node in self.session.get_inputs()}
+        self.input_names = set(inputs)
+        self.past_names = sorted(name for name in inputs if name.startswith("past_key_values."))
+        self.output_names = [node.name for node in self.session.get_outputs()]
+
+        # Форма кэша: [batch, heads, past_sequence_length, head_dim]
+        if self.past_names:
+            past_input = inputs[self.past_names[0]]
+            self.past_dtype = ONNX_DTYPES.get(past_input.type, np.float32)
+            heads, head_dim = past_input.shape[1], past_input.shape[3]
+            if not isinstance(heads, int) or not isinstance(head_dim, int):
+                heads = config.get("n_head") or config.get("num_attention_heads")
+                head_dim = (config.get("n_embd") or config.get("hidden_size")) // heads
+            self.num_heads, self.head_dim = heads, head_dim
+
+    def generate(self, input_ids, attention_mask=None, max_new_tokens=20, min_new_tokens=0, do_sample=False,
+                 temperature=1.0, top_k=0, top_p=1.0, repetition_penalty=1.0, pad_token_id=None,
+                 eos_token_id=None, streamer=None, **unused_kwargs):
+        """
+        Генерирует продолжения и возвращает тензор [batch, prompt + новые токены], как transformers
+        """
+        sequences = input_ids.cpu().numpy().astype(np.int64)
+        if attention_mask is None:
+            mask = np.ones_like(sequences)
+        else:
+            mask = attention_mask.cpu().numpy().astype(np.int64)
+
+        batch_size = sequences.shape[0]
+        eos_token_id = eos_token_id if eos_token_id is not None else self.eos_token_id
+        pad_token_id = pad_token_id if pad_token_id is not None else eos_token_id
+
+        if streamer is not None:
+            streamer.put(input_ids)
+
+        past = self._empty_past(batch_size)
+        step_ids = sequences
+        finished = np.zeros(batch_size, dtype=bool)
+
+        for step in range(max_new_tokens):
+            outputs = self.session.run(None, self._make_feed(step_ids, mask, past, step > 0))
+            outputs = dict(zip(self.output_names, outputs))
+
+            logits = outputs["logits"][:, -1, :].astype(np.float32)
+            if self.past_names:
+                past = {
+                    name: outputs[name.replace("past_key_values.", "present.")]
+                    for name in self.past_names
+                }
+
+            if step < min_new_tokens and eos_token_id is not None:
+                logits[:, eos_token_id] = -np.inf
+
+            logits = self._process_logits(logits, sequences, temperature, top_k, top_p, repetition_penalty, do_sample)
+            if do_sample:
+                next_tokens = self._sample(logits)
+            else:
+                next_tokens = logits.argmax(axis=-1)
+
+            # Закончившие строки пакета дополняются pad-токеном
+            if pad_token_id is not None:
+                next_tokens = np.where(finished, pad_token_id, next_tokens)
+
+            sequences = np.concatenate([sequences, next_tokens[:, None]], axis=1)
+            if streamer is not None:
+                streamer.put(torch.from_numpy(next_tokens))
+            mask = np.concatenate([mask, np.ones((batch_size, 1), dtype=np.int64)], axis=1)
+
+            if eos_token_id is not None:
+                finished |= next_tokens == eos_token_id
+                if finished.all():
+                    break
+
+            # Без входов кэша граф каждый раз пересчитывает всю последовательность
+            step_ids = next_tokens[:, None] if self.past_names else sequences
+
+        if streamer is not None:
+            streamer.end()
+
+        return torch.from_numpy(sequences)
+
+    def _make_feed(self, step_ids, mask, past, use_cache_branch):
+        """
+        Собирает входы графа для одного шага декодирования
+        """
+        feed = {"input_ids": step_ids, "attention_mask": mask}
+
+        if "position_ids" in self.input_names:
+            positions = np.clip(np.cumsum(mask, axis=1) - 1, 0, None)
+            feed["position_ids"] = positions[:, -step_ids.shape[1]:]
+
+        if "use_cache_branch" in self.input_names:
+            feed["use_cache_branch"] = np.array([use_cache_branch], dtype=bool)
+
+        feed.update(past)
+        return feed
+
+    def _empty_past(self, batch_size):
+        """
+        Возвращает пустой KV-кэш для первого шага
+        """
+        return {
+            name: np.zeros((batch_size, self.num_heads, 0, self.head_dim), dtype=self.past_dtype)
+            for name in self.past_names
+        }
+
+    def _process_logits(self, logits, sequences, temperature, top_k, top_p, repetition_penalty, do_sample):
+        """
+        Применяет штраф за повторы и, при сэмплировании, temperature/top-k/top-p, как transformers
+        """
+        if repetition_penalty and repetition_penalty != 1.0:
+            rows = np.arange(logits.shape[0])[:, None]
+            scores = logits[rows, sequences]
+            logits[rows, sequences] = np.where(scores < 0, scores * repetition_penalty, scores / repetition_penalty)
+
+        if not do_sample:
+            return logits
+
+        if temperature and temperature != 1.0:
+            logits = logits / temperature
+
+        if top_k and top_k < logits.shape[-1]:
+            kth = np.partition(logits, -top_k, axis=-1)[:, -top_k][:, None]
+            logits = np.where(logits < kth, -np.inf, logits)
+
+        if top_p is not None and top_p < 1.0:
+            order = np.argsort(-logits, axis=-1)
+            sorted_logits = np.take_along_axis(logits, order, axis=-1)
+            probs = _softmax(sorted_logits)
+            # Убираем токены, которые выходят за накопленную вероятность top_p; первый остается всегда
+            remove = np.cumsum(probs, axis=-1) - probs >= top_p
+            sorted_logits = np.where(remove, -np.inf, sorted_logits)
+            logits = np.empty_like(logits)
+            np.put_along_axis(logits, order, sorted_logits, axis=-1)
+
+        return logits
+
+    def _sample(self, logits):
+        probs = _softmax(logits)
+        cumulative = np.cumsum(probs, axis=-1)
+        draws = np.random.random_sample((logits.shape[0], 1)) * cumulative[:, -1:]
+        return (cumulative < draws).sum(axis=-1)
+
+    def _resolve_file(self, source, filename, local_files_only):
+        if os.path.isdir(source):
+            return os.path.join(source, filename)
+
+        from huggingface_hub import hf_hub_download
+
+        return hf_hub_download(
+            repo_id=source, filename=filename, cache_dir=CACHE_DIR, local_files_only=local_files_only
+        )
+
+    def _read_config(self, source, local_files_only):
+        with open(self._resolve_file(source, "config.json", local_files_only), encoding="utf-8") as f:
+            return json.load(f)
+
+
+def _softmax(logits):
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
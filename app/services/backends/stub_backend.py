@@ -0,0 +1,187 @@
+import hashlib
+import math
+import random
+import time
+
+from app.config import (
+    STUB_TOKENS_PER_SEC, STUB_PREFILL_TOKENS_PER_SEC, STUB_LENGTH_RATIO, STUB_LENGTH_SIGMA,
+    STUB_LATENCY_SIGMA, STUB_SEED
+)
+from app.services.backends.base import InferenceBackend, GenerationResult
+from app.utils.metrics import record_span
+
+# Словарь, из которого заглушка составляет ответы
+STUB_WORDS = [
+    "анализ", "данные", "модель", "развитие", "технология", "обучение", "система", "процесс",
+    "результат", "подход", "решение", "практика", "исследование", "эффективность", "будущее",
+    "пример", "метод", "задача", "опыт", "рост", "влияние", "качество", "стратегия", "инструмент",
+]
+
+
+class StubBackend(InferenceBackend):
+    """
+    Детерминированная заглушка модели без весов.
+
+    Ответ зависит только от промпта и параметров генерации: для модели
+    контента это markdown-слайд, для модели кода - корректный React-компонент.
+    Токенами считаются слова, разделенные пробелами. Нужна для бенчмарков
+    и нагрузочных тестов всего конвейера без загрузки моделей.
+
+    Длина ответа распределена логнормально вокруг доли max_new_tokens, а
+    время генерации складывается из обработки промпта и декодирования с
+    заданной скоростью и логнормальным разбросом. Задержка реализована
+    через time.sleep, который отпускает GIL, поэтому под нагрузкой заглушка
+    ведет себя как модель, занятая в нативном коде: измеряются накладные
+    расходы роутера, БД, шаблонов и сериализации при конкуренции запросов.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        model_kind,
+        model_name,
+        tokens_per_sec=STUB_TOKENS_PER_SEC,
+        prefill_tokens_per_sec=STUB_PREFILL_TOKENS_PER_SEC,
+        length_ratio=STUB_LENGTH_RATIO,
+        length_sigma=STUB_LENGTH_SIGMA,
+        latency_sigma=STUB_LATENCY_SIGMA,
+        seed=STUB_SEED,
+    ):
+        super().__init__(model_kind, model_name)
+        self.tokens_per_sec = tokens_per_sec
+        self.prefill_tokens_per_sec = prefill_tokens_per_sec
+        self.length_ratio = length_ratio
+        self.length_sigma = length_sigma
+        self.latency_sigma = latency_sigma
+        self.seed = seed
+
+    def load(self):
+        pass
+
+    def tokenize(self, text):
+        return [_word_id(word) for word in text.split()]
+
+    def generate_batch(self, prompts, max_new_tokens=512, **generation_kwargs):
+        start_time = time.perf_counter()
+
+        results = []
+        latency_factor = 1.0
+        for prompt in prompts:
+            rng = self._get_rng(prompt)
+            target_tokens = self._get_target_tokens(rng, max_new_tokens)
+            text = self._compose(rng, target_tokens)
+            token_ids = self.tokenize(text)
+            # В пакете задержку определяет самый медленный промпт
+            latency_factor = max(latency_factor, self._get_latency_factor(rng))
+
+            results.append(GenerationResult(
+                text=text,
+                token_ids=token_ids,
+                prompt_tokens=len(prompt.split()),
+                generated_tokens=len(token_ids),
+            ))
+
+        # Пакет обрабатывает все промпты сразу и декодирует по токену за шаг,
+        # поэтому декодирование длится столько шагов, сколько в самом длинном ответе
+        prefill_start = time.perf_counter()
+        _sleep(self._get_prefill_seconds(sum(result.prompt_tokens for result in results)) * latency_factor)
+        decode_start = time.perf_counter()
+        _sleep(self._get_decode_seconds(max((result.generated_tokens for result in results), default=0)) * latency_factor)
+        end_time = time.perf_counter()
+
+        record_span("prefill", decode_start - prefill_start, self.model_name)
+        record_span("decode", end_time - decode_start, self.model_name)
+
+        seconds = end_time - start_time
+        for result in results:
+            result.seconds = seconds
+            result.prefill_seconds = decode_start - prefill_start
+            result.decode_seconds = end_time - decode_start
+            result.batch_size = len(results)
+
+        return results
+
+    def _get_rng(self, prompt):
+        digest = hashlib.sha256(f"{self.seed}:{self.model_kind}:{prompt}".encode("utf-8")).digest()
+        return random.Random(digest)
+
+    def _get_target_tokens(self, rng, max_new_tokens):
+        """
+        Возвращает длину ответа в токенах: логнормальная величина с медианой
+        length_ratio * max_new_tokens, ограниченная сверху бюджетом
+        """
+        median = max(max_new_tokens * self.length_ratio, 1.0)
+        target_tokens = int(rng.lognormvariate(math.log(median), self.length_sigma))
+        return max(min(target_tokens, max_new_tokens), 8)
+
+    def _get_latency_factor(self, rng):
+        """
+        Возвращает множитель задержки со средним около единицы
+        """
+        if self.latency_sigma <= 0:
+            return 1.0
+        return rng.lognormvariate(-self.latency_sigma ** 2 / 2, self.latency_sigma)
+
+    def _get_prefill_seconds(self, prompt_tokens):
+        if self.prefill_tokens_per_sec <= 0:
+            return 0.0
+        return prompt_tokens / self.prefill_tokens_per_sec
+
+    def _get_decode_seconds(self, generated_tokens):
+        if self.tokens_per_sec <= 0:
+            return 0.0
+        return generated_tokens / self.tokens_per_sec
+
+    def _compose(self, rng, target_tokens):
+        if self.model_kind == "code":
+            return self._compose_code(rng, target_tokens)
+        return self._compose_content(rng, target_tokens)
+
+    def _compose_content(self, rng, target_tokens):
+        lines = ["# " + " ".join(rng.choice(STUB_WORDS) for _ in range(3)).capitalize(), ""]
+        tokens = 4
+
+        while tokens < target_tokens:
+            words = [rng.choice(STUB_WORDS) for _ in range(min(6, target_tokens - tokens))]
+            lines.append("* " + " ".join(words))
+            tokens += len(words) + 1
+
+        return "\n".join(lines)
+
+    def _compose_code(self, rng, target_tokens):
+        title = " ".join(rng.choice(STUB_WORDS) for _ in range(3)).capitalize()
+        items = []
+        # Обвязка компонента занимает около 30 токенов
+        tokens = 30
+
+        while tokens < target_tokens:
+            words = [rng.choice(STUB_WORDS) for _ in range(min(5, target_tokens - tokens))]
+            items.append(f"        <li>{' '.join(words)}</li>")
+            tokens += len(words)
+
+        return "\n".join([
+            "import React from 'react';",
+            "",
+            "const Slide: React.FC = () => {",
+            "  return (",
+            "    <div className=\"slide\">",
+            f"      <h1>{title}</h1>",
+            "      <ul>",
+            *items,
+            "      </ul>",
+            "    </div>",
+            "  );",
+            "};",
+            "",
+            "export default Slide;",
+        ])
+
+
+def _sleep(seconds):
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def _word_id(word):
+    return int.from_bytes(hashlib.md5(word.encode("utf-8")).digest()[:4], "little")
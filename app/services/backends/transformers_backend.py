@@ -0,0 +1,147 @@
+import time
+
+import torch
+
+from app.config import PROMPT_TOKEN_CACHE, PROMPT_TOKEN_CACHE_VERIFY
+from app.services.backends.base import InferenceBackend, GenerationResult
+from app.services.prompt_templates import PromptTokenCache, RenderedPrompt
+from app.utils.model_loader import load_causal_lm, load_tokenizer
+from app.utils.metrics import Counter, record_span, register, span
+from app.utils.runtime import configure_torch_threads
+
+PROMPT_TOKENIZATION = register(Counter(
+    "icreator_prompt_tokenization_total",
+    "Токенизация промптов: cached - по частям из кэша, verified - по частям со сверкой, "
+    "mismatch - сверка не прошла, full - целиком",
+    ("model", "result"),
+))
+
+
+class TransformersBackend(InferenceBackend):
+    """
+    Бэкенд на transformers: AutoTokenizer и AutoModelForCausalLM
+    """
+
+    name = "transformers"
+
+    def load(self):
+        # Делим ядра между воркерами, чтобы процессы PyTorch не конкурировали за них
+        configure_torch_threads()
+
+        self.tokenizer = load_tokenizer(self.model_name)
+        self.model = self._load_model()
+
+        # Для пакетной генерации декодерной модели нужен паддинг слева
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        # Токены статических частей промптов из шаблонов
+        self.prompt_tokens = PromptTokenCache(
+            self.tokenizer,
+            verify_uses=PROMPT_TOKEN_CACHE_VERIFY,
+            on_result=lambda result: PROMPT_TOKENIZATION.inc(model=self.model_name, result=result),
+        )
+
+    def tokenize(self, text):
+        return self.tokenizer(text)["input_ids"]
+
+    def generate_batch(self, prompts, **generation_kwargs):
+        start_time = time.perf_counter()
+
+        with span("tokenize", self.model_name):
+            inputs = self._encode_prompts(prompts)
+        generation_kwargs.setdefault("pad_token_id", self.tokenizer.pad_token_id)
+
+        timer = GenerationTimer()
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                streamer=timer,
+                **generation_kwargs
+            )
+        timer.end()
+
+        record_span("prefill", timer.prefill_seconds, self.model_name)
+        record_span("decode", timer.decode_seconds, self.model_name)
+        seconds = time.perf_counter() - start_time
+
+        # Отрезаем промпт по длине входа, а не поиском строки
+        prompt_length = inputs["input_ids"].shape[1]
+        pad_token_id = generation_kwargs["pad_token_id"]
+
+        results = []
+        for row, output in enumerate(outputs):
+            generated = output[prompt_length:]
+            # Паддинг после конца ответа заполнен pad-токенами, их не считаем
+            token_ids = generated[generated != pad_token_id].tolist()
+            results.append(GenerationResult(
+                text=self.tokenizer.decode(token_ids, skip_special_tokens=True).strip(),
+                token_ids=token_ids,
+                prompt_tokens=int(inputs["attention_mask"][row].sum()),
+                generated_tokens=len(token_ids),
+                seconds=seconds,
+                prefill_seconds=timer.prefill_seconds,
+                decode_seconds=timer.decode_seconds,
+                batch_size=len(prompts),
+            ))
+
+        return results
+
+    def _encode_prompts(self, prompts):
+        """
+        Токенизирует промпты с паддингом слева.
+
+        Промпты из шаблонов (RenderedPrompt) собираются из закэшированных
+        токенов статических частей, остальные токенизируются целиком.
+        """
+        if PROMPT_TOKEN_CACHE and any(isinstance(prompt, RenderedPrompt) for prompt in prompts):
+            encoded = [self.prompt_tokens.encode(prompt) for prompt in prompts]
+            inputs = self.tokenizer.pad({"input_ids": encoded}, padding=True, return_tensors="pt")
+        else:
+            inputs = self.tokenizer(list(prompts), return_tensors="pt", padding=True)
+
+        return inputs.to(self.model.device)
+
+    def _load_model(self):
+        if torch.cuda.is_available():
+            print(f"Используется GPU для модели {self.model_name}")
+        else:
+            print("GPU недоступен, используется CPU (это может быть медленно)")
+
+        return load_causal_lm(self.model_name)
+
+
+class GenerationTimer:
+    """
+    Стример для generate, разделяющий время генерации на prefill и decode.
+
+    generate сначала передает в put промпт, а затем каждый новый токен:
+    время до первого нового токена - обработка промпта (prefill), остальное -
+    пошаговое декодирование.
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.first_token_time = None
+        self.end_time = None
+        self._prompt_seen = False
+
+    def put(self, value):
+        if not self._prompt_seen:
+            self._prompt_seen = True
+        elif self.first_token_time is None:
+            self.first_token_time = time.perf_counter()
+
+    def end(self):
+        if self.end_time is None:
+            self.end_time = time.perf_counter()
+
+    @property
+    def prefill_seconds(self):
+        return (self.first_token_time or self.end_time) - self.start_time
+
+    @property
+    def decode_seconds(self):
+        return self.end_time - (self.first_token_time or self.end_time)
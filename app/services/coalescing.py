@@ -0,0 +1,58 @@
+import asyncio
+import re
+
+from app.utils.metrics import Counter, register
+
+COALESCED = register(Counter(
+    "icreator_generation_coalesced_total",
+    "Запросы, присоединенные к уже выполняющейся такой же генерации",
+    ("handler",),
+))
+
+
+def normalize_topic(topic):
+    """
+    Приводит тему к виду для сравнения: регистр, пробелы и ё не различаются
+    """
+    return re.sub(r"\s+", " ", str(topic)).strip().casefold().replace("ё", "е")
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных задач в одном воркере.
+
+    Первый запрос с ключом запускает задачу, остальные запросы с тем же
+    ключом, пришедшие до ее завершения, ждут ее и получают тот же
+    результат или то же исключение. Задача выполняется отдельно от
+    запроса-инициатора, поэтому его отмена не прерывает ожидающих.
+    После завершения ключ освобождается: кэширования результатов здесь нет.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self._tasks = {}
+
+    async def run(self, key, func, *args):
+        """
+        Выполняет корутину func(*args) или присоединяется к уже выполняющейся с тем же ключом.
+
+        Возвращает пару (результат, присоединен ли запрос к чужой задаче).
+        """
+        task = self._tasks.get(key)
+        coalesced = task is not None
+
+        if coalesced:
+            COALESCED.inc(handler=self.handler)
+        else:
+            task = asyncio.ensure_future(func(*args))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        return await asyncio.shield(task), coalesced
+
+    def in_flight(self):
+        return len(self._tasks)
+
+    def _forget(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
@@ -1,9 +1,17 @@
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
 import os
 import re
 import random
-from app.config import CODE_MODEL, CACHE_DIR
+import hashlib
+import threading
+from collections import OrderedDict
+from app.config import (
+    CODE_MODEL, CACHE_DIR, CODE_BATCH_SIZE, RENDER_CACHE_SIZE, CODE_BACKEND, CODE_PROMPT_COMPACTION
+)
+from app.services.backends import create_backend
+from app.services.code_prompts import get_code_prompt
+from app.services.generation_profiles import get_generation_kwargs
+from app.services.scheduler import generation_slot
+from app.utils.metrics import record_generation, span, timed
 
 
 class CodeGenerator:
@@ -13,27 +21,16 @@ class CodeGenerator:
         # Установка директории кэша
         os.environ["TRANSFORMERS_CACHE"] = CACHE_DIR
 
+        # LRU-кэш отрендеренных шаблонов: (хэш содержимого, макет, тема) -> код
+        self._render_cache = OrderedDict()
+        self._render_cache_lock = threading.Lock()
+
+        # Шаблон промпта генерации кода с настроенным уровнем сжатия
+        self.prompt_template = get_code_prompt(CODE_PROMPT_COMPACTION)
+
         try:
-            # Загрузка токенизатора
-            self.tokenizer = AutoTokenizer.from_pretrained(CODE_MODEL, trust_remote_code=True)
-
-            # Загрузка модели
-            if torch.cuda.is_available():
-                print("Используется GPU для генерации кода")
-                self.model = AutoModelForCausalLM.from_pretrained(
-                    CODE_MODEL,
-                    torch_dtype=torch.float16,
-                    device_map="auto",
-                    trust_remote_code=True,
-                )
-            else:
-                print("GPU недоступен, используется CPU (это может быть медленно)")
-                self.model = AutoModelForCausalLM.from_pretrained(
-                    CODE_MODEL,
-                    device_map="auto",
-                    trust_remote_code=True,
-                    low_cpu_mem_usage=True,
-                )
+            # Загрузка модели и токенизатора через бэкенд инференса
+            self.backend = create_backend(CODE_BACKEND, "code", CODE_MODEL)
 
             print("Модель для генерации кода успешно загружена")
             self.model_ready = True
@@ -42,7 +39,7 @@ class CodeGenerator:
             print("Будет использоваться заглушка вместо модели")
             self.model_ready = False
 
-    def generate_frontend_code(self, slide_content, layout="auto", theme="auto"):
+    def generate_frontend_code(self, slide_content, layout="auto", theme="auto", profile=None):
         """
         Генерирует React-код фронтенда для слайда с улучшенным дизайном и анимациями
         """
@@ -64,103 +61,164 @@ class CodeGenerator:
         prompt = self._create_code_generation_prompt(slide_content, slide_type, layout, theme)
 
         try:
-            # Генерируем код
-            inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
-
-            outputs = self.model.generate(
-                inputs["input_ids"],
-                max_new_tokens=2048,  # Увеличиваем для более сложного кода
-                temperature=0.3,  # Низкая температура для более структурированного кода
-                top_p=0.95,
-                do_sample=True,
-                repetition_penalty=1.2,
-                pad_token_id=self.tokenizer.eos_token_id
-            )
-
-            # Декодируем сгенерированный код
-            generated_code = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-
-            # Удаляем промпт из вывода, если он включен
-            if prompt in generated_code:
-                code_part = generated_code.replace(prompt, "").strip()
-            else:
-                code_part = generated_code.strip()
+            # Генерируем код; бэкенд возвращает ответ уже без промпта
+            code_part = self._generate_batch([prompt], profile, [slide_type])[0]
+
+            return self._finalize_generated_code(code_part, slide_content, layout, theme)
+
+        except Exception as e:
+            print(f"Ошибка при генерации кода: {e}")
+            return self._get_template_code(slide_content, layout, theme)
+
+    def render_template_code(self, slide_content, layout="auto", theme="auto"):
+        """
+        Рендерит код слайда шаблонами, не обращаясь к модели.
+
+        Используется для смены темы и макета уже сохраненной презентации.
+        Варианты для конкретной пары макет/тема кэшируются, поэтому
+        повторное переключение темы не рендерит шаблон заново.
+        """
+        slide_type = self._determine_slide_type(slide_content)
+
+        if layout == "auto":
+            layout = self._select_layout_for_slide(slide_type)
+
+        if theme == "auto":
+            theme = self._select_theme_for_slide(slide_type)
+
+        content_hash = hashlib.sha256(slide_content.encode("utf-8")).hexdigest()
+        key = (content_hash, layout, theme)
+
+        with self._render_cache_lock:
+            code = self._render_cache.get(key)
+            if code is not None:
+                self._render_cache.move_to_end(key)
+                return code
+
+        code = self._get_template_code(slide_content, layout, theme)
+
+        if RENDER_CACHE_SIZE > 0:
+            with self._render_cache_lock:
+                self._render_cache[key] = code
+                self._render_cache.move_to_end(key)
+                while len(self._render_cache) > RENDER_CACHE_SIZE:
+                    self._render_cache.popitem(last=False)
+
+        return code
+
+    def generate_frontend_code_batch(self, items, profile=None):
+        """
+        Генерирует React-код для списка слайдов за один проход.
 
+        Каждый элемент - словарь с ключами slide_content, layout и theme.
+        Разбор содержимого выполняется один раз для одинаковых слайдов,
+        одинаковые запросы генерируются один раз, а при загруженной модели
+        промпты обрабатываются пакетным вызовом generate. Результаты
+        возвращаются в том же порядке, что и входные элементы.
+        """
+        # Кэш типов слайдов в пределах пакета
+        slide_types = {}
+        # Уникальные запросы: ключ -> (содержимое, тип, макет, тема)
+        unique_requests = {}
+        keys = []
+
+        for item in items:
+            slide_content = item["slide_content"]
+            layout = item.get("layout", "auto")
+            theme = item.get("theme", "auto")
+
+            if slide_content not in slide_types:
+                slide_types[slide_content] = self._determine_slide_type(slide_content)
+            slide_type = slide_types[slide_content]
+
+            if layout == "auto":
+                layout = self._select_layout_for_slide(slide_type)
+            if theme == "auto":
+                theme = self._select_theme_for_slide(slide_type)
+
+            key = (slide_content, layout, theme)
+            unique_requests.setdefault(key, (slide_content, slide_type, layout, theme))
+            keys.append(key)
+
+        # Если модель не загружена, используем шаблоны
+        if not hasattr(self, 'model_ready') or not self.model_ready:
+            codes = {
+                key: self._get_template_code(slide_content, layout, theme)
+                for key, (slide_content, _, layout, theme) in unique_requests.items()
+            }
+            return [codes[key] for key in keys]
+
+        codes = {}
+        pending = list(unique_requests.items())
+
+        for start in range(0, len(pending), CODE_BATCH_SIZE):
+            chunk = pending[start:start + CODE_BATCH_SIZE]
+            prompts = [
+                self._create_code_generation_prompt(slide_content, slide_type, layout, theme)
+                for _, (slide_content, slide_type, layout, theme) in chunk
+            ]
+
+            try:
+                generated = self._generate_batch(
+                    prompts, profile, [slide_type for _, (_, slide_type, _, _) in chunk]
+                )
+            except Exception as e:
+                print(f"Ошибка при пакетной генерации кода: {e}")
+                generated = [None] * len(chunk)
+
+            for (key, (slide_content, _, layout, theme)), code_part in zip(chunk, generated):
+                if code_part is None:
+                    codes[key] = self._get_template_code(slide_content, layout, theme)
+                else:
+                    codes[key] = self._finalize_generated_code(code_part, slide_content, layout, theme)
+
+        return [codes[key] for key in keys]
+
+    def _generate_batch(self, prompts, profile=None, slide_types=None):
+        """
+        Генерирует продолжения для нескольких промптов одним вызовом модели.
+
+        slide_types - типы слайдов промптов для телеметрии генерации.
+        """
+        # В задаче bulk слот модели берется на каждый вызов, между ними проходят правки слайдов
+        with generation_slot():
+            results = self.backend.generate_batch(prompts, **self._get_generation_kwargs(profile))
+
+        for slide_type, result in zip(slide_types or ["unknown"] * len(results), results):
+            record_generation(self.backend.model_name, slide_type, result)
+
+        return [result.text for result in results]
+
+    def _get_generation_kwargs(self, profile=None):
+        """
+        Возвращает параметры генерации кода для профиля
+        """
+        return get_generation_kwargs("code", profile)
+
+    def _finalize_generated_code(self, code_part, slide_content, layout, theme):
+        """
+        Извлекает код компонента из ответа модели или возвращает шаблон
+        """
+        with span("postprocess"):
             # Извлекаем только код React-компонента
             cleaned_code = self._extract_and_clean_code(code_part)
 
             # Проверяем корректность кода
-            if self._is_valid_react_code(cleaned_code):
-                return cleaned_code
-            else:
-                # Если код некорректный, используем шаблонный код
-                return self._get_template_code(slide_content, layout, theme)
+            is_valid = self._is_valid_react_code(cleaned_code)
 
-        except Exception as e:
-            print(f"Ошибка при генерации кода: {e}")
+        if is_valid:
+            return cleaned_code
+        else:
+            # Если код некорректный, используем шаблонный код
             return self._get_template_code(slide_content, layout, theme)
 
     def _create_code_generation_prompt(self, slide_content, slide_type, layout, theme):
         """
-        Создает детальный промпт для генерации кода
-        """
-        # Основная структура промпта
-        prompt = f"""
-        Generate a high-quality React TypeScript component for a presentation slide with animations and modern design.
-
-        SLIDE CONTENT:
-        ```
-        {slide_content}
-        ```
-
-        SLIDE TYPE: {slide_type}
-        LAYOUT TYPE: {layout}
-        DESIGN THEME: {theme}
-
-        REQUIREMENTS:
-        1. Create a responsive React TypeScript component
-        2. Use modern React (functional components, hooks)
-        3. Include beautiful animations and transitions
-        4. Make it visually stunning with appropriate styling
-        5. Parse and render markdown content from the slide
-        6. Include thoughtful micro-interactions and details
-        7. Use proper TypeScript typings
-        8. Follow best practices for React development
-        9. Add appropriate comments to explain complex logic
-
-        STYLING REQUIREMENTS:
-        - For light theme: use a clean white base (#ffffff) with dark text (#333333) and accent color (#0070f3)
-        - For dark theme: use dark background (#121212) with light text (#ffffff) and accent color (#0070f3)
-        - For colorful theme: use gradient backgrounds, vibrant colors, and playful design elements
-        - For minimal theme: use subtle colors, elegant typography, and minimalist design
-        - For corporate theme: use professional blue tones, clean layout, and business-appropriate styling
-
-        ANIMATION IDEAS:
-        - Use subtle fade-in effects for text elements
-        - Add sliding animations for lists and key points
-        - Include emphasis animations for important content
-        - Use CSS transforms and transitions for smooth effects
-        - Consider reveal animations for sequential content
-
-        LAYOUT OPTIONS:
-        - For "centered" layout: center all content with balanced whitespace
-        - For "two-column" layout: use left side for headings, right side for content
-        - For "grid" layout: organize content in a responsive grid pattern
-        - For "featured" layout: highlight key information with larger elements
-        - For "timeline" layout: organize information in chronological sequence
-
-        NOTES:
-        - Parse markdown content properly (headings, lists, emphasis)
-        - Ensure the component is self-contained
-        - Use CSS-in-JS or inline styles for simplicity
-        - Make sure animations are tasteful and enhance readability
-        - Ensure accessibility for all users
-
-        RETURN ONLY THE COMPLETE REACT TYPESCRIPT CODE without any explanation or markdown code blocks.
-        Start with import statements and end with export default.
+        Создает детальный промпт для генерации кода (app/services/code_prompts.py)
         """
-
-        return prompt
+        return self.prompt_template.render(
+            slide_content=slide_content, slide_type=slide_type, layout=layout, theme=theme
+        )
 
     def _determine_slide_type(self, slide_content):
         """
@@ -291,6 +349,7 @@ class CodeGenerator:
 
         return has_import and has_component and has_export and has_jsx
 
+    @timed("template")
     def _get_template_code(self, slide_content, layout="two-column", theme="light"):
         """
         Возвращает шаблонный код на основе типа слайда, макета и темы
@@ -0,0 +1,99 @@
+"""
+Шаблоны промптов генерации кода слайдов для CodeGenerator.
+
+Без сжатия (CODE_PROMPT_COMPACTION=none) текст промпта совпадает с
+прежней f-строкой символ в символ, включая отступы.
+"""
+import functools
+
+from app.services.prompt_templates import PROMPT_COMPACTION_LEVELS, PromptTemplate, compact_prompt
+
+# Промпт генерации React-компонента
+CODE_GENERATION_PROMPT = """
+        Generate a high-quality React TypeScript component for a presentation slide with animations and modern design.
+
+        SLIDE CONTENT:
+        ```
+        {slide_content}
+        ```
+
+        SLIDE TYPE: {slide_type}
+        LAYOUT TYPE: {layout}
+        DESIGN THEME: {theme}
+
+        REQUIREMENTS:
+        1. Create a responsive React TypeScript component
+        2. Use modern React (functional components, hooks)
+        3. Include beautiful animations and transitions
+        4. Make it visually stunning with appropriate styling
+        5. Parse and render markdown content from the slide
+        6. Include thoughtful micro-interactions and details
+        7. Use proper TypeScript typings
+        8. Follow best practices for React development
+        9. Add appropriate comments to explain complex logic
+
+        STYLING REQUIREMENTS:
+        - For light theme: use a clean white base (#ffffff) with dark text (#333333) and accent color (#0070f3)
+        - For dark theme: use dark background (#121212) with light text (#ffffff) and accent color (#0070f3)
+        - For colorful theme: use gradient backgrounds, vibrant colors, and playful design elements
+        - For minimal theme: use subtle colors, elegant typography, and minimalist design
+        - For corporate theme: use professional blue tones, clean layout, and business-appropriate styling
+
+        ANIMATION IDEAS:
+        - Use subtle fade-in effects for text elements
+        - Add sliding animations for lists and key points
+        - Include emphasis animations for important content
+        - Use CSS transforms and transitions for smooth effects
+        - Consider reveal animations for sequential content
+
+        LAYOUT OPTIONS:
+        - For "centered" layout: center all content with balanced whitespace
+        - For "two-column" layout: use left side for headings, right side for content
+        - For "grid" layout: organize content in a responsive grid pattern
+        - For "featured" layout: highlight key information with larger elements
+        - For "timeline" layout: organize information in chronological sequence
+
+        NOTES:
+        - Parse markdown content properly (headings, lists, emphasis)
+        - Ensure the component is self-contained
+        - Use CSS-in-JS or inline styles for simplicity
+        - Make sure animations are tasteful and enhance readability
+        - Ensure accessibility for all users
+
+        RETURN ONLY THE COMPLETE REACT TYPESCRIPT CODE without any explanation or markdown code blocks.
+        Start with import statements and end with export default.
+        """
+
+# Сокращенный промпт (уровень abbreviated): те же требования в меньшем числе токенов
+ABBREVIATED_CODE_GENERATION_PROMPT = """Generate a React TypeScript component for a presentation slide.
+
+SLIDE CONTENT:
+```
+{slide_content}
+```
+
+SLIDE TYPE: {slide_type}
+LAYOUT TYPE: {layout}
+DESIGN THEME: {theme}
+
+Requirements: functional component with hooks and TypeScript types; render the slide markdown (headings, lists, emphasis); tasteful fade-in and sliding animations; inline styles or CSS-in-JS; self-contained and accessible.
+Themes: light - #ffffff background, #333333 text; dark - #121212 background, #ffffff text; accent #0070f3; colorful - gradients and vibrant colors; minimal - subtle colors; corporate - professional blue tones.
+Layouts: centered; two-column - headings left, content right; grid; featured - larger key elements; timeline - chronological.
+
+RETURN ONLY THE COMPLETE REACT TYPESCRIPT CODE without any explanation or markdown code blocks.
+Start with import statements and end with export default."""
+
+
+@functools.lru_cache(maxsize=None)
+def get_code_prompt(compaction="none"):
+    """
+    Шаблон промпта генерации кода для уровня сжатия
+    """
+    if compaction not in PROMPT_COMPACTION_LEVELS:
+        raise ValueError(f"Неизвестный уровень сжатия промптов: {compaction}")
+
+    if compaction == "none":
+        return PromptTemplate.parse(CODE_GENERATION_PROMPT)
+    if compaction == "abbreviated":
+        return PromptTemplate.parse(ABBREVIATED_CODE_GENERATION_PROMPT)
+    return PromptTemplate.parse(compact_prompt(CODE_GENERATION_PROMPT))
@@ -1,7 +1,17 @@
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
 import os
-from app.config import CONTENT_MODEL, CACHE_DIR
+import re
+from app.config import (
+    CONTENT_MODEL, CACHE_DIR, CONTENT_GENERATION_MODE, CONTENT_BATCH_SIZE, OUTLINE_TOKENS_PER_SLIDE,
+    SLIDE_MAX_NEW_TOKENS, CONTENT_BACKEND, CONTENT_PROMPT_COMPACTION
+)
+from app.services.backends import create_backend
+from app.services.content_prompts import (
+    SLIDE_STRUCTURES, get_content_prompts, get_instructions_kind, get_slide_type
+)
+from app.services.scheduler import generation_slot
+from app.services.token_budget import TokenBudget
+from app.utils.metrics import record_generation, timed
+from app.services.generation_profiles import get_generation_kwargs, get_token_budget_scale
 import random
 
 
@@ -12,27 +22,15 @@ class ContentGenerator:
         # Установка директории кэша
         os.environ["TRANSFORMERS_CACHE"] = CACHE_DIR
 
+        # Бюджеты max_new_tokens по типам слайдов
+        self.token_budget = TokenBudget()
+
+        # Шаблоны промптов слайдов с настроенным уровнем сжатия
+        self.prompts = get_content_prompts(CONTENT_PROMPT_COMPACTION)
+
         try:
-            # Загрузка токенизатора
-            self.tokenizer = AutoTokenizer.from_pretrained(CONTENT_MODEL, trust_remote_code=True)
-
-            # Загрузка модели
-            if torch.cuda.is_available():
-                print("Используется GPU для генерации контента")
-                self.model = AutoModelForCausalLM.from_pretrained(
-                    CONTENT_MODEL,
-                    torch_dtype=torch.float16,
-                    device_map="auto",
-                    trust_remote_code=True,
-                )
-            else:
-                print("GPU недоступен, используется CPU (это может быть медленно)")
-                self.model = AutoModelForCausalLM.from_pretrained(
-                    CONTENT_MODEL,
-                    device_map="auto",
-                    trust_remote_code=True,
-                    low_cpu_mem_usage=True,
-                )
+            # Загрузка модели и токенизатора через бэкенд инференса
+            self.backend = create_backend(CONTENT_BACKEND, "content", CONTENT_MODEL)
 
             print("Модель для генерации контента успешно загружена")
             self.model_ready = True
@@ -41,9 +39,14 @@ class ContentGenerator:
             print("Будет использоваться заглушка вместо модели")
             self.model_ready = False
 
-    def generate_slide_content(self, topic, slide_number, total_slides):
+    def generate_slide_content(self, topic, slide_number, total_slides, slide_title=None, outline=None,
+                               profile=None):
         """
-        Генерирует контент для слайда на основе темы и номера слайда
+        Генерирует контент для слайда на основе темы и номера слайда.
+
+        Если передан план презентации, слайд раскрывает свой пункт плана
+        и не повторяет содержимое остальных слайдов. profile выбирает
+        профиль генерации ("quality" или "fast").
         """
         # Если модель не загружена, возвращаем заглушку
         if not hasattr(self, 'model_ready') or not self.model_ready:
@@ -53,32 +56,18 @@ class ContentGenerator:
         slide_type, slide_structure = self._get_slide_structure(slide_number, total_slides)
 
         # Создаём детализированный промпт с конкретными инструкциями
-        prompt = self._create_detailed_prompt(topic, slide_number, total_slides, slide_type, slide_structure)
+        prompt = self._create_detailed_prompt(
+            topic, slide_number, total_slides, slide_type, slide_structure, slide_title, outline
+        )
 
         try:
-            # Генерация контента с улучшенными параметрами
-            inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
-
-            # Параметры генерации для более разнообразного текста
-            outputs = self.model.generate(
-                inputs["input_ids"],
-                max_new_tokens=512,  # Увеличиваем максимальную длину для более подробного контента
-                temperature=0.75,  # Слегка увеличиваем для разнообразия
-                top_p=0.92,
-                top_k=50,
-                do_sample=True,
-                repetition_penalty=1.15,  # Уменьшаем повторения
-                pad_token_id=self.tokenizer.eos_token_id
-            )
-
-            # Декодируем сгенерированный текст
-            generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+            # Бюджет токенов зависит от ожидаемой структуры слайда и профиля
+            budget = self._get_slide_budget(slide_type, slide_structure, profile)
 
-            # Удаляем промпт из ответа, если он там есть
-            if prompt in generated_text:
-                response = generated_text.replace(prompt, "").strip()
-            else:
-                response = generated_text.strip()
+            # Генерация контента; бэкенд возвращает ответ уже без промпта
+            result = self._generate_batch([prompt], profile, [slide_type], max_new_tokens=budget)[0]
+            self._record_slide_length(slide_type, result.generated_tokens, budget, profile)
+            response = result.text
 
             # Пост-обработка контента для улучшения форматирования и структуры
             formatted_response = self._post_process_content(response, slide_type, slide_number)
@@ -88,337 +77,138 @@ class ContentGenerator:
             print(f"Ошибка при генерации контента: {e}")
             return self._get_fallback_content(topic, slide_number, total_slides)
 
-    def _create_detailed_prompt(self, topic, slide_number, total_slides, slide_type, slide_structure):
+    def generate_outline(self, topic, total_slides, profile=None):
         """
-        Создает детальный промпт для модели на основе типа слайда и его структуры
-        """
-        # Базовые инструкции для всех типов слайдов
-        base_instructions = f"""You are an expert presentation creator with deep knowledge on various topics. 
-        Your task is to write engaging, informative content for a presentation slide in RUSSIAN language.
-
-        Topic of the presentation: '{topic}'
-        Slide number: {slide_number} out of {total_slides}
-        Slide type: {slide_type}
+        Генерирует план презентации: список заголовков слайдов по порядку.
 
-        Guidelines:
-        - Write only in Russian language
-        - Be concise but informative
-        - Use markdown formatting (use # for titles, ## for subtitles, * for bullet points)
-        - Make the content engaging and thought-provoking
-        - Focus on quality facts and avoid generic statements
-        - Format the output as a properly structured markdown slide
-        - Each slide should have a clear purpose and message
+        Для пунктов, которые модель не вернула, используются заголовки
+        по типу слайда.
         """
+        default_outline = [
+            self._get_default_slide_title(topic, slide_number, total_slides)
+            for slide_number in range(1, total_slides + 1)
+        ]
 
-        # Специфические инструкции в зависимости от типа слайда
-        if slide_number == 1:
-            specific_instructions = f"""
-            This is the TITLE SLIDE. Create a compelling title and a brief introduction that sets the tone.
-
-            Required structure:
-            - A catchy main title (using # heading)
-            - A subtitle that explains the presentation's purpose (using ## heading)
-            - A brief 1-2 sentence introduction
-
-            Make the title slide capture attention and clearly frame '{topic}' in an intriguing way.
-            """
-
-        elif slide_type == "Определение/Концепция":
-            specific_instructions = f"""
-            This slide should define key concepts related to '{topic}'.
-
-            Required structure:
-            - A clear title related to definitions or concepts
-            - 2-3 key definitions presented in a structured way
-            - Each definition should be concise but comprehensive
-
-            Focus on fundamental concepts the audience needs to understand '{topic}'.
-            """
-
-        elif slide_type == "Историческая справка":
-            specific_instructions = f"""
-            This slide should provide historical context or background about '{topic}'.
-
-            Required structure:
-            - A title about the history or origins
-            - 3-4 key historical points or timeline elements
-            - Brief explanation of how these historical elements impact our understanding today
-
-            Present the most relevant historical context that helps understand '{topic}' better.
-            """
-
-        elif slide_type == "Статистика/Данные":
-            specific_instructions = f"""
-            This slide should present important statistics or data related to '{topic}'.
-
-            Required structure:
-            - A title highlighting the data aspect you're focusing on
-            - 3-5 statistical points or data insights
-            - A brief statement about what these statistics reveal
-
-            Present compelling data that illuminates important aspects of '{topic}'.
-            """
+        if not hasattr(self, 'model_ready') or not self.model_ready:
+            return default_outline
 
-        elif slide_type == "Сравнение/Анализ":
-            specific_instructions = f"""
-            This slide should compare different aspects, approaches, or perspectives on '{topic}'.
+        prompt = self._create_outline_prompt(topic, total_slides)
 
-            Required structure:
-            - A title framing the comparison
-            - Clear sections for each element being compared (at least 2)
-            - Key differences and similarities highlighted
+        try:
+            generated_text = self._generate_batch(
+                [prompt],
+                profile,
+                ["План презентации"],
+                max_new_tokens=OUTLINE_TOKENS_PER_SLIDE * total_slides
+            )[0].text
+        except Exception as e:
+            print(f"Ошибка при генерации плана презентации: {e}")
+            return default_outline
 
-            Make sure the comparison provides insight and isn't just listing differences.
-            """
+        titles = self._parse_outline(generated_text, total_slides)
 
-        elif slide_type == "Пример/Кейс":
-            specific_instructions = f"""
-            This slide should present a concrete example or case study related to '{topic}'.
+        return [
+            titles.get(slide_number) or default_outline[slide_number - 1]
+            for slide_number in range(1, total_slides + 1)
+        ]
 
-            Required structure:
-            - A title introducing the example/case
-            - Brief background of the example
-            - Key points or lessons from this example
-            - How this example illustrates important aspects of '{topic}'
+    def _create_outline_prompt(self, topic, total_slides):
+        """
+        Создает короткий промпт для генерации плана презентации
+        """
+        slide_types = "\n".join(
+            f"{slide_number}. {self._get_slide_structure(slide_number, total_slides)[0]}"
+            for slide_number in range(1, total_slides + 1)
+        )
 
-            Choose an example that is relevant and illuminating for the audience.
-            """
+        return f"""You are an expert presentation creator.
+Create an outline for a presentation on '{topic}' with exactly {total_slides} slides.
 
-        elif slide_type == "Практическое применение":
-            specific_instructions = f"""
-            This slide should cover practical applications or implications of '{topic}'.
+Slide types in order:
+{slide_types}
 
-            Required structure:
-            - A title focusing on applications or practical relevance
-            - 3-4 practical ways '{topic}' applies in real life
-            - Brief explanation of each application
+Write a short, specific title in RUSSIAN for every slide, one line per slide,
+in the format "<number>. <title>". Each slide must cover a different aspect of the topic.
+Output only the numbered list.
 
-            Focus on how the audience can apply or see '{topic}' in practice.
-            """
+1."""
 
-        elif slide_type == "Вызовы/Проблемы":
-            specific_instructions = f"""
-            This slide should address challenges, problems, or limitations related to '{topic}'.
+    def _parse_outline(self, generated_text, total_slides):
+        """
+        Разбирает нумерованный список заголовков из ответа модели
+        """
+        # Промпт заканчивается на "1.", поэтому первый пункт может прийти без номера
+        text = "1." + generated_text if not re.match(r"\s*\d+[.)]", generated_text) else generated_text
 
-            Required structure:
-            - A title framing the challenges
-            - 3-4 specific challenges listed with brief explanations
-            - Optional: hints at potential solutions
+        titles = {}
+        for line in text.split("\n"):
+            match = re.match(r"\s*(\d+)[.)]\s*(.+)", line)
+            if not match:
+                continue
 
-            Be honest about difficulties while maintaining a constructive tone.
-            """
+            slide_number = int(match.group(1))
+            title = match.group(2).strip().strip("#*\"' ")
 
-        elif slide_type == "Будущие тенденции":
-            specific_instructions = f"""
-            This slide should discuss future trends, developments, or predictions about '{topic}'.
+            if 1 <= slide_number <= total_slides and title and slide_number not in titles:
+                titles[slide_number] = title
 
-            Required structure:
-            - A forward-looking title
-            - 3-4 potential future developments
-            - Brief rationale for why these trends are likely or important
+        return titles
 
-            Balance realistic predictions with thought-provoking possibilities.
-            """
+    def _get_default_slide_title(self, topic, slide_number, total_slides):
+        """
+        Возвращает заголовок слайда по умолчанию для плана презентации
+        """
+        if slide_number == 1:
+            return topic
 
-        elif slide_number == total_slides:
-            specific_instructions = f"""
-            This is the CONCLUDING SLIDE. Summarize key points and provide a memorable ending.
+        slide_type, _ = self._get_slide_structure(slide_number, total_slides)
+        return slide_type
 
-            Required structure:
-            - A conclusion title
-            - 3-5 key takeaways from the entire presentation
-            - A thought-provoking final statement or call to action
+    def _create_detailed_prompt(self, topic, slide_number, total_slides, slide_type, slide_structure,
+                                slide_title=None, outline=None):
+        """
+        Создает детальный промпт для модели на основе типа слайда и его структуры.
 
-            Make the conclusion reinforce the most important aspects of '{topic}' and leave the audience with something to reflect on.
-            """
+        Шаблоны собраны заранее (app/services/content_prompts.py); здесь
+        подставляются только тема, номера слайдов и план презентации.
+        """
+        kind = get_instructions_kind(slide_number, total_slides, slide_type)
 
+        # Для типа, совпадающего с позицией слайда, тип и структура уже подставлены в шаблон
+        if kind == slide_type and slide_structure == SLIDE_STRUCTURES[slide_type]:
+            template = self.prompts.slides[slide_type]
         else:
-            specific_instructions = f"""
-            This slide should provide key insights on '{topic}' focusing on {slide_type}.
-
-            Required structure:
-            - A clear title that relates to an aspect of '{topic}'
-            - 3-5 key points organized in a logical structure
-            - Each point should be substantive and specific, not generic
+            template = self.prompts.detailed[kind]
 
-            Make sure this slide builds on previous slides and contributes unique content to the presentation.
-            """
-
-        # Добавление структуры слайда к инструкциям
-        structure_instructions = f"""
-        Structure the content in this format:
-        {slide_structure}
-
-        IMPORTANT: Output only the final slide content in Russian, no explanations or translations.
-        """
+        # Привязка слайда к плану презентации, если он есть
+        outline_instructions = ""
+        if outline:
+            outline_lines = "\n".join(
+                f"{self.prompts.outline_indent}{number}. {title}" for number, title in enumerate(outline, start=1)
+            )
+            outline_instructions = "\n\n" + self.prompts.outline.render(
+                outline_lines=outline_lines,
+                slide_number=slide_number,
+                slide_title=slide_title or outline[slide_number - 1]
+            )
 
-        # Объединение всех инструкций
-        complete_prompt = f"{base_instructions}\n\n{specific_instructions}\n\n{structure_instructions}"
-        return complete_prompt
+        return template.render(
+            topic=topic,
+            slide_number=slide_number,
+            total_slides=total_slides,
+            slide_type=slide_type,
+            slide_structure=self.prompts.format_structure(slide_structure),
+            outline=outline_instructions
+        )
 
     def _get_slide_structure(self, slide_number, total_slides):
         """
         Определяет тип и структуру слайда на основе его номера и общего количества слайдов
         """
-        # Определяем тип слайда в зависимости от его позиции
-        if slide_number == 1:
-            slide_type = "Титульный слайд"
-            slide_structure = """
-            # [Заголовок презентации]
-            ## [Подзаголовок или тема]
-
-            [Краткое введение в 1-2 предложения]
-            """
-
-        elif slide_number == total_slides:
-            slide_type = "Заключение"
-            slide_structure = """
-            # Заключение
-
-            * [Ключевой вывод 1]
-            * [Ключевой вывод 2]
-            * [Ключевой вывод 3]
-
-            ## [Итоговое утверждение или призыв к действию]
-            """
-
-        else:
-            # Для слайдов в середине презентации определяем тип на основе позиции
-            middle_slides_types = [
-                "Определение/Концепция",
-                "Историческая справка",
-                "Статистика/Данные",
-                "Сравнение/Анализ",
-                "Пример/Кейс",
-                "Практическое применение",
-                "Вызовы/Проблемы",
-                "Будущие тенденции"
-            ]
-
-            # Определяем индекс типа с учетом позиции слайда, чтобы слайды шли в логичном порядке
-            position_index = (slide_number - 2) % len(middle_slides_types)
-            slide_type = middle_slides_types[position_index]
-
-            # Разные структуры для разных типов слайдов
-            if slide_type == "Определение/Концепция":
-                slide_structure = """
-                # [Заголовок о ключевых понятиях]
-
-                ## [Концепция 1]
-                [Определение и пояснение]
-
-                ## [Концепция 2]
-                [Определение и пояснение]
-
-                ## [Концепция 3 (опционально)]
-                [Определение и пояснение]
-                """
-
-            elif slide_type == "Историческая справка":
-                slide_structure = """
-                # [Заголовок об историческом контексте]
-
-                * [Исторический факт/период 1] - [краткое описание]
-                * [Исторический факт/период 2] - [краткое описание]
-                * [Исторический факт/период 3] - [краткое описание]
-
-                ## [Историческая значимость для понимания темы]
-                """
-
-            elif slide_type == "Статистика/Данные":
-                slide_structure = """
-                # [Заголовок о статистических данных]
-
-                ## Ключевые цифры:
-                * [Статистический факт 1]
-                * [Статистический факт 2]
-                * [Статистический факт 3]
-                * [Статистический факт 4]
-
-                ### [Вывод на основе данных]
-                """
-
-            elif slide_type == "Сравнение/Анализ":
-                slide_structure = """
-                # [Заголовок о сравнении/анализе]
-
-                ## [Первый элемент сравнения]:
-                * [Ключевая характеристика 1]
-                * [Ключевая характеристика 2]
-
-                ## [Второй элемент сравнения]:
-                * [Ключевая характеристика 1]
-                * [Ключевая характеристика 2]
-
-                ### [Ключевой вывод из сравнения]
-                """
-
-            elif slide_type == "Пример/Кейс":
-                slide_structure = """
-                # [Заголовок о конкретном примере]
-
-                ## Описание:
-                [Краткое описание примера/кейса]
-
-                ## Ключевые аспекты:
-                * [Аспект 1]
-                * [Аспект 2]
-                * [Аспект 3]
-
-                ## Значимость для темы:
-                [Почему этот пример важен]
-                """
-
-            elif slide_type == "Практическое применение":
-                slide_structure = """
-                # [Заголовок о практическом применении]
-
-                ## Как это применяется:
-                1. [Практическое применение 1] - [краткое пояснение]
-                2. [Практическое применение 2] - [краткое пояснение]
-                3. [Практическое применение 3] - [краткое пояснение]
-
-                ### [Практический вывод или рекомендация]
-                """
-
-            elif slide_type == "Вызовы/Проблемы":
-                slide_structure = """
-                # [Заголовок о вызовах/проблемах]
-
-                ## Основные вызовы:
-                * [Проблема 1] - [краткое описание]
-                * [Проблема 2] - [краткое описание]
-                * [Проблема 3] - [краткое описание]
-
-                ## [Возможные подходы к решению]
-                """
-
-            elif slide_type == "Будущие тенденции":
-                slide_structure = """
-                # [Заголовок о будущем развитии]
-
-                ## Ожидаемые тенденции:
-                1. [Тенденция 1] - [обоснование и значение]
-                2. [Тенденция 2] - [обоснование и значение]
-                3. [Тенденция 3] - [обоснование и значение]
-
-                ### [Перспективы и значимость]
-                """
-            else:
-                slide_structure = """
-                # [Заголовок слайда]
-
-                ## [Подзаголовок или ключевая мысль]
-
-                * [Пункт 1]
-                * [Пункт 2]
-                * [Пункт 3]
-
-                ### [Заключительная мысль или связь со следующим слайдом]
-                """
-
-        return slide_type, slide_structure
+        slide_type = get_slide_type(slide_number, total_slides)
+        return slide_type, SLIDE_STRUCTURES[slide_type]
 
+    @timed("postprocess")
     def _post_process_content(self, content, slide_type, slide_number):
         """
         Пост-обработка сгенерированного контента для улучшения форматирования
@@ -475,17 +265,140 @@ class ContentGenerator:
         else:
             return f"# Перспективы развития\n\n## Будущее темы '{topic}'\n* Потенциальные направления эволюции\n* Ожидаемые инновации и трансформации\n* Вызовы и возможности, которые нас ждут"
 
-    def generate_all_slides(self, topic, slides_count):
+    def generate_all_slides(self, topic, slides_count, mode=None, profile=None):
         """
-        Генерирует контент для всех слайдов
+        Генерирует контент для всех слайдов.
+
+        В режиме "sequential" каждый слайд генерируется независимо. В режиме
+        "outline" сначала генерируется план презентации, а затем слайды
+        раскрываются пакетами, каждый по своему пункту плана.
         """
-        slides_content = []
+        return list(self.iter_slides(topic, slides_count, mode, profile))
 
-        for i in range(1, slides_count + 1):
-            content = self.generate_slide_content(topic, i, slides_count)
-            slides_content.append({
+    def iter_slides(self, topic, slides_count, mode=None, profile=None, slide_numbers=None, outline=None):
+        """
+        Генерирует контент слайдов и отдает их по мере готовности.
+
+        slide_numbers - номера слайдов, которые нужно сгенерировать (по
+        умолчанию все). Вызывающий код может сохранять слайды частями, не
+        дожидаясь всей презентации и не держа ее целиком в памяти.
+        outline - готовый план для режима "outline" (например, сохраненный
+        при первой генерации); без него план генерируется заново.
+        """
+        mode = mode or CONTENT_GENERATION_MODE
+        if slide_numbers is None:
+            slide_numbers = range(1, slides_count + 1)
+        slide_numbers = sorted(slide_numbers)
+
+        if mode == "outline":
+            yield from self._iter_slides_from_outline(topic, slides_count, slide_numbers, profile, outline)
+            return
+
+        for i in slide_numbers:
+            content = self.generate_slide_content(topic, i, slides_count, profile=profile)
+            yield {
                 "slide_number": i,
                 "content": content
-            })
+            }
+
+    def _iter_slides_from_outline(self, topic, slides_count, slide_numbers, profile=None, outline=None):
+        """
+        Двухфазная генерация: план презентации и пакетное раскрытие слайдов
+        """
+        if outline is None:
+            outline = self.generate_outline(topic, slides_count, profile)
+
+        # Без модели раскрывать нечего, используем заглушки
+        if not hasattr(self, 'model_ready') or not self.model_ready:
+            for i in slide_numbers:
+                yield {
+                    "slide_number": i,
+                    "title": outline[i - 1],
+                    "content": self._get_fallback_content(topic, i, slides_count)
+                }
+            return
+
+        for start in range(0, len(slide_numbers), CONTENT_BATCH_SIZE):
+            batch_numbers = slide_numbers[start:start + CONTENT_BATCH_SIZE]
+
+            slide_types = {}
+            budgets = {}
+            prompts = []
+            for slide_number in batch_numbers:
+                slide_type, slide_structure = self._get_slide_structure(slide_number, slides_count)
+                slide_types[slide_number] = slide_type
+                budgets[slide_number] = self._get_slide_budget(slide_type, slide_structure, profile)
+                prompts.append(self._create_detailed_prompt(
+                    topic, slide_number, slides_count, slide_type, slide_structure,
+                    outline[slide_number - 1], outline
+                ))
+
+            # Пакет генерируется до самого большого бюджета среди его слайдов: generate не ограничивает
+            # строки пакета по отдельности, поэтому ответ обрезан, только если он достиг бюджета пакета
+            batch_budget = max(budgets.values())
+
+            try:
+                responses = self._generate_batch(
+                    prompts,
+                    profile,
+                    [slide_types[slide_number] for slide_number in batch_numbers],
+                    max_new_tokens=batch_budget
+                )
+            except Exception as e:
+                print(f"Ошибка при пакетной генерации контента: {e}")
+                responses = [None] * len(prompts)
+
+            for slide_number, response in zip(batch_numbers, responses):
+                if response is None:
+                    content = self._get_fallback_content(topic, slide_number, slides_count)
+                else:
+                    slide_type = slide_types[slide_number]
+                    self._record_slide_length(slide_type, response.generated_tokens, batch_budget, profile)
+                    content = self._post_process_content(response.text, slide_type, slide_number)
+
+                yield {
+                    "slide_number": slide_number,
+                    "title": outline[slide_number - 1],
+                    "content": content
+                }
+
+    def _generate_batch(self, prompts, profile=None, slide_types=None, **overrides):
+        """
+        Генерирует продолжения для нескольких промптов одним вызовом модели.
+
+        Возвращает список GenerationResult с текстом ответа и числом токенов.
+        slide_types - типы слайдов промптов для телеметрии генерации.
+        """
+        # В задаче bulk слот модели берется на каждый вызов, между ними проходят правки слайдов
+        with generation_slot():
+            results = self.backend.generate_batch(prompts, **self._get_generation_kwargs(profile, **overrides))
+
+        for slide_type, result in zip(slide_types or ["unknown"] * len(results), results):
+            record_generation(self.backend.model_name, slide_type, result)
+
+        return results
+
+    def _get_slide_budget(self, slide_type, slide_structure, profile=None):
+        """
+        Возвращает бюджет max_new_tokens слайда с учетом профиля генерации
+        """
+        budget = self.token_budget.get_budget(slide_type, slide_structure)
+        return max(int(budget * get_token_budget_scale(profile)), 1)
+
+    def _record_slide_length(self, slide_type, generated_tokens, budget, profile=None):
+        """
+        Передает длину ответа в обучаемый бюджет токенов
+        """
+        # Урезанные бюджеты быстрого профиля исказили бы статистику обрезанных ответов
+        if get_token_budget_scale(profile) == 1.0:
+            self.token_budget.record(slide_type, generated_tokens, budget)
+
+    def _get_generation_kwargs(self, profile=None, **overrides):
+        """
+        Возвращает параметры генерации контента для профиля
+        """
+        generation_kwargs = get_generation_kwargs("content", profile)
+        generation_kwargs["max_new_tokens"] = SLIDE_MAX_NEW_TOKENS  # Верхняя граница, обычно переопределяется бюджетом слайда
+        generation_kwargs.update(overrides)
 
-        return slides_content
\ No newline at end of file
+        return generation_kwargs
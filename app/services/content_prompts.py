@@ -0,0 +1,400 @@
+"""
+Таблицы промптов и структур слайдов для ContentGenerator.
+
+Шаблоны промптов собираются один раз при импорте: для каждого типа
+слайда тип и ожидаемая структура уже подставлены, и при создании промпта
+заполняются только тема, номер слайда, число слайдов и план презентации.
+Без сжатия (CONTENT_PROMPT_COMPACTION=none) текст промптов совпадает с
+прежними f-строками символ в символ, включая отступы.
+"""
+import functools
+
+from app.config import CONTENT_PROMPT_COMPACTION
+from app.services.prompt_templates import PROMPT_COMPACTION_LEVELS, PromptTemplate, compact_prompt
+
+TITLE_SLIDE = "Титульный слайд"
+CONCLUSION_SLIDE = "Заключение"
+
+# Типы слайдов в середине презентации по порядку, чтобы слайды шли в логичном порядке
+MIDDLE_SLIDE_TYPES = (
+    "Определение/Концепция",
+    "Историческая справка",
+    "Статистика/Данные",
+    "Сравнение/Анализ",
+    "Пример/Кейс",
+    "Практическое применение",
+    "Вызовы/Проблемы",
+    "Будущие тенденции",
+)
+
+# Инструкции для слайда, тип которого не входит в таблицы
+GENERAL_INSTRUCTIONS = "general"
+
+# Ожидаемая структура слайда каждого типа
+SLIDE_STRUCTURES = {
+    TITLE_SLIDE: """
+            # [Заголовок презентации]
+            ## [Подзаголовок или тема]
+
+            [Краткое введение в 1-2 предложения]
+            """,
+    CONCLUSION_SLIDE: """
+            # Заключение
+
+            * [Ключевой вывод 1]
+            * [Ключевой вывод 2]
+            * [Ключевой вывод 3]
+
+            ## [Итоговое утверждение или призыв к действию]
+            """,
+    "Определение/Концепция": """
+                # [Заголовок о ключевых понятиях]
+
+                ## [Концепция 1]
+                [Определение и пояснение]
+
+                ## [Концепция 2]
+                [Определение и пояснение]
+
+                ## [Концепция 3 (опционально)]
+                [Определение и пояснение]
+                """,
+    "Историческая справка": """
+                # [Заголовок об историческом контексте]
+
+                * [Исторический факт/период 1] - [краткое описание]
+                * [Исторический факт/период 2] - [краткое описание]
+                * [Исторический факт/период 3] - [краткое описание]
+
+                ## [Историческая значимость для понимания темы]
+                """,
+    "Статистика/Данные": """
+                # [Заголовок о статистических данных]
+
+                ## Ключевые цифры:
+                * [Статистический факт 1]
+                * [Статистический факт 2]
+                * [Статистический факт 3]
+                * [Статистический факт 4]
+
+                ### [Вывод на основе данных]
+                """,
+    "Сравнение/Анализ": """
+                # [Заголовок о сравнении/анализе]
+
+                ## [Первый элемент сравнения]:
+                * [Ключевая характеристика 1]
+                * [Ключевая характеристика 2]
+
+                ## [Второй элемент сравнения]:
+                * [Ключевая характеристика 1]
+                * [Ключевая характеристика 2]
+
+                ### [Ключевой вывод из сравнения]
+                """,
+    "Пример/Кейс": """
+                # [Заголовок о конкретном примере]
+
+                ## Описание:
+                [Краткое описание примера/кейса]
+
+                ## Ключевые аспекты:
+                * [Аспект 1]
+                * [Аспект 2]
+                * [Аспект 3]
+
+                ## Значимость для темы:
+                [Почему этот пример важен]
+                """,
+    "Практическое применение": """
+                # [Заголовок о практическом применении]
+
+                ## Как это применяется:
+                1. [Практическое применение 1] - [краткое пояснение]
+                2. [Практическое применение 2] - [краткое пояснение]
+                3. [Практическое применение 3] - [краткое пояснение]
+
+                ### [Практический вывод или рекомендация]
+                """,
+    "Вызовы/Проблемы": """
+                # [Заголовок о вызовах/проблемах]
+
+                ## Основные вызовы:
+                * [Проблема 1] - [краткое описание]
+                * [Проблема 2] - [краткое описание]
+                * [Проблема 3] - [краткое описание]
+
+                ## [Возможные подходы к решению]
+                """,
+    "Будущие тенденции": """
+                # [Заголовок о будущем развитии]
+
+                ## Ожидаемые тенденции:
+                1. [Тенденция 1] - [обоснование и значение]
+                2. [Тенденция 2] - [обоснование и значение]
+                3. [Тенденция 3] - [обоснование и значение]
+
+                ### [Перспективы и значимость]
+                """,
+}
+
+# Базовые инструкции для всех типов слайдов
+BASE_INSTRUCTIONS = """You are an expert presentation creator with deep knowledge on various topics. 
+        Your task is to write engaging, informative content for a presentation slide in RUSSIAN language.
+
+        Topic of the presentation: '{topic}'
+        Slide number: {slide_number} out of {total_slides}
+        Slide type: {slide_type}
+
+        Guidelines:
+        - Write only in Russian language
+        - Be concise but informative
+        - Use markdown formatting (use # for titles, ## for subtitles, * for bullet points)
+        - Make the content engaging and thought-provoking
+        - Focus on quality facts and avoid generic statements
+        - Format the output as a properly structured markdown slide
+        - Each slide should have a clear purpose and message
+        """
+
+# Специфические инструкции в зависимости от типа слайда
+SPECIFIC_INSTRUCTIONS = {
+    TITLE_SLIDE: """
+            This is the TITLE SLIDE. Create a compelling title and a brief introduction that sets the tone.
+
+            Required structure:
+            - A catchy main title (using # heading)
+            - A subtitle that explains the presentation's purpose (using ## heading)
+            - A brief 1-2 sentence introduction
+
+            Make the title slide capture attention and clearly frame '{topic}' in an intriguing way.
+            """,
+    "Определение/Концепция": """
+            This slide should define key concepts related to '{topic}'.
+
+            Required structure:
+            - A clear title related to definitions or concepts
+            - 2-3 key definitions presented in a structured way
+            - Each definition should be concise but comprehensive
+
+            Focus on fundamental concepts the audience needs to understand '{topic}'.
+            """,
+    "Историческая справка": """
+            This slide should provide historical context or background about '{topic}'.
+
+            Required structure:
+            - A title about the history or origins
+            - 3-4 key historical points or timeline elements
+            - Brief explanation of how these historical elements impact our understanding today
+
+            Present the most relevant historical context that helps understand '{topic}' better.
+            """,
+    "Статистика/Данные": """
+            This slide should present important statistics or data related to '{topic}'.
+
+            Required structure:
+            - A title highlighting the data aspect you're focusing on
+            - 3-5 statistical points or data insights
+            - A brief statement about what these statistics reveal
+
+            Present compelling data that illuminates important aspects of '{topic}'.
+            """,
+    "Сравнение/Анализ": """
+            This slide should compare different aspects, approaches, or perspectives on '{topic}'.
+
+            Required structure:
+            - A title framing the comparison
+            - Clear sections for each element being compared (at least 2)
+            - Key differences and similarities highlighted
+
+            Make sure the comparison provides insight and isn't just listing differences.
+            """,
+    "Пример/Кейс": """
+            This slide should present a concrete example or case study related to '{topic}'.
+
+            Required structure:
+            - A title introducing the example/case
+            - Brief background of the example
+            - Key points or lessons from this example
+            - How this example illustrates important aspects of '{topic}'
+
+            Choose an example that is relevant and illuminating for the audience.
+            """,
+    "Практическое применение": """
+            This slide should cover practical applications or implications of '{topic}'.
+
+            Required structure:
+            - A title focusing on applications or practical relevance
+            - 3-4 practical ways '{topic}' applies in real life
+            - Brief explanation of each application
+
+            Focus on how the audience can apply or see '{topic}' in practice.
+            """,
+    "Вызовы/Проблемы": """
+            This slide should address challenges, problems, or limitations related to '{topic}'.
+
+            Required structure:
+            - A title framing the challenges
+            - 3-4 specific challenges listed with brief explanations
+            - Optional: hints at potential solutions
+
+            Be honest about difficulties while maintaining a constructive tone.
+            """,
+    "Будущие тенденции": """
+            This slide should discuss future trends, developments, or predictions about '{topic}'.
+
+            Required structure:
+            - A forward-looking title
+            - 3-4 potential future developments
+            - Brief rationale for why these trends are likely or important
+
+            Balance realistic predictions with thought-provoking possibilities.
+            """,
+    CONCLUSION_SLIDE: """
+            This is the CONCLUDING SLIDE. Summarize key points and provide a memorable ending.
+
+            Required structure:
+            - A conclusion title
+            - 3-5 key takeaways from the entire presentation
+            - A thought-provoking final statement or call to action
+
+            Make the conclusion reinforce the most important aspects of '{topic}' and leave the audience with something to reflect on.
+            """,
+    GENERAL_INSTRUCTIONS: """
+            This slide should provide key insights on '{topic}' focusing on {slide_type}.
+
+            Required structure:
+            - A clear title that relates to an aspect of '{topic}'
+            - 3-5 key points organized in a logical structure
+            - Each point should be substantive and specific, not generic
+
+            Make sure this slide builds on previous slides and contributes unique content to the presentation.
+            """,
+}
+
+# Структура слайда в конце промпта
+STRUCTURE_INSTRUCTIONS = """
+        Structure the content in this format:
+        {slide_structure}
+
+        IMPORTANT: Output only the final slide content in Russian, no explanations or translations.
+        """
+
+# Привязка слайда к плану презентации
+OUTLINE_INSTRUCTIONS = """
+        Presentation outline:
+{outline_lines}
+
+        This slide is number {slide_number}: '{slide_title}'.
+        Cover only this point of the outline and do not repeat content of the other slides.
+        """
+
+# Сокращенные инструкции (уровень abbreviated): те же требования в меньшем числе токенов
+ABBREVIATED_BASE_INSTRUCTIONS = """Write one presentation slide in RUSSIAN.
+Topic: '{topic}'. Slide {slide_number} of {total_slides}, type: {slide_type}.
+Rules: Russian only; concise and specific, no generic statements; markdown (# title, ## subtitle, * bullets)."""
+
+ABBREVIATED_SPECIFIC_INSTRUCTIONS = {
+    TITLE_SLIDE: "TITLE SLIDE: catchy # title, ## subtitle with the purpose, 1-2 sentence intro framing '{topic}'.",
+    "Определение/Концепция": "Define 2-3 key concepts needed to understand '{topic}', each concise.",
+    "Историческая справка": "Give 3-4 key historical points about '{topic}' and how they shape it today.",
+    "Статистика/Данные": "Give 3-5 statistics about '{topic}' and what they reveal.",
+    "Сравнение/Анализ": "Compare at least 2 approaches or perspectives on '{topic}': differences, similarities, insight.",
+    "Пример/Кейс": "Present a concrete case of '{topic}': background, key lessons, why it matters.",
+    "Практическое применение": "Give 3-4 real-life applications of '{topic}', each briefly explained.",
+    "Вызовы/Проблемы": "Give 3-4 challenges of '{topic}' with brief explanations; optionally hint at solutions.",
+    "Будущие тенденции": "Give 3-4 likely future trends of '{topic}' with brief rationale.",
+    CONCLUSION_SLIDE: "CONCLUDING SLIDE: 3-5 key takeaways about '{topic}' and a memorable final statement.",
+    GENERAL_INSTRUCTIONS: "Give 3-5 specific key points on '{topic}' about {slide_type}.",
+}
+
+ABBREVIATED_STRUCTURE_INSTRUCTIONS = """Format:
+{slide_structure}
+Output only the slide content in Russian."""
+
+ABBREVIATED_OUTLINE_INSTRUCTIONS = """Outline:
+{outline_lines}
+This is slide {slide_number}: '{slide_title}'. Cover only this point."""
+
+
+class ContentPrompts:
+    """
+    Шаблоны промптов слайдов для одного уровня сжатия.
+
+    none - исходный текст промптов символ в символ; whitespace - без
+    отступов, пробелов в конце строк и лишних пустых строк; abbreviated -
+    сокращенные инструкции без отступов.
+    """
+
+    def __init__(self, compaction="none"):
+        if compaction not in PROMPT_COMPACTION_LEVELS:
+            raise ValueError(f"Неизвестный уровень сжатия промптов: {compaction}")
+        self.compaction = compaction
+
+        if compaction == "abbreviated":
+            base, specific = ABBREVIATED_BASE_INSTRUCTIONS, ABBREVIATED_SPECIFIC_INSTRUCTIONS
+            structure, outline = ABBREVIATED_STRUCTURE_INSTRUCTIONS, ABBREVIATED_OUTLINE_INSTRUCTIONS
+        else:
+            base, specific = BASE_INSTRUCTIONS, SPECIFIC_INSTRUCTIONS
+            structure, outline = STRUCTURE_INSTRUCTIONS, OUTLINE_INSTRUCTIONS
+
+        if compaction == "none":
+            self.outline_indent = "        "
+        else:
+            base, structure, outline = compact_prompt(base), compact_prompt(structure), compact_prompt(outline)
+            specific = {kind: compact_prompt(instructions) for kind, instructions in specific.items()}
+            self.outline_indent = ""
+
+        # Промпт целиком; слот outline пуст или содержит "\n\n" и привязку к плану
+        self.detailed = {
+            kind: PromptTemplate.parse(f"{base}\n\n{instructions}{{outline}}\n\n{structure}")
+            for kind, instructions in specific.items()
+        }
+        self.outline = PromptTemplate.parse(outline)
+
+        # Промпты слайдов, тип которых совпадает с позицией, с уже подставленными типом и структурой
+        self.slides = {
+            slide_type: self.detailed[slide_type].partial(
+                slide_type=slide_type, slide_structure=self.format_structure(slide_structure)
+            )
+            for slide_type, slide_structure in SLIDE_STRUCTURES.items()
+        }
+
+    def format_structure(self, slide_structure):
+        """
+        Структура слайда в том виде, в каком она вставляется в промпт
+        """
+        return slide_structure if self.compaction == "none" else compact_prompt(slide_structure)
+
+
+@functools.lru_cache(maxsize=None)
+def get_content_prompts(compaction="none"):
+    return ContentPrompts(compaction)
+
+
+# Шаблоны для настроенного уровня сжатия собираются при импорте
+get_content_prompts(CONTENT_PROMPT_COMPACTION)
+
+
+def get_slide_type(slide_number, total_slides):
+    """
+    Определяет тип слайда по его позиции в презентации
+    """
+    if slide_number == 1:
+        return TITLE_SLIDE
+    if slide_number == total_slides:
+        return CONCLUSION_SLIDE
+    return MIDDLE_SLIDE_TYPES[(slide_number - 2) % len(MIDDLE_SLIDE_TYPES)]
+
+
+def get_instructions_kind(slide_number, total_slides, slide_type):
+    """
+    Выбирает специфические инструкции: титульный слайд, тип из таблицы,
+    заключение или общие инструкции
+    """
+    if slide_number == 1:
+        return TITLE_SLIDE
+    if slide_type in MIDDLE_SLIDE_TYPES:
+        return slide_type
+    if slide_number == total_slides:
+        return CONCLUSION_SLIDE
+    return GENERAL_INSTRUCTIONS
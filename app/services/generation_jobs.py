@@ -0,0 +1,259 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+
+from app.config import JOB_HEARTBEAT_INTERVAL, JOB_STALE_AFTER, JOB_MAX_ATTEMPTS
+from app.database import SessionLocal
+from app.models.generation_job import GenerationJob, GenerationJobSlide
+
+# Идентификатор воркера-владельца задач. Перезапущенный контейнер получает тот же хост и pid,
+# поэтому случайная часть отличает новый процесс от упавшего
+HOSTNAME = socket.gethostname()
+WORKER_ID = f"{HOSTNAME}:{os.getpid()}:{uuid.uuid4().hex}"
+
+_heartbeat_thread = None
+
+
+def create_job(db, presentation, mode=None, profile=None):
+    """
+    Создает задачу генерации презентации, которой владеет текущий воркер.
+
+    Все слайды задачи создаются в статусе pending. Фиксирует изменения
+    вызывающий код вместе с записью презентации.
+    """
+    now = datetime.utcnow()
+    job = GenerationJob(
+        presentation_id=presentation.id,
+        status="running",
+        mode=mode,
+        profile=profile,
+        worker_id=WORKER_ID,
+        heartbeat_at=now,
+        attempts=1,
+        slides=[
+            GenerationJobSlide(slide_number=slide_number, status="pending")
+            for slide_number in range(1, presentation.slides_count + 1)
+        ]
+    )
+    db.add(job)
+    return job
+
+
+def get_job(db, presentation_id):
+    return db.query(GenerationJob).filter(GenerationJob.presentation_id == presentation_id).first()
+
+
+def claim_job(db, job_id):
+    """
+    Забирает задачу текущему воркеру, если она не выполняется другим живым воркером.
+
+    Захват - условный UPDATE, поэтому из нескольких воркеров задачу
+    получает только один. Возвращает True, если задача захвачена.
+    """
+    now = datetime.utcnow()
+    claimed = db.query(GenerationJob).filter(
+        GenerationJob.id == job_id,
+        or_(
+            GenerationJob.status != "running",
+            GenerationJob.heartbeat_at.is_(None),
+            GenerationJob.heartbeat_at < now - timedelta(seconds=JOB_STALE_AFTER)
+        )
+    ).update({
+        GenerationJob.status: "running",
+        GenerationJob.worker_id: WORKER_ID,
+        GenerationJob.heartbeat_at: now,
+        GenerationJob.attempts: GenerationJob.attempts + 1,
+        GenerationJob.error: None,
+    }, synchronize_session=False)
+    db.commit()
+
+    return claimed == 1
+
+
+def release_job(db, job_id):
+    """
+    Возвращает задачу в очередь, чтобы ее забрал следующий проход восстановления
+    """
+    db.query(GenerationJob).filter(
+        GenerationJob.id == job_id,
+        GenerationJob.worker_id == WORKER_ID
+    ).update({
+        GenerationJob.status: "pending",
+        GenerationJob.worker_id: None,
+        GenerationJob.heartbeat_at: None,
+    }, synchronize_session=False)
+    db.commit()
+
+
+def mark_slides(db, job, slide_numbers, status, error=None):
+    """
+    Отмечает состояние слайдов задачи; фиксируется вместе со слайдами
+    """
+    db.query(GenerationJobSlide).filter(
+        GenerationJobSlide.job_id == job.id,
+        GenerationJobSlide.slide_number.in_(list(slide_numbers))
+    ).update({
+        GenerationJobSlide.status: status,
+        GenerationJobSlide.error: error,
+        GenerationJobSlide.updated_at: datetime.utcnow(),
+    }, synchronize_session=False)
+
+
+def get_outline(job, slides_count):
+    """
+    Возвращает сохраненный план презентации или None, если его нет или он не подходит по числу слайдов
+    """
+    if not job.outline:
+        return None
+
+    outline = json.loads(job.outline)
+    if len(outline) != slides_count:
+        return None
+    return outline
+
+
+def save_outline(db, job, outline):
+    """
+    Сохраняет план презентации в задаче; фиксирует изменения вызывающий код
+    """
+    job.outline = json.dumps(list(outline), ensure_ascii=False)
+
+
+def finish_job(db, job):
+    job.status = "completed"
+    job.worker_id = None
+    job.error = None
+    db.commit()
+
+
+def fail_job(db, job, slide_numbers, error):
+    """
+    Отмечает задачу и слайды незафиксированной части как неудачные
+    """
+    mark_slides(db, job, slide_numbers, "failed", error)
+    job.status = "failed"
+    job.worker_id = None
+    job.error = error
+    db.commit()
+
+
+def find_stale_jobs(db):
+    """
+    Возвращает id незавершенных задач без живого владельца.
+
+    Задачи, исчерпавшие JOB_MAX_ATTEMPTS попыток, отмечаются как неудачные.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=JOB_STALE_AFTER)
+    jobs = db.query(GenerationJob).filter(
+        GenerationJob.status.in_(("pending", "running")),
+        or_(GenerationJob.heartbeat_at.is_(None), GenerationJob.heartbeat_at < stale_before)
+    ).order_by(GenerationJob.created_at).all()
+
+    job_ids = []
+    for job in jobs:
+        if job.attempts >= JOB_MAX_ATTEMPTS:
+            job.status = "failed"
+            job.error = f"Задача не завершена за {job.attempts} попыток"
+        else:
+            job_ids.append(job.id)
+    db.commit()
+
+    return job_ids
+
+
+def start_heartbeat():
+    """
+    Запускает поток, который продлевает heartbeat задач текущего воркера
+    """
+    global _heartbeat_thread
+
+    if _heartbeat_thread is not None:
+        return
+
+    release_orphaned_jobs()
+
+    _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name="job-heartbeat", daemon=True)
+    _heartbeat_thread.start()
+
+
+def release_orphaned_jobs():
+    """
+    Возвращает в pending задачи упавших процессов этого хоста.
+
+    Задача считается брошенной, если ее процесс уже не существует или
+    имеет pid текущего процесса (контейнер перезапущен). Такие задачи
+    получают пустой heartbeat, и их сразу забирает восстановление, не
+    дожидаясь JOB_STALE_AFTER. Задачи живых соседних воркеров не меняются.
+    """
+    db = SessionLocal()
+    try:
+        jobs = db.query(GenerationJob).filter(
+            GenerationJob.status == "running",
+            GenerationJob.worker_id.like(f"{HOSTNAME}:%"),
+            GenerationJob.worker_id != WORKER_ID
+        ).all()
+
+        released = 0
+        for job in jobs:
+            # В LIKE символ "_" из имени хоста - шаблон, поэтому хост сверяется еще раз
+            if job.worker_id.split(":")[0] != HOSTNAME or _is_worker_alive(job.worker_id):
+                continue
+            job.status = "pending"
+            job.worker_id = None
+            job.heartbeat_at = None
+            released += 1
+        db.commit()
+
+        if released:
+            print(f"Задач генерации упавших процессов хоста {HOSTNAME} возвращено в очередь: {released}")
+    except Exception as e:
+        db.rollback()
+        print(f"Ошибка при возврате задач упавших процессов: {e}")
+    finally:
+        db.close()
+
+
+def _is_worker_alive(worker_id):
+    """
+    Проверяет, жив ли другой процесс этого хоста с идентификатором "хост:pid[:uuid]"
+    """
+    try:
+        pid = int(worker_id.split(":")[1])
+    except (IndexError, ValueError):
+        return False
+
+    if pid == os.getpid():
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Процесс есть, но принадлежит другому пользователю
+        pass
+    return True
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+
+        db = SessionLocal()
+        try:
+            db.query(GenerationJob).filter(
+                GenerationJob.worker_id == WORKER_ID,
+                GenerationJob.status == "running"
+            ).update({GenerationJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Ошибка при обновлении heartbeat задач генерации: {e}")
+        finally:
+            db.close()
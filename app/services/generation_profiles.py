@@ -0,0 +1,67 @@
+from app.config import GENERATION_PROFILE
+
+# Профили параметров генерации для моделей контента и кода.
+# "quality" - прежние параметры с сэмплированием и штрафом за повторы,
+# "fast" - жадное декодирование без штрафа за повторы и с меньшими бюджетами:
+# без сэмплирования и repetition_penalty на каждом шаге не выполняется
+# обработка логитов, а вывод становится детерминированным.
+GENERATION_PROFILES = {
+    "quality": {
+        "content": {
+            "temperature": 0.75,  # Слегка увеличиваем для разнообразия
+            "top_p": 0.92,
+            "top_k": 50,
+            "do_sample": True,
+            "repetition_penalty": 1.15,  # Уменьшаем повторения
+        },
+        "code": {
+            "max_new_tokens": 2048,  # Увеличиваем для более сложного кода
+            "temperature": 0.3,  # Низкая температура для более структурированного кода
+            "top_p": 0.95,
+            "do_sample": True,
+            "repetition_penalty": 1.2,
+        },
+        # Множитель бюджета max_new_tokens для слайдов
+        "token_budget_scale": 1.0,
+    },
+    "fast": {
+        "content": {
+            "do_sample": False,
+            "num_beams": 1,
+            "use_cache": True,
+        },
+        "code": {
+            "max_new_tokens": 768,
+            "do_sample": False,
+            "num_beams": 1,
+            "use_cache": True,
+        },
+        "token_budget_scale": 0.75,
+    },
+}
+
+
+def resolve_profile(profile=None):
+    """
+    Возвращает имя профиля генерации, подставляя профиль по умолчанию
+    """
+    profile = profile or GENERATION_PROFILE
+
+    if profile not in GENERATION_PROFILES:
+        raise ValueError(f"Неизвестный профиль генерации: {profile}")
+
+    return profile
+
+
+def get_generation_kwargs(model_kind, profile=None):
+    """
+    Возвращает копию параметров generate для модели "content" или "code"
+    """
+    return dict(GENERATION_PROFILES[resolve_profile(profile)][model_kind])
+
+
+def get_token_budget_scale(profile=None):
+    """
+    Возвращает множитель бюджета токенов слайда для профиля
+    """
+    return GENERATION_PROFILES[resolve_profile(profile)]["token_budget_scale"]
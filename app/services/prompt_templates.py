@@ -0,0 +1,209 @@
+import re
+import threading
+from string import Formatter
+
+# Уровни сжатия промптов: none - как написано, whitespace - без отступов и лишних пробелов,
+# abbreviated - сокращенные инструкции без отступов
+PROMPT_COMPACTION_LEVELS = ("none", "whitespace", "abbreviated")
+
+
+def compact_prompt(text):
+    """
+    Убирает из текста промпта отступы, пробелы в конце строк, повторные
+    пробелы и пустые строки сверх одной подряд, а также переводы строк по краям.
+
+    Отступы в промптах из многострочных строк Python - токены, которые
+    модель обрабатывает на prefill, не получая из них информации.
+    """
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip("\n")
+
+
+class PromptTemplate:
+    """
+    Шаблон промпта, разобранный один раз на статические части и слоты.
+
+    Текст задается в синтаксисе str.format: "{topic}" - слот. Шаблон
+    хранится как последовательность пар (статический текст, имя слота),
+    поэтому подстановка только склеивает готовые части со значениями
+    слотов, а статические части можно заранее токенизировать.
+    partial() подставляет известные заранее значения (тип и структуру
+    слайда) и возвращает шаблон, в котором они стали статическим текстом.
+    """
+
+    def __init__(self, segments):
+        self.segments = tuple(segments)
+        self.fields = frozenset(field for _, field in self.segments if field is not None)
+        self._token_pieces = None
+
+    @classmethod
+    def parse(cls, text):
+        return cls((literal, field) for literal, field, _, _ in Formatter().parse(text))
+
+    def partial(self, **values):
+        """
+        Возвращает шаблон, где слоты из values заменены статическим текстом
+        """
+        segments = []
+        literal = ""
+        for segment_literal, field in self.segments:
+            literal += segment_literal
+            if field is None:
+                continue
+            if field in values:
+                literal += str(values[field])
+            else:
+                segments.append((literal, field))
+                literal = ""
+        segments.append((literal, None))
+
+        return PromptTemplate(segment for segment in segments if segment != ("", None))
+
+    def render(self, **values):
+        """
+        Подставляет значения слотов; возвращает RenderedPrompt - строку,
+        которая помнит свой шаблон для кэша токенов
+        """
+        parts = []
+        slot_values = {}
+        for literal, field in self.segments:
+            parts.append(literal)
+            if field is not None:
+                value = slot_values[field] = str(values[field])
+                parts.append(value)
+
+        prompt = RenderedPrompt("".join(parts))
+        prompt.template = self
+        prompt.values = slot_values
+        return prompt
+
+    def token_pieces(self):
+        """
+        Делит шаблон на статические тексты и динамические шаблоны для токенизации по частям.
+
+        Границы частей ставятся только перед переводом строки, которому
+        предшествует непробельный символ: у токенизаторов byte-level BPE
+        (GPT-2, phi-2) такая позиция всегда разделяет слова при
+        предварительной разбивке, поэтому токены частей совпадают с
+        токенами всего текста. Текст вокруг слота до ближайших таких границ
+        токенизируется вместе со значением слота.
+        """
+        if self._token_pieces is not None:
+            return self._token_pieces
+
+        pieces = []
+        dynamic = []
+        for literal, field in self.segments:
+            splits = [
+                index for index in range(1, len(literal))
+                if literal[index] == "\n" and not literal[index - 1].isspace()
+            ]
+            start = 0
+
+            if dynamic:
+                if not splits:
+                    dynamic.append((literal, field))
+                    continue
+                dynamic.append((literal[:splits[0]], None))
+                pieces.append(PromptTemplate(dynamic))
+                dynamic = []
+                start = splits[0]
+
+            if field is None:
+                if start < len(literal):
+                    pieces.append(literal[start:])
+                continue
+
+            end = splits[-1] if splits and splits[-1] > start else start
+            if end > start:
+                pieces.append(literal[start:end])
+            dynamic = [(literal[end:], field)]
+
+        if dynamic:
+            pieces.append(PromptTemplate(dynamic))
+
+        self._token_pieces = tuple(pieces)
+        return self._token_pieces
+
+
+class RenderedPrompt(str):
+    """
+    Текст промпта, собранный из PromptTemplate: template и values (значения слотов)
+    """
+
+    template = None
+    values = None
+
+
+class PromptTokenCache:
+    """
+    Кэш токенов статических частей промптов для одного токенизатора transformers.
+
+    Для RenderedPrompt токенизируются только части со слотами (тема,
+    номера слайдов, план), а id статических инструкций берутся из кэша и
+    склеиваются. Первые verify_uses промптов каждого шаблона дополнительно
+    токенизируются целиком; при расхождении шаблон больше не собирается по
+    частям, и его промпты токенизируются целиком. Так токенизатор, для
+    которого склейка не эквивалентна (например, SentencePiece с пробелом в
+    начале каждого текста), просто не получает ускорения.
+    """
+
+    def __init__(self, tokenizer, verify_uses=1, on_result=None):
+        self.tokenizer = tokenizer
+        self.verify_uses = verify_uses
+        # on_result(result) - счетчик для метрик: cached, verified, mismatch или full
+        self.on_result = on_result or (lambda result: None)
+
+        self._static_ids = {}
+        self._verified = {}
+        self._disabled = set()
+        self._lock = threading.Lock()
+
+    def encode(self, prompt):
+        """
+        Возвращает id токенов промпта, совпадающие с tokenizer(prompt)["input_ids"]
+        """
+        template = getattr(prompt, "template", None)
+        if template is None or template in self._disabled:
+            self.on_result("full")
+            return self._encode_full(prompt)
+
+        ids = []
+        for piece in template.token_pieces():
+            if isinstance(piece, str):
+                ids.extend(self._get_static_ids(piece))
+            else:
+                ids.extend(self._encode_text(piece.render(**prompt.values)))
+        ids = self.tokenizer.build_inputs_with_special_tokens(ids)
+
+        with self._lock:
+            verified = self._verified.get(template, 0)
+            if verified < self.verify_uses:
+                self._verified[template] = verified + 1
+        if verified >= self.verify_uses:
+            self.on_result("cached")
+            return ids
+
+        full_ids = self._encode_full(prompt)
+        if full_ids != ids:
+            with self._lock:
+                self._disabled.add(template)
+            print(f"Токены промпта по частям не совпали с полной токенизацией, "
+                  f"шаблон будет токенизироваться целиком ({type(self.tokenizer).__name__})")
+            self.on_result("mismatch")
+            return full_ids
+
+        self.on_result("verified")
+        return ids
+
+    def _get_static_ids(self, text):
+        ids = self._static_ids.get(text)
+        if ids is None:
+            ids = self._static_ids[text] = self._encode_text(text)
+        return ids
+
+    def _encode_text(self, text):
+        return self.tokenizer(text, add_special_tokens=False)["input_ids"]
+
+    def _encode_full(self, prompt):
+        return self.tokenizer(str(prompt))["input_ids"]
@@ -0,0 +1,263 @@
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from app.config import (
+    GENERATION_CONCURRENCY, GENERATION_QUEUE_SIZE, GENERATION_QUEUE_TIMEOUT, GENERATION_INTERACTIVE_WEIGHT
+)
+from app.utils.metrics import Counter, Gauge, Histogram, register
+
+# Классы приоритета: interactive - правка одного слайда, bulk - генерация презентации целиком
+PRIORITIES = ("interactive", "bulk")
+
+# Оценка длительности задачи до первых измерений, секунд
+INITIAL_JOB_SECONDS = 60.0
+# Вес последней задачи в скользящем среднем длительности
+JOB_SECONDS_SMOOTHING = 0.2
+
+QUEUE_WAIT = register(Histogram(
+    "icreator_generation_queue_wait_seconds",
+    "Время ожидания слота генерации в очереди",
+    ("priority",),
+))
+REJECTED = register(Counter(
+    "icreator_generation_rejected_total",
+    "Отклоненные задачи генерации: queue_full - очередь заполнена, timeout - истекло ожидание",
+    ("reason", "priority"),
+))
+ACTIVE = register(Gauge("icreator_generation_active", "Занятые слоты генерации", ("priority",)))
+QUEUED = register(Gauge("icreator_generation_queued", "Ожидающие слота генерации", ("priority",)))
+
+# Задача bulk, выполняющаяся в текущем потоке: слоты берутся на каждый вызов модели
+_current_admission = contextvars.ContextVar("icreator_admission", default=None)
+
+
+class GenerationRejected(Exception):
+    """
+    Задача генерации не принята: очередь заполнена или истекло ожидание слота
+    """
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class GenerationScheduler:
+    """
+    Контроль нагрузки для задач генерации в одном воркере.
+
+    Одновременно занято не больше max_concurrency слотов модели, еще не
+    больше max_queue задач каждого класса ждут. Задачи сверх этого отклоняются сразу, не
+    занимая поток, а ожидание в очереди ограничено queue_timeout, поэтому
+    задержка принятых запросов остается предсказуемой. Для отказа
+    оценивается, через сколько секунд стоит повторить запрос.
+
+    Задачи делятся на классы приоритета. Задача interactive держит слот
+    все время выполнения. Задача bulk берет слот на каждый вызов модели и
+    после него снова встает в очередь, поэтому правка одного слайда ждет
+    не всю презентацию, а только текущий вызов модели. Освободившийся
+    слот достается interactive, но после interactive_weight выдач подряд
+    при ожидающих bulk слот получает bulk, чтобы большие презентации не
+    простаивали под потоком правок. Задачи одного класса обслуживаются по
+    порядку поступления, так что вызовы модели нескольких презентаций
+    чередуются.
+    """
+
+    def __init__(
+        self,
+        max_concurrency=GENERATION_CONCURRENCY,
+        max_queue=GENERATION_QUEUE_SIZE,
+        queue_timeout=GENERATION_QUEUE_TIMEOUT,
+        interactive_weight=GENERATION_INTERACTIVE_WEIGHT,
+    ):
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_queue = max(max_queue, 0)
+        self.queue_timeout = queue_timeout
+        self.interactive_weight = max(interactive_weight, 1)
+
+        self._condition = threading.Condition()
+        self._admitted = {priority: 0 for priority in PRIORITIES}
+        self._active = {priority: 0 for priority in PRIORITIES}
+        self._waiting = {priority: deque() for priority in PRIORITIES}
+        # Выдано слотов interactive подряд, пока ждут задачи bulk
+        self._interactive_streak = 0
+        self._average_seconds = INITIAL_JOB_SECONDS
+
+    def admit(self, priority="interactive"):
+        """
+        Принимает задачу или выбрасывает GenerationRejected, если очередь заполнена.
+
+        Возвращает Admission - контекстный менеджер, который освобождает место
+        в очереди при выходе.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Неизвестный класс приоритета: {priority}")
+
+        with self._condition:
+            # Места считаются по классам: принятые презентации не вытесняют правки слайдов
+            if self._admitted[priority] >= self.max_concurrency + self.max_queue:
+                REJECTED.inc(reason="queue_full", priority=priority)
+                raise GenerationRejected("queue_full", self._estimate_retry_after())
+
+            self._admitted[priority] += 1
+
+        return Admission(self, priority)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "active": dict(self._active),
+                "queued": {priority: len(waiting) for priority, waiting in self._waiting.items()},
+                "admitted": dict(self._admitted),
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "average_slot_seconds": self._average_seconds,
+            }
+
+    def _leave(self, priority):
+        with self._condition:
+            self._admitted[priority] -= 1
+
+    def _acquire(self, priority, timeout):
+        """
+        Ждет свободный слот в своей очереди; timeout=None - ждать без ограничения
+        """
+        start_time = time.perf_counter()
+        deadline = None if timeout is None else start_time + timeout
+        ticket = object()
+
+        with self._condition:
+            self._waiting[priority].append(ticket)
+            self._update_gauges()
+
+            while sum(self._active.values()) >= self.max_concurrency or self._next_ticket() is not ticket:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    self._waiting[priority].remove(ticket)
+                    self._update_gauges()
+                    # Следующая задача в очереди могла ждать только эту
+                    self._condition.notify_all()
+                    REJECTED.inc(reason="timeout", priority=priority)
+                    raise GenerationRejected("timeout", self._estimate_retry_after())
+                self._condition.wait(remaining)
+
+            self._waiting[priority].popleft()
+            self._active[priority] += 1
+            if priority == "interactive":
+                self._interactive_streak += 1
+            else:
+                self._interactive_streak = 0
+            self._update_gauges()
+            # Следующая задача может занять еще один свободный слот
+            self._condition.notify_all()
+
+        QUEUE_WAIT.observe(time.perf_counter() - start_time, priority=priority)
+
+    def _next_ticket(self):
+        """
+        Возвращает задачу, которой достанется следующий свободный слот
+        """
+        interactive = self._waiting["interactive"]
+        bulk = self._waiting["bulk"]
+
+        if bulk and (not interactive or self._interactive_streak >= self.interactive_weight):
+            return bulk[0]
+        if interactive:
+            return interactive[0]
+        return None
+
+    def _release(self, priority, slot_seconds=None):
+        with self._condition:
+            self._active[priority] -= 1
+            if slot_seconds is not None:
+                self._average_seconds += JOB_SECONDS_SMOOTHING * (slot_seconds - self._average_seconds)
+            self._update_gauges()
+            self._condition.notify_all()
+
+    def _estimate_retry_after(self):
+        """
+        Через сколько секунд освободится место: ожидающие слоты делятся между слотами модели
+        """
+        slots_ahead = sum(len(waiting) for waiting in self._waiting.values()) + 1
+        return max(1, math.ceil(self._average_seconds * slots_ahead / self.max_concurrency))
+
+    def _update_gauges(self):
+        for priority in PRIORITIES:
+            ACTIVE.set(self._active[priority], priority=priority)
+            QUEUED.set(len(self._waiting[priority]), priority=priority)
+
+    @contextmanager
+    def _slot(self, priority, timeout):
+        self._acquire(priority, timeout)
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(priority, time.perf_counter() - start_time)
+
+
+class Admission:
+    """
+    Принятая задача генерации: место в очереди до выхода из контекста
+    """
+
+    def __init__(self, scheduler, priority="interactive"):
+        self.scheduler = scheduler
+        self.priority = priority
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.scheduler._leave(self.priority)
+        return False
+
+    def run(self, func, *args, **kwargs):
+        """
+        Выполняет func в текущем потоке.
+
+        Задача interactive сначала дожидается слота и держит его до конца.
+        Задача bulk берет слот на каждый вызов модели внутри func через
+        generation_slot(). Ожидание начала задачи ограничено queue_timeout:
+        задача bulk дожидается своей очереди до запуска func, а затем
+        ждет слоты без ограничения, так как работа уже начата.
+        """
+        if self.priority == "interactive":
+            with self.scheduler._slot(self.priority, self.scheduler.queue_timeout):
+                return func(*args, **kwargs)
+
+        # Слот только отмечает очередь задачи и не входит в среднюю длительность
+        self.scheduler._acquire(self.priority, self.scheduler.queue_timeout)
+        self.scheduler._release(self.priority)
+
+        token = _current_admission.set(self)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_admission.reset(token)
+
+    @contextmanager
+    def step(self):
+        with self.scheduler._slot(self.priority, None):
+            yield
+
+
+@contextmanager
+def generation_slot():
+    """
+    Слот модели на один вызов generate для задачи bulk текущего потока.
+
+    Вне задачи bulk (задача interactive уже держит слот, скрипты и
+    бенчмарки работают без планировщика) ничего не делает.
+    """
+    admission = _current_admission.get()
+    if admission is None:
+        yield
+        return
+
+    with admission.step():
+        yield
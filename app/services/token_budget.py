@@ -0,0 +1,115 @@
+import math
+import threading
+from collections import defaultdict, deque
+
+from app.config import (
+    TOKEN_BUDGET_MODE, SLIDE_MAX_NEW_TOKENS, SLIDE_TOKENS_PER_LINE, SLIDE_TOKEN_BUDGETS,
+    TOKEN_BUDGET_PERCENTILE, TOKEN_BUDGET_WINDOW, TOKEN_BUDGET_MIN_SAMPLES
+)
+
+# Нижняя граница бюджета, чтобы модель успела написать хотя бы заголовок
+MIN_NEW_TOKENS = 64
+
+# Запас сверх перцентиля наблюдаемых длин
+LEARNED_HEADROOM = 1.1
+
+# Множитель роста бюджета, если ответы слишком часто упираются в лимит
+LEARNED_GROWTH = 1.25
+
+
+class TokenBudget:
+    """
+    Подбирает max_new_tokens для слайда по его типу.
+
+    В режиме "static" бюджет выводится из ожидаемой структуры слайда:
+    число строк шаблона структуры умножается на SLIDE_TOKENS_PER_LINE,
+    явные значения из SLIDE_TOKEN_BUDGETS имеют приоритет. Стоимость строки
+    зависит от токенизатора (кириллица в byte-level BPE phi-2 занимает
+    несколько токенов на слово), поэтому по умолчанию она не задана и
+    бюджет равен SLIDE_MAX_NEW_TOKENS, пока не откалиброван. В режиме
+    "learned" бюджет дополнительно подстраивается под наблюдаемые длины
+    ответов: после TOKEN_BUDGET_MIN_SAMPLES наблюдений он равен
+    перцентилю длин с небольшим запасом.
+    """
+
+    def __init__(self, mode=TOKEN_BUDGET_MODE, overrides=None, max_tokens=SLIDE_MAX_NEW_TOKENS,
+                 tokens_per_line=SLIDE_TOKENS_PER_LINE, percentile=TOKEN_BUDGET_PERCENTILE,
+                 window=TOKEN_BUDGET_WINDOW, min_samples=TOKEN_BUDGET_MIN_SAMPLES):
+        self.mode = mode
+        self.overrides = dict(SLIDE_TOKEN_BUDGETS if overrides is None else overrides)
+        self.max_tokens = max_tokens
+        self.tokens_per_line = tokens_per_line
+        self.percentile = percentile
+        self.min_samples = min_samples
+
+        # Наблюдения по типам слайдов: (число сгенерированных токенов, упёрся ли ответ в бюджет)
+        self._observations = defaultdict(lambda: deque(maxlen=window))
+        self._learned = {}
+        self._lock = threading.Lock()
+
+    def get_budget(self, slide_type, slide_structure):
+        """
+        Возвращает бюджет max_new_tokens для слайда данного типа
+        """
+        static_budget = self._get_static_budget(slide_type, slide_structure)
+
+        if self.mode != "learned":
+            return static_budget
+
+        with self._lock:
+            return self._learned.get(slide_type, static_budget)
+
+    def record(self, slide_type, generated_tokens, budget):
+        """
+        Учитывает фактическую длину ответа модели для слайда данного типа
+        """
+        if self.mode != "learned":
+            return
+
+        with self._lock:
+            observations = self._observations[slide_type]
+            observations.append((generated_tokens, generated_tokens >= budget))
+
+            if len(observations) < self.min_samples:
+                return
+
+            truncated_share = sum(1 for _, truncated in observations if truncated) / len(observations)
+
+            if truncated_share > 1 - self.percentile / 100:
+                # Ответы обрезаются чаще допустимого - перцентиль по ним занижен, расширяем бюджет
+                learned_budget = math.ceil(budget * LEARNED_GROWTH)
+            else:
+                lengths = sorted(length for length, _ in observations)
+                rank = max(math.ceil(self.percentile / 100 * len(lengths)) - 1, 0)
+                learned_budget = math.ceil(lengths[rank] * LEARNED_HEADROOM)
+
+            self._learned[slide_type] = min(max(learned_budget, MIN_NEW_TOKENS), self.max_tokens)
+
+    def get_stats(self):
+        """
+        Возвращает текущие обученные бюджеты и число наблюдений по типам слайдов
+        """
+        with self._lock:
+            return {
+                slide_type: {
+                    "budget": self._learned.get(slide_type),
+                    "samples": len(observations)
+                }
+                for slide_type, observations in self._observations.items()
+            }
+
+    def _get_static_budget(self, slide_type, slide_structure):
+        """
+        Выводит бюджет из числа строк в структуре слайда
+        """
+        if slide_type in self.overrides:
+            return int(self.overrides[slide_type])
+
+        # Без калибровки стоимости строки обрезать ответы нельзя
+        if self.tokens_per_line <= 0:
+            return self.max_tokens
+
+        structure_lines = [line for line in slide_structure.split("\n") if line.strip()]
+        budget = len(structure_lines) * self.tokens_per_line
+
+        return min(max(budget, MIN_NEW_TOKENS), self.max_tokens)
@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+
+from app.config import CONTENT_GENERATION_MODE, GENERATION_PROFILE, TOPIC_CACHE_SIZE, TOPIC_CACHE_THRESHOLD
+from app.models.generation_job import GenerationJob
+from app.models.presentation import Presentation
+from app.services.topic_similarity import cosine_similarity, same_topic_terms, topic_signature
+from app.utils.metrics import Counter, Gauge, Histogram, register
+
+LOOKUPS = register(Counter(
+    "icreator_topic_cache_lookups_total",
+    "Поиск готовой презентации по похожей теме: hit - найдена, miss - нет",
+    ("result",),
+))
+SIMILARITY = register(Histogram(
+    "icreator_topic_cache_similarity",
+    "Сходство темы запроса с ближайшей темой в кэше",
+    (),
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0),
+))
+ENTRIES = register(Gauge("icreator_topic_cache_entries", "Презентаций в кэше тем"))
+
+
+class TopicCache:
+    """
+    Кэш готовых презентаций по похожим темам в памяти воркера.
+
+    Темы сравниваются по косинусному сходству векторов символьных n-грамм
+    нормализованных основ слов, поэтому "ИИ в образовании" и
+    "Искусственный интеллект в образовании" дают одну запись. Презентация
+    из кэша подходит только при том же числе слайдов, режиме и профиле,
+    сходстве не ниже threshold и том же наборе слов и чисел темы: одно
+    сходство n-грамм выше 0.85 и у "XVII века" с "XVIII века", и у
+    "Windows 10" с "Windows 11", и у темы с темой, где добавлено слово.
+    Кэш заполняется завершенными задачами генерации из базы при первом
+    поиске и новыми презентациями воркера; хранится не больше max_entries
+    последних презентаций.
+    """
+
+    def __init__(self, threshold=TOPIC_CACHE_THRESHOLD, max_entries=TOPIC_CACHE_SIZE):
+        self.threshold = threshold
+        self.max_entries = max(max_entries, 1)
+        self._entries = OrderedDict()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def lookup(self, db, topic, slides_count, mode=None, profile=None):
+        """
+        Ищет готовую презентацию с похожей темой.
+
+        Возвращает пару (id презентации, сходство) или None.
+        """
+        self._load(db)
+        params = _resolve_params(slides_count, mode, profile)
+        signature = topic_signature(topic)
+
+        with self._lock:
+            candidates = [
+                (presentation_id, entry_signature)
+                for presentation_id, (entry_params, entry_signature) in self._entries.items()
+                if entry_params == params
+            ]
+
+        best_id, best_similarity = None, 0.0
+        nearest_similarity = None
+        for presentation_id, entry_signature in candidates:
+            similarity = cosine_similarity(signature[0], entry_signature[0])
+            nearest_similarity = max(similarity, nearest_similarity or 0.0)
+            if similarity < self.threshold or not same_topic_terms(signature, entry_signature, self.threshold):
+                continue
+            # При равном сходстве предпочитаем более новую презентацию
+            if similarity >= best_similarity:
+                best_id, best_similarity = presentation_id, similarity
+
+        if nearest_similarity is not None:
+            SIMILARITY.observe(nearest_similarity)
+
+        if best_id is None:
+            LOOKUPS.inc(result="miss")
+            return None
+
+        # Презентацию могли удалить из базы после попадания в кэш
+        if db.query(Presentation.id).filter(Presentation.id == best_id).first() is None:
+            self.discard(best_id)
+            LOOKUPS.inc(result="miss")
+            return None
+
+        LOOKUPS.inc(result="hit")
+        return best_id, best_similarity
+
+    def add(self, presentation_id, topic, slides_count, mode=None, profile=None):
+        with self._lock:
+            self._entries[presentation_id] = (_resolve_params(slides_count, mode, profile), topic_signature(topic))
+            self._entries.move_to_end(presentation_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            ENTRIES.set(len(self._entries))
+
+    def discard(self, presentation_id):
+        with self._lock:
+            self._entries.pop(presentation_id, None)
+            ENTRIES.set(len(self._entries))
+
+    def _load(self, db):
+        """
+        Заполняет кэш последними завершенными презентациями из базы
+        """
+        if self._loaded:
+            return
+
+        rows = db.query(
+            Presentation.id, Presentation.topic, Presentation.slides_count, GenerationJob.mode, GenerationJob.profile
+        ).join(GenerationJob, GenerationJob.presentation_id == Presentation.id).filter(
+            GenerationJob.status == "completed"
+        ).order_by(Presentation.id.desc()).limit(self.max_entries).all()
+
+        for presentation_id, topic, slides_count, mode, profile in reversed(rows):
+            self.add(presentation_id, topic, slides_count, mode, profile)
+
+        self._loaded = True
+
+
+def _resolve_params(slides_count, mode, profile):
+    return slides_count, mode or CONTENT_GENERATION_MODE, profile or GENERATION_PROFILE
@@ -0,0 +1,142 @@
+import math
+import re
+from collections import Counter as TermCounter
+from functools import lru_cache
+
+from app.config import TOPIC_CACHE_NGRAM
+
+# Служебные слова, не влияющие на содержание презентации
+STOPWORDS = frozenset((
+    "в", "во", "на", "и", "или", "а", "но", "для", "о", "об", "обо", "с", "со", "по", "к", "ко", "у", "из",
+    "от", "до", "за", "при", "про", "под", "над", "без", "через", "как", "что", "это", "его", "ее", "их",
+    "the", "a", "an", "of", "in", "on", "and", "or", "for", "to", "with",
+    "презентация", "презентации", "тема", "введение",
+))
+
+# Распространенные сокращения раскрываются до нормализации, чтобы "ИИ" совпадало с "искусственный интеллект"
+ABBREVIATIONS = {
+    "ии": "искусственный интеллект",
+    "ai": "искусственный интеллект",
+    "мо": "машинное обучение",
+    "ml": "машинное обучение",
+    "ит": "информационные технологии",
+    "it": "информационные технологии",
+    "вр": "виртуальная реальность",
+    "vr": "виртуальная реальность",
+    "ар": "дополненная реальность",
+    "ar": "дополненная реальность",
+    "iot": "интернет вещей",
+    "рф": "россия",
+    "сша": "соединенные штаты",
+    "вуз": "высшее учебное заведение",
+    "вузы": "высшие учебные заведения",
+}
+
+# Окончания русских слов от длинных к коротким; отсекается первое подходящее
+ENDINGS = tuple(sorted((
+    "иями", "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими", "ией", "иях", "ием",
+    "ия", "ие", "ий", "ый", "ой", "ая", "яя", "ое", "ее", "ые", "ах", "ях", "ов", "ев", "ом", "ем",
+    "ам", "ям", "ии", "ью", "ей", "ую", "юю", "ым", "им",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+), key=len, reverse=True))
+
+# Минимальная длина основы после отсечения окончания
+MIN_STEM_LENGTH = 3
+
+# Числа и римские цифры: век, год или версия меняют тему, хотя почти не меняют n-граммы
+NUMBER_TERM = re.compile(r"\d+|(?=[mdclxvi])m{0,3}(?:cm|cd|d?c{0,3})(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3})")
+
+# Кириллические буквы, которыми часто набирают римские цифры ("ХХ век")
+NUMERAL_LOOKALIKES = str.maketrans("хі", "xi")
+
+
+def stem(word):
+    """
+    Упрощенная лемматизация: отсекает окончание русского слова, оставляя основу
+    """
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def is_number_term(term):
+    return NUMBER_TERM.fullmatch(term) is not None
+
+
+def normalize_topic_terms(topic):
+    """
+    Приводит тему к отсортированному набору основ слов: регистр и ё не
+    различаются, сокращения раскрываются, служебные слова удаляются
+    """
+    words = re.findall(r"\w+", str(topic).casefold().replace("ё", "е"))
+
+    expanded = []
+    for word in words:
+        expanded.extend(ABBREVIATIONS.get(word, word).split())
+
+    terms = set()
+    for word in expanded:
+        if word in STOPWORDS:
+            continue
+        numeral = word.translate(NUMERAL_LOOKALIKES)
+        terms.add(numeral if is_number_term(numeral) else stem(word))
+
+    return sorted(terms)
+
+
+@lru_cache(maxsize=4096)
+def term_vector(term, ngram=TOPIC_CACHE_NGRAM):
+    """
+    Вектор символьных n-грамм одной основы слова
+    """
+    padded = f" {term} "
+    if len(padded) <= ngram:
+        return TermCounter((padded,))
+    return TermCounter(padded[index:index + ngram] for index in range(len(padded) - ngram + 1))
+
+
+def topic_signature(topic, ngram=TOPIC_CACHE_NGRAM):
+    """
+    Возвращает (вектор n-грамм темы, основы слов без чисел, числа и римские цифры)
+    """
+    terms = normalize_topic_terms(topic)
+    numbers = frozenset(term for term in terms if is_number_term(term))
+    grams = TermCounter()
+    for term in terms:
+        grams.update(term_vector(term, ngram))
+    return grams, frozenset(terms) - numbers, numbers
+
+
+def same_topic_terms(left, right, threshold):
+    """
+    Проверяет, что у подписей тем одинаковые числа и одинаковый набор слов.
+
+    Числа и римские цифры должны совпадать точно. Каждой основе слова одной
+    темы должна найтись основа другой темы со сходством n-грамм не ниже
+    threshold, и наоборот: так опечатки и окончания, которые не отсек
+    стемминг, не мешают совпадению, а лишнее или другое слово - мешает.
+    """
+    _, left_terms, left_numbers = left
+    _, right_terms, right_numbers = right
+    if left_numbers != right_numbers:
+        return False
+
+    return _terms_covered(left_terms, right_terms, threshold) and _terms_covered(right_terms, left_terms, threshold)
+
+
+def _terms_covered(terms, other_terms, threshold):
+    for term in terms - other_terms:
+        if not any(cosine_similarity(term_vector(term), term_vector(other)) >= threshold for other in other_terms):
+            return False
+    return True
+
+
+def cosine_similarity(left, right):
+    if not left or not right:
+        return 0.0
+
+    dot = sum(count * right.get(gram, 0) for gram, count in left.items())
+    norm = math.sqrt(sum(count * count for count in left.values())) * \
+        math.sqrt(sum(count * count for count in right.values()))
+    return dot / norm
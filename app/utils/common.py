@@ -1,4 +1,3 @@
-import time
 from typing import Dict, Any
 
 
@@ -16,17 +15,3 @@ def format_response(status: str, data: Dict[str, Any] = None, message: str = Non
 
     return response
 
-
-def measure_execution_time(func):
-    """
-    Декоратор для измерения времени выполнения функции
-    """
-
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        print(f"Функция {func.__name__} выполнилась за {end_time - start_time:.2f} секунд")
-        return result
-
-    return wrapper
\ No newline at end of file
@@ -1,20 +1,39 @@
 import os
 import sys
+import json
+import shutil
+import argparse
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
-from huggingface_hub import hf_hub_download, snapshot_download
+from huggingface_hub import snapshot_download
+from safetensors.torch import load_file, save_file
 import time
-from tqdm import tqdm
 
 # Добавляем директорию проекта в sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from app.config import CONTENT_MODEL, CODE_MODEL, CACHE_DIR
+from app.config import CONTENT_MODEL, CODE_MODEL, CACHE_DIR, CODE_BACKEND, CODE_ONNX_FILE
+from app.utils.snapshots import MANIFEST_NAME, file_sha256, get_snapshot_dir, verify_snapshot
 
+# Файлы, которые нужны для загрузки модели и токенизатора
+DOWNLOAD_PATTERNS = ["*.json", "*.safetensors", "*.bin", "*.model", "*.txt", "*.py", "*.tiktoken"]
 
-def download_model(model_name, model_type="model"):
+# Файлы весов, которые не копируются в снимок как есть
+WEIGHT_SUFFIXES = (".bin", ".safetensors", ".h5", ".msgpack", ".ckpt")
+WEIGHT_INDEX_NAMES = ("pytorch_model.bin.index.json", "model.safetensors.index.json")
+
+# Типы данных, в которые можно заранее сконвертировать веса
+CONVERT_DTYPES = {
+    "float16": torch.float16,
+    "bfloat16": torch.bfloat16,
+}
+
+
+def download_model(model_name, model_type="model", dtype=None, extra_files=()):
     """
-    Загружает модель и токенизатор
+    Загружает модель и готовит ее проверенный локальный снимок.
+
+    extra_files - дополнительные файлы репозитория (например, граф ONNX),
+    которые копируются в снимок с сохранением относительного пути.
     """
     print(f"Загрузка {model_type} модели: {model_name}")
     start_time = time.time()
@@ -23,66 +42,152 @@ def download_model(model_name, model_type="model"):
     os.makedirs(CACHE_DIR, exist_ok=True)
 
     try:
-        # Загружаем токенизатор
-        print(f"Загрузка токенизатора для {model_name}...")
-        tokenizer = AutoTokenizer.from_pretrained(
-            model_name,
-            cache_dir=CACHE_DIR,
-            trust_remote_code=True
-        )
-        print(f"Токенизатор успешно загружен")
-
         # Используем snapshot_download для загрузки всех файлов модели
         print(f"Загрузка файлов модели {model_name}...")
-        snapshot_download(
+        source_dir = snapshot_download(
             repo_id=model_name,
             cache_dir=CACHE_DIR,
             local_files_only=False,
+            allow_patterns=DOWNLOAD_PATTERNS + list(extra_files),
         )
-
         print(f"Файлы модели успешно загружены")
 
-        # Проверяем, можем ли мы загрузить модель (без квантизации для CPU)
-        print(f"Тестовая загрузка модели {model_name}...")
-
-        # Определяем, использовать ли квантизацию - для CPU НЕ используем квантизацию
-        if torch.cuda.is_available():
-            print("Доступен GPU, загружаем модель с использованием float16")
-            model = AutoModelForCausalLM.from_pretrained(
-                model_name,
-                torch_dtype=torch.float16,
-                device_map="auto",
-                cache_dir=CACHE_DIR,
-                trust_remote_code=True,
-            )
-        else:
-            # Для CPU не используем квантизацию, просто загружаем модель
-            print("Загружаем модель для CPU (без квантизации)")
-            model = AutoModelForCausalLM.from_pretrained(
-                model_name,
-                low_cpu_mem_usage=True,
-                cache_dir=CACHE_DIR,
-                trust_remote_code=True,
-            )
-
-        print(f"Тестовая загрузка модели успешно завершена")
+        # Снимок с весами в safetensors, из которого генераторы загружают модель без сети
+        snapshot_dir = prepare_snapshot(model_name, source_dir, dtype, extra_files)
 
-        # Освобождаем память
-        del model
-        torch.cuda.empty_cache() if torch.cuda.is_available() else None
+        # Проверяем снимок по контрольным суммам вместо тестовой загрузки модели
+        problems = verify_snapshot(snapshot_dir)
+        if problems:
+            print(f"Снимок модели {model_name} не прошел проверку: {'; '.join(problems)}")
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+            return False
 
         end_time = time.time()
-        print(f"Модель {model_name} успешно загружена за {end_time - start_time:.2f} секунд")
+        print(f"Модель {model_name} успешно подготовлена за {end_time - start_time:.2f} секунд: {snapshot_dir}")
         return True
     except Exception as e:
         print(f"Ошибка при загрузке модели {model_name}: {e}")
         return False
 
 
+def prepare_snapshot(model_name, source_dir, dtype=None, extra_files=()):
+    """
+    Собирает локальный снимок модели: файлы конфигурации и токенизатора,
+    веса в safetensors и манифест с контрольными суммами
+    """
+    snapshot_dir = get_snapshot_dir(model_name)
+    temp_dir = f"{snapshot_dir}.tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+
+    source_files = sorted(
+        name for name in os.listdir(source_dir) if os.path.isfile(os.path.join(source_dir, name))
+    )
+    safetensors_files = [name for name in source_files if name.endswith(".safetensors")]
+    bin_files = [name for name in source_files if name.endswith(".bin") and name.startswith("pytorch_model")]
+
+    # Конфигурация, токенизатор и код модели копируются как есть
+    for name in source_files:
+        if name.endswith(WEIGHT_SUFFIXES) or name in WEIGHT_INDEX_NAMES:
+            continue
+        shutil.copy2(os.path.join(source_dir, name), os.path.join(temp_dir, name))
+
+    for relative_path in extra_files:
+        target_path = os.path.join(temp_dir, relative_path)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        shutil.copy2(os.path.join(source_dir, relative_path), target_path)
+
+    if safetensors_files and dtype is None:
+        print("Веса уже в формате safetensors, копируем без конвертации")
+        for name in safetensors_files + [n for n in source_files if n == "model.safetensors.index.json"]:
+            shutil.copy2(os.path.join(source_dir, name), os.path.join(temp_dir, name))
+    elif not (safetensors_files or bin_files):
+        # Для ONNX-бэкенда достаточно графа из extra_files
+        if not extra_files:
+            raise FileNotFoundError(f"Не найдены веса модели в {source_dir}")
+        print("Веса PyTorch в репозитории нет, снимок содержит только дополнительные файлы")
+    else:
+        weight_files = safetensors_files or bin_files
+        print(f"Конвертация весов в safetensors{f' ({dtype})' if dtype else ''}...")
+        convert_weights(
+            [os.path.join(source_dir, name) for name in weight_files],
+            os.path.join(temp_dir, "model.safetensors"),
+            CONVERT_DTYPES[dtype] if dtype else None,
+        )
+
+    write_manifest(temp_dir, model_name, os.path.basename(source_dir), dtype)
+
+    # Подменяем снимок целиком, чтобы воркеры не увидели его наполовину записанным
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    os.rename(temp_dir, snapshot_dir)
+    return snapshot_dir
+
+
+def convert_weights(weight_files, output_path, dtype=None):
+    """
+    Объединяет файлы весов в один файл safetensors, при необходимости меняя тип данных
+    """
+    state_dict = {}
+    for weight_file in weight_files:
+        if weight_file.endswith(".safetensors"):
+            state_dict.update(load_file(weight_file))
+        else:
+            state_dict.update(torch.load(weight_file, map_location="cpu", weights_only=True))
+
+    seen_storages = set()
+    tensors = {}
+    for name, tensor in state_dict.items():
+        # safetensors не хранит общие тензоры дважды; связанные веса модель восстановит сама
+        storage = (tensor.untyped_storage().data_ptr(), tensor.storage_offset(), tuple(tensor.shape))
+        if storage in seen_storages:
+            continue
+        seen_storages.add(storage)
+
+        if dtype is not None and tensor.is_floating_point():
+            tensor = tensor.to(dtype)
+        tensors[name] = tensor.contiguous()
+
+    # Метаданные format=pt нужны transformers для загрузки safetensors
+    save_file(tensors, output_path, metadata={"format": "pt"})
+
+
+def write_manifest(snapshot_dir, model_name, revision, dtype=None):
+    """
+    Записывает манифест снимка с размерами и sha256 всех файлов
+    """
+    files = {}
+    for root, _, names in os.walk(snapshot_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            relative_path = os.path.relpath(path, snapshot_dir)
+            if relative_path == MANIFEST_NAME:
+                continue
+            files[relative_path] = {
+                "size": os.path.getsize(path),
+                "sha256": file_sha256(path),
+            }
+
+    manifest = {
+        "model": model_name,
+        "revision": revision,
+        "dtype": dtype or "original",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": files,
+    }
+
+    with open(os.path.join(snapshot_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
 def main():
     """
     Основная функция для загрузки всех моделей
     """
+    parser = argparse.ArgumentParser(description="Загрузка моделей и подготовка локальных снимков")
+    parser.add_argument("--dtype", choices=sorted(CONVERT_DTYPES), help="Заранее сконвертировать веса в этот тип")
+    parser.add_argument("--verify-only", action="store_true", help="Только проверить существующие снимки")
+    args = parser.parse_args()
+
     print("=" * 50)
     print("Начинаем загрузку моделей")
     print("=" * 50)
@@ -91,11 +196,23 @@ def main():
     os.environ["TRANSFORMERS_CACHE"] = CACHE_DIR
     print(f"Директория кэша: {CACHE_DIR}")
 
-    # Загружаем модель для генерации контента
-    content_model_success = download_model(CONTENT_MODEL, "контент")
-
-    # Загружаем модель для генерации кода
-    code_model_success = download_model(CODE_MODEL, "код")
+    if args.verify_only:
+        results = {}
+        for model_name in (CONTENT_MODEL, CODE_MODEL):
+            problems = verify_snapshot(get_snapshot_dir(model_name))
+            results[model_name] = not problems
+            if problems:
+                print(f"{model_name}: {'; '.join(problems)}")
+        content_model_success = results[CONTENT_MODEL]
+        code_model_success = results[CODE_MODEL]
+    else:
+        # Загружаем модель для генерации контента
+        content_model_success = download_model(CONTENT_MODEL, "контент", args.dtype)
+
+        # Загружаем модель для генерации кода
+        code_model_success = download_model(
+            CODE_MODEL, "код", args.dtype, [CODE_ONNX_FILE] if CODE_BACKEND == "onnx" else []
+        )
 
     # Выводим итоговую информацию
     print("\n" + "=" * 50)
@@ -114,4 +231,4 @@ def main():
 if __name__ == "__main__":
     success = main()
     # Всегда выходим с успешным кодом, чтобы Docker не останавливался
-    sys.exit(0)
\ No newline at end of file
+    sys.exit(0)
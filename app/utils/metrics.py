@@ -0,0 +1,325 @@
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Границы корзин гистограмм длительности в секундах: от миллисекунд шаблонов до минут генерации
+DURATION_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+class Histogram:
+    """
+    Гистограмма в формате Prometheus: накопительные корзины, сумма и число наблюдений по наборам меток
+    """
+
+    def __init__(self, name, help_text, label_names, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+
+        with self._lock:
+            items = sorted((key, dict(series, buckets=list(series["buckets"]))) for key, series in self._series.items())
+
+        for key, series in items:
+            labels = list(zip(self.label_names, key))
+            for bound, count in zip(self.buckets, series["buckets"]):
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', '+Inf')])} {series['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series['count']}")
+
+        return lines
+
+
+class Counter:
+    """
+    Монотонный счетчик в формате Prometheus по наборам меток
+    """
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+
+        with self._lock:
+            items = sorted(self._values.items())
+
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(list(zip(self.label_names, key)))} {_format_value(value)}")
+
+        return lines
+
+
+class Gauge:
+    """
+    Текущее значение в формате Prometheus по наборам меток
+    """
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+
+        with self._lock:
+            items = sorted(self._values.items())
+
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(list(zip(self.label_names, key)))} {_format_value(value)}")
+
+        return lines
+
+
+# Реестр метрик процесса; каждый воркер uvicorn отдает свои значения
+REGISTRY = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+REQUEST_DURATION = register(Histogram(
+    "icreator_request_duration_seconds",
+    "Длительность HTTP-запросов",
+    ("method", "handler", "status"),
+))
+STAGE_DURATION = register(Histogram(
+    "icreator_stage_duration_seconds",
+    "Длительность этапов обработки запроса: tokenize, prefill, decode, postprocess, template, db_commit",
+    ("stage", "model"),
+))
+
+# Телеметрия генерации по модели и типу слайда. Время пакетного вызова делится
+# между его промптами, поэтому суммы секунд соответствуют реальному времени модели
+GENERATIONS = register(Counter(
+    "icreator_generations_total", "Число сгенерированных ответов", ("model", "slide_type")
+))
+PROMPT_TOKENS = register(Counter(
+    "icreator_prompt_tokens_total", "Токены промптов", ("model", "slide_type")
+))
+GENERATED_TOKENS = register(Counter(
+    "icreator_generated_tokens_total", "Сгенерированные токены", ("model", "slide_type")
+))
+PREFILL_SECONDS = register(Counter(
+    "icreator_prefill_seconds_total", "Время обработки промптов", ("model", "slide_type")
+))
+DECODE_SECONDS = register(Counter(
+    "icreator_decode_seconds_total", "Время декодирования", ("model", "slide_type")
+))
+DECODE_RATE = register(Histogram(
+    "icreator_decode_tokens_per_second",
+    "Скорость декодирования одного ответа в токенах в секунду",
+    ("model", "slide_type"),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000),
+))
+
+# Спаны текущего запроса: список (этап, секунды), общий для вложенных вызовов и потоков запроса
+_current_spans = contextvars.ContextVar("icreator_spans", default=None)
+# Записи телеметрии генерации, собираемые для ответа API
+_current_generations = contextvars.ContextVar("icreator_generations", default=None)
+
+
+@contextmanager
+def span(stage, model=""):
+    """
+    Измеряет время блока по монотонным часам и записывает его в гистограмму
+    этапов и в спаны текущего запроса
+    """
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - start_time, model)
+
+
+def record_span(stage, seconds, model=""):
+    """
+    Записывает уже измеренную длительность этапа
+    """
+    STAGE_DURATION.observe(seconds, stage=stage, model=model)
+
+    spans = _current_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+def timed(stage):
+    """
+    Декоратор: измеряет каждый вызов функции как спан этапа stage
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def start_request_trace():
+    """
+    Начинает сбор спанов для текущего запроса и возвращает токен для finish_request_trace
+    """
+    return _current_spans.set([])
+
+
+def finish_request_trace(token):
+    """
+    Завершает сбор спанов запроса и возвращает суммарное время по этапам
+    """
+    spans = _current_spans.get() or []
+    _current_spans.reset(token)
+
+    totals = {}
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return totals
+
+
+def format_server_timing(totals):
+    """
+    Форматирует суммарное время этапов для заголовка Server-Timing (в миллисекундах)
+    """
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items())
+
+
+def record_generation(model, slide_type, result):
+    """
+    Записывает телеметрию одного ответа модели (GenerationResult) в метрики
+    и в телеметрию текущего запроса, если она собирается
+    """
+    batch_size = max(result.batch_size, 1)
+    tokens_per_sec = result.generated_tokens / result.decode_seconds if result.decode_seconds else 0.0
+
+    GENERATIONS.inc(model=model, slide_type=slide_type)
+    PROMPT_TOKENS.inc(result.prompt_tokens, model=model, slide_type=slide_type)
+    GENERATED_TOKENS.inc(result.generated_tokens, model=model, slide_type=slide_type)
+    PREFILL_SECONDS.inc(result.prefill_seconds / batch_size, model=model, slide_type=slide_type)
+    DECODE_SECONDS.inc(result.decode_seconds / batch_size, model=model, slide_type=slide_type)
+    if tokens_per_sec:
+        DECODE_RATE.observe(tokens_per_sec, model=model, slide_type=slide_type)
+
+    generations = _current_generations.get()
+    if generations is not None:
+        generations.append({
+            "model": model,
+            "slide_type": slide_type,
+            "prompt_tokens": result.prompt_tokens,
+            "generated_tokens": result.generated_tokens,
+            "batch_size": batch_size,
+            "prefill_ms": result.prefill_seconds * 1000,
+            "decode_ms": result.decode_seconds * 1000,
+            "tokens_per_sec": tokens_per_sec,
+        })
+
+
+@contextmanager
+def generation_telemetry():
+    """
+    Собирает телеметрию всех генераций внутри блока и отдает ее списком записей
+    """
+    generations = []
+    token = _current_generations.set(generations)
+    try:
+        yield generations
+    finally:
+        _current_generations.reset(token)
+
+
+def summarize_generation_telemetry(generations):
+    """
+    Сводка телеметрии запроса по моделям: токены, время prefill/decode и скорость.
+
+    Время пакетного вызова делится между его промптами.
+    """
+    models = {}
+    for record in generations:
+        totals = models.setdefault(record["model"], {
+            "generations": 0,
+            "prompt_tokens": 0,
+            "generated_tokens": 0,
+            "prefill_ms": 0.0,
+            "decode_ms": 0.0,
+        })
+        totals["generations"] += 1
+        totals["prompt_tokens"] += record["prompt_tokens"]
+        totals["generated_tokens"] += record["generated_tokens"]
+        totals["prefill_ms"] += record["prefill_ms"] / record["batch_size"]
+        totals["decode_ms"] += record["decode_ms"] / record["batch_size"]
+
+    for totals in models.values():
+        decode_seconds = totals["decode_ms"] / 1000
+        totals["tokens_per_sec"] = totals["generated_tokens"] / decode_seconds if decode_seconds else 0.0
+
+    return {"models": models, "generations": generations}
+
+
+def render_metrics():
+    """
+    Возвращает все метрики процесса в текстовом формате Prometheus
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
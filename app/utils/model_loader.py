@@ -0,0 +1,214 @@
+import json
+import mmap
+import os
+import struct
+import time
+
+import torch
+from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer
+
+from app.config import CACHE_DIR, MODEL_LOAD_MODE, OFFLINE_MODELS, VERIFY_SNAPSHOT_CHECKSUMS
+from app.utils.runtime import get_model_load_kwargs, prepare_model_for_inference, get_process_memory
+from app.utils.snapshots import get_local_snapshot
+
+# Типы данных safetensors и соответствующие типы torch
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+# Статистика загрузки моделей в этом процессе: имя модели -> параметры загрузки
+LOAD_STATS = {}
+
+
+def resolve_model_source(model_name):
+    """
+    Возвращает (путь или имя модели, local_files_only) для загрузки.
+
+    Если для модели подготовлен проверенный локальный снимок, модель
+    загружается из него без обращения к сети и без конвертации весов.
+    """
+    snapshot_dir = get_local_snapshot(model_name, VERIFY_SNAPSHOT_CHECKSUMS)
+    if snapshot_dir:
+        return snapshot_dir, True
+
+    if OFFLINE_MODELS:
+        raise FileNotFoundError(
+            f"Нет локального снимка модели {model_name}, запустите python -m app.utils.download_models"
+        )
+
+    return model_name, False
+
+
+def load_tokenizer(model_name):
+    """
+    Загружает токенизатор модели, по возможности из локального снимка
+    """
+    source, local_files_only = resolve_model_source(model_name)
+
+    return AutoTokenizer.from_pretrained(
+        source,
+        cache_dir=CACHE_DIR,
+        local_files_only=local_files_only,
+        trust_remote_code=True,
+    )
+
+
+def load_causal_lm(model_name, mode=MODEL_LOAD_MODE):
+    """
+    Загружает языковую модель для генерации в режиме инференса.
+
+    В режиме "standard" используется from_pretrained. В режиме "mmap" веса
+    safetensors из кэша отображаются в память без копирования: страницы
+    файла разделяются через page cache между всеми воркерами на машине,
+    а холодный старт не тратит время на копирование весов. Если модель
+    нельзя загрузить через mmap, в том числе если веса сохранены не в типе
+    данных профиля инференса, используется обычная загрузка.
+    """
+    start_time = time.perf_counter()
+    source, local_files_only = resolve_model_source(model_name)
+    model = None
+
+    if mode == "mmap":
+        try:
+            model = _load_mmap(source, local_files_only)
+        except Exception as e:
+            print(f"Не удалось отобразить веса {model_name} в память, используется обычная загрузка: {e}")
+            mode = "standard"
+
+    if model is None:
+        model = AutoModelForCausalLM.from_pretrained(
+            source,
+            cache_dir=CACHE_DIR,
+            local_files_only=local_files_only,
+            trust_remote_code=True,
+            **get_model_load_kwargs()
+        )
+
+    # Режим инференса: eval, без градиентов, по желанию torch.compile
+    model = prepare_model_for_inference(model)
+
+    load_seconds = time.perf_counter() - start_time
+    LOAD_STATS[model_name] = {
+        "mode": mode,
+        "source": "snapshot" if local_files_only else "hub",
+        "load_seconds": load_seconds,
+        "memory_after_load": get_process_memory(),
+    }
+    print(f"Модель {model_name} загружена за {load_seconds:.2f} секунд (режим {mode})")
+
+    return model
+
+
+def _load_mmap(model_name, local_files_only=False):
+    """
+    Создает модель без весов и подставляет тензоры, отображенные из файлов safetensors
+    """
+    from accelerate import init_empty_weights
+
+    model_dir = _resolve_model_dir(model_name, local_files_only)
+    weight_files = sorted(
+        os.path.join(model_dir, name) for name in os.listdir(model_dir) if name.endswith(".safetensors")
+    )
+    if not weight_files:
+        raise FileNotFoundError(f"В {model_dir} нет файлов safetensors")
+
+    state_dict = {}
+    buffers = []
+    for weight_file in weight_files:
+        tensors, buffer = _mmap_safetensors(weight_file)
+        state_dict.update(tensors)
+        buffers.append(buffer)
+
+    # Приведение типа скопировало бы веса и лишило mmap смысла, поэтому при
+    # расхождении с типом профиля инференса (например, fp16-чекпойнт при
+    # bf16/fp32 на CPU) используется обычная загрузка с приведением типа
+    requested_dtype = get_model_load_kwargs().get("torch_dtype", torch.float32)
+    stored_dtypes = {tensor.dtype for tensor in state_dict.values() if tensor.is_floating_point()}
+    if stored_dtypes - {requested_dtype}:
+        raise ValueError(
+            f"веса сохранены в {', '.join(sorted(str(dtype) for dtype in stored_dtypes))}, "
+            f"а профиль инференса требует {requested_dtype}"
+        )
+
+    config = AutoConfig.from_pretrained(model_dir, trust_remote_code=True)
+    with init_empty_weights():
+        model = AutoModelForCausalLM.from_config(config, trust_remote_code=True)
+
+    # В старых чекпойнтах ключи записаны без префикса базовой модели (например, "transformer.")
+    model_keys = set(model.state_dict().keys())
+    prefix = f"{model.base_model_prefix}."
+    if not model_keys & set(state_dict) and any(key.startswith(prefix) for key in model_keys):
+        state_dict = {prefix + key: tensor for key, tensor in state_dict.items()}
+
+    model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+
+    missing = [name for name, parameter in model.named_parameters() if parameter.is_meta]
+    if missing:
+        raise ValueError(f"в чекпойнте нет весов: {', '.join(missing[:5])}")
+
+    # Отображения должны жить столько же, сколько модель
+    model._mmap_buffers = buffers
+    return model
+
+
+def _resolve_model_dir(model_name, local_files_only=False):
+    """
+    Возвращает локальную директорию с файлами модели
+    """
+    if os.path.isdir(model_name):
+        return model_name
+
+    from huggingface_hub import snapshot_download
+
+    return snapshot_download(
+        repo_id=model_name,
+        cache_dir=CACHE_DIR,
+        local_files_only=local_files_only,
+        allow_patterns=["*.json", "*.safetensors", "*.py"],
+    )
+
+
+def _mmap_safetensors(path):
+    """
+    Отображает файл safetensors в память и возвращает (тензоры, отображение).
+
+    Тензоры указывают прямо на страницы файла. Отображение открывается
+    в режиме copy-on-write: страницы остаются общими с page cache, пока
+    в них никто не пишет, а при инференсе веса не изменяются.
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    tensors = {}
+
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+
+        dtype = SAFETENSORS_DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        element_size = torch.empty((), dtype=dtype).element_size()
+        count = (end - start) // element_size
+
+        if count == 0:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+
+        tensors[name] = torch.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + start
+        ).reshape(info["shape"])
+
+    return tensors, buffer
@@ -0,0 +1,257 @@
+import fcntl
+import os
+import tempfile
+
+import torch
+
+from app.config import (
+    WEB_CONCURRENCY, TORCH_NUM_THREADS, TORCH_INTEROP_THREADS, CPU_AFFINITY, INFERENCE_PROFILE, TORCH_COMPILE
+)
+
+# Примененные настройки потоков: задаются один раз на процесс
+_runtime_settings = None
+
+# Файл блокировки, удерживающий слот воркера до конца жизни процесса
+_worker_slot_file = None
+
+
+def get_available_cores():
+    """
+    Возвращает список ядер, доступных текущему процессу
+    """
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def get_thread_budget(workers=WEB_CONCURRENCY, cores=None):
+    """
+    Возвращает число потоков PyTorch внутри операций для одного воркера.
+
+    Если TORCH_NUM_THREADS не задан, доступные ядра делятся поровну
+    между воркерами, чтобы процессы не конкурировали за одни и те же ядра.
+    """
+    if TORCH_NUM_THREADS > 0:
+        return TORCH_NUM_THREADS
+
+    cores = cores if cores is not None else len(get_available_cores())
+    return max(cores // max(workers, 1), 1)
+
+
+def parse_cpu_list(value):
+    """
+    Разбирает список ядер в формате "0-3,8,10-11"
+    """
+    cores = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cores.update(range(int(start), int(end) + 1))
+        else:
+            cores.add(int(part))
+    return sorted(cores)
+
+
+def claim_worker_slot(workers=WEB_CONCURRENCY):
+    """
+    Занимает свободный номер воркера на машине.
+
+    Номер определяется файловой блокировкой, которая держится до завершения
+    процесса, поэтому перезапущенный воркер получает освободившийся слот.
+    Возвращает None, если все слоты заняты.
+    """
+    global _worker_slot_file
+
+    lock_dir = os.path.join(tempfile.gettempdir(), "icreator-workers")
+    os.makedirs(lock_dir, exist_ok=True)
+
+    for slot in range(max(workers, 1)):
+        slot_file = open(os.path.join(lock_dir, f"worker-{slot}.lock"), "w")
+        try:
+            fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            slot_file.close()
+            continue
+
+        _worker_slot_file = slot_file
+        return slot
+
+    return None
+
+
+def get_affinity_cores(workers=WEB_CONCURRENCY, worker_index=None):
+    """
+    Возвращает набор ядер, к которым нужно привязать процесс, или None
+    """
+    if CPU_AFFINITY == "none":
+        return None
+
+    if CPU_AFFINITY != "auto":
+        return parse_cpu_list(CPU_AFFINITY)
+
+    if worker_index is None:
+        worker_index = claim_worker_slot(workers)
+        if worker_index is None:
+            return None
+
+    cores = get_available_cores()
+    per_worker = max(len(cores) // max(workers, 1), 1)
+    start = (worker_index * per_worker) % len(cores)
+    return cores[start:start + per_worker]
+
+
+def configure_torch_threads(workers=WEB_CONCURRENCY, worker_index=None):
+    """
+    Настраивает потоки PyTorch и привязку к ядрам для текущего процесса.
+
+    Вызывается при создании генераторов; повторные вызовы ничего не делают.
+    Возвращает словарь с примененными настройками.
+    """
+    global _runtime_settings
+
+    if _runtime_settings is not None:
+        return _runtime_settings
+
+    settings = {
+        "num_threads": torch.get_num_threads(),
+        "interop_threads": torch.get_num_interop_threads(),
+        "affinity": None,
+    }
+
+    affinity = get_affinity_cores(workers, worker_index)
+    if affinity:
+        try:
+            os.sched_setaffinity(0, affinity)
+            settings["affinity"] = affinity
+        except (AttributeError, OSError) as e:
+            print(f"Не удалось привязать процесс к ядрам {affinity}: {e}")
+
+    if settings["affinity"] and CPU_AFFINITY == "auto":
+        # Ядра уже поделены между воркерами: весь свой набор принадлежит этому воркеру
+        num_threads = get_thread_budget(1, len(affinity))
+    else:
+        # Явный список ядер (или все ядра) общий для всех воркеров, делим его между ними
+        num_threads = get_thread_budget(workers, len(affinity) if settings["affinity"] else None)
+    torch.set_num_threads(num_threads)
+    settings["num_threads"] = num_threads
+
+    try:
+        # Число межоперационных потоков можно задать только до первой параллельной работы
+        torch.set_num_interop_threads(TORCH_INTEROP_THREADS)
+        settings["interop_threads"] = TORCH_INTEROP_THREADS
+    except RuntimeError as e:
+        print(f"Не удалось изменить число межоперационных потоков: {e}")
+
+    _runtime_settings = settings
+    print(f"Потоки PyTorch: {settings['num_threads']}, межоперационные: {settings['interop_threads']}, "
+          f"ядра: {settings['affinity'] or 'все'}")
+
+    return settings
+
+
+def cpu_supports_bf16():
+    """
+    Проверяет, есть ли у процессора аппаратная поддержка bfloat16 (AVX512-BF16 или AMX)
+    """
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            flags = f.read()
+    except OSError:
+        return False
+
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def get_model_load_kwargs(profile=INFERENCE_PROFILE):
+    """
+    Возвращает параметры from_pretrained для текущего устройства и профиля инференса.
+
+    На GPU модель загружается в float16. На CPU профиль "lean" загружает
+    веса в bfloat16, если процессор умеет считать в нем аппаратно, и не
+    использует device_map="auto": на одном CPU он ничего не распределяет,
+    но добавляет хуки accelerate к каждому forward.
+    """
+    if torch.cuda.is_available():
+        return {
+            "torch_dtype": torch.float16,
+            "device_map": "auto",
+        }
+
+    if profile == "baseline":
+        return {
+            "device_map": "auto",
+            "low_cpu_mem_usage": True,
+        }
+
+    load_kwargs = {
+        "low_cpu_mem_usage": True,
+        "torch_dtype": torch.float32,
+    }
+    if cpu_supports_bf16():
+        load_kwargs["torch_dtype"] = torch.bfloat16
+
+    return load_kwargs
+
+
+def prepare_model_for_inference(model, compile_model=TORCH_COMPILE):
+    """
+    Переводит модель в режим инференса: eval, без градиентов и, по желанию, torch.compile
+    """
+    model.eval()
+    model.requires_grad_(False)
+
+    if compile_model:
+        try:
+            model.forward = torch.compile(model.forward, dynamic=True)
+            print("forward модели скомпилирован через torch.compile")
+        except Exception as e:
+            print(f"Не удалось скомпилировать модель: {e}")
+
+    return model
+
+
+def get_process_memory():
+    """
+    Возвращает память текущего процесса в мегабайтах.
+
+    rss - вся резидентная память, pss - с учетом доли общих страниц,
+    uss - уникальная память процесса (приватные страницы), которая
+    освободится при его завершении. Общие страницы отображенных весов
+    в uss не входят.
+    """
+    memory = {}
+    try:
+        with open("/proc/self/smaps_rollup", encoding="utf-8") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line and not line.startswith(" "))
+    except OSError:
+        return memory
+
+    def _mb(field):
+        return int(fields.get(field, "0 kB").split()[0]) / 1024
+
+    memory["rss_mb"] = _mb("Rss")
+    memory["pss_mb"] = _mb("Pss")
+    memory["uss_mb"] = _mb("Private_Clean") + _mb("Private_Dirty")
+    return memory
+
+
+def get_process_uptime():
+    """
+    Возвращает время в секундах с момента запуска текущего процесса
+    """
+    try:
+        with open("/proc/self/stat", encoding="utf-8") as f:
+            # Имя процесса в скобках может содержать пробелы, поэтому разбираем после ")"
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", encoding="utf-8") as f:
+            system_uptime = float(f.read().split()[0])
+    except OSError:
+        return None
+
+    # starttime - 22-е поле stat, после ")" оно имеет индекс 19
+    start_ticks = int(fields[19])
+    return system_uptime - start_ticks / os.sysconf("SC_CLK_TCK")
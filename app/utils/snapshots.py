@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+
+from app.config import MODEL_SNAPSHOT_DIR
+
+# Имя файла манифеста в директории снимка модели
+MANIFEST_NAME = "manifest.json"
+
+
+def get_snapshot_dir(model_name):
+    """
+    Возвращает директорию локального снимка модели
+    """
+    return os.path.join(MODEL_SNAPSHOT_DIR, model_name.replace("/", "--"))
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """
+    Считает sha256 файла, читая его блоками
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(snapshot_dir):
+    """
+    Читает манифест снимка или возвращает None, если его нет
+    """
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify_snapshot(snapshot_dir, check_checksums=True):
+    """
+    Проверяет файлы снимка по манифесту.
+
+    Без check_checksums сверяются только наличие и размеры файлов, что
+    достаточно для быстрой проверки при запуске. Возвращает список
+    найденных проблем; пустой список означает, что снимок цел.
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        return [f"нет файла {MANIFEST_NAME}"]
+
+    problems = []
+    for relative_path, expected in manifest["files"].items():
+        path = os.path.join(snapshot_dir, relative_path)
+
+        if not os.path.exists(path):
+            problems.append(f"{relative_path}: файл отсутствует")
+        elif os.path.getsize(path) != expected["size"]:
+            problems.append(f"{relative_path}: размер не совпадает")
+        elif check_checksums and file_sha256(path) != expected["sha256"]:
+            problems.append(f"{relative_path}: контрольная сумма не совпадает")
+
+    return problems
+
+
+def get_local_snapshot(model_name, check_checksums=False):
+    """
+    Возвращает директорию проверенного локального снимка модели или None
+    """
+    snapshot_dir = get_snapshot_dir(model_name)
+    if not os.path.isdir(snapshot_dir):
+        return None
+
+    problems = verify_snapshot(snapshot_dir, check_checksums)
+    if problems:
+        print(f"Локальный снимок {model_name} поврежден: {'; '.join(problems)}")
+        return None
+
+    return snapshot_dir
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+# Добавляем директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Тесты не загружают модели: генераторы, создаваемые при импорте модулей, работают на заглушке
+os.environ.setdefault("CONTENT_BACKEND", "stub")
+os.environ.setdefault("CODE_BACKEND", "stub")
+
+
+@pytest.fixture(scope="session")
+def local_model_dir():
+    """
+    Возвращает функцию, которая находит локальную директорию модели или пропускает тест.
+
+    Модель ищется в проверенном снимке и в кэше CACHE_DIR без обращения к
+    сети: без этого загрузка отсутствующей модели тратит десятки секунд на
+    повторные запросы к Hub. Загрузка из найденной директории тоже не ходит в сеть.
+    """
+    from app.config import CACHE_DIR
+    from app.utils.snapshots import get_local_snapshot
+
+    def resolve(model_name):
+        if os.path.isdir(model_name):
+            return model_name
+
+        snapshot_dir = get_local_snapshot(model_name)
+        if snapshot_dir:
+            return snapshot_dir
+
+        try:
+            from huggingface_hub import try_to_load_from_cache
+        except ImportError:
+            pytest.skip("huggingface_hub не установлен")
+
+        config_path = try_to_load_from_cache(model_name, "config.json", cache_dir=CACHE_DIR)
+        if not isinstance(config_path, str):
+            pytest.skip(f"Модели {model_name} нет в локальном снимке и в кэше {CACHE_DIR}")
+        return os.path.dirname(config_path)
+
+    return resolve
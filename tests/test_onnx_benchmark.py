@@ -0,0 +1,15 @@
+import pytest
+
+from app.benchmarks.onnx import SAMPLE_SLIDES, build_prompts
+from app.services.prompt_templates import PROMPT_COMPACTION_LEVELS
+
+
+@pytest.mark.parametrize("compaction", PROMPT_COMPACTION_LEVELS)
+def test_build_prompts_without_model(compaction):
+    # Промпты бенчмарка строятся без __init__ генератора кода и без загрузки модели
+    prompts = build_prompts(compaction)
+
+    assert len(prompts) == len(SAMPLE_SLIDES)
+    for slide_content, prompt in zip(SAMPLE_SLIDES, prompts):
+        assert slide_content in prompt
+        assert "DESIGN THEME: light" in prompt
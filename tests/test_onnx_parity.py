@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("onnxruntime")
+
+from app.config import CODE_MODEL
+from app.services.backends.onnx_backend import OnnxCausalLM
+from app.utils.model_loader import load_causal_lm, load_tokenizer
+
+# Модель с экспортированным графом ONNX (CODE_ONNX_FILE) в репозитории или локальном снимке
+PARITY_MODEL = os.getenv("ONNX_PARITY_MODEL", CODE_MODEL)
+PARITY_PROMPT = "def fibonacci(n):\n    \"\"\"Возвращает n-е число Фибоначчи\"\"\"\n"
+PARITY_NEW_TOKENS = 24
+
+
+@pytest.fixture(scope="module")
+def model_dir(local_model_dir):
+    return local_model_dir(PARITY_MODEL)
+
+
+@pytest.fixture(scope="module")
+def onnx_model(model_dir):
+    try:
+        return OnnxCausalLM(model_dir)
+    except Exception as e:
+        pytest.skip(f"Нет экспортированной в ONNX модели {PARITY_MODEL}: {e}")
+
+
+def test_greedy_tokens_match_transformers(model_dir, onnx_model):
+    import torch
+
+    tokenizer = load_tokenizer(model_dir)
+    model = load_causal_lm(model_dir, mode="standard")
+    inputs = tokenizer(PARITY_PROMPT, return_tensors="pt")
+    pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+    with torch.inference_mode():
+        expected = model.generate(
+            **inputs, max_new_tokens=PARITY_NEW_TOKENS, do_sample=False, pad_token_id=pad_token_id
+        )
+    actual = onnx_model.generate(
+        inputs["input_ids"], attention_mask=inputs["attention_mask"],
+        max_new_tokens=PARITY_NEW_TOKENS, do_sample=False, pad_token_id=pad_token_id,
+    )
+
+    assert actual[0].tolist() == expected[0].tolist()
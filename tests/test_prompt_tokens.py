@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("transformers")
+
+from app.config import CONTENT_MODEL, CODE_MODEL
+from app.services.code_generator import CodeGenerator
+from app.services.code_prompts import get_code_prompt
+from app.services.content_generator import ContentGenerator
+from app.services.content_prompts import get_content_prompts
+from app.services.prompt_templates import PROMPT_COMPACTION_LEVELS, PromptTokenCache
+from app.utils.model_loader import load_tokenizer
+
+SLIDES_COUNT = 14
+TOPICS = ["Искусственный интеллект в образовании", "5G networks and IoT", " История древнего Рима "]
+
+
+def _load_tokenizer(local_model_dir, model_name):
+    model_dir = local_model_dir(model_name)
+    try:
+        return load_tokenizer(model_dir)
+    except Exception as e:
+        pytest.skip(f"Токенизатор {model_name} недоступен: {e}")
+
+
+def _content_prompts(compaction):
+    content_generator = ContentGenerator()
+    content_generator.prompts = get_content_prompts(compaction)
+    outline = [f"Пункт плана {slide_number}" for slide_number in range(1, SLIDES_COUNT + 1)]
+
+    prompts = []
+    for topic in TOPICS:
+        for slide_number in range(1, SLIDES_COUNT + 1):
+            slide_type, slide_structure = content_generator._get_slide_structure(slide_number, SLIDES_COUNT)
+            for slide_outline in (None, outline):
+                prompts.append(content_generator._create_detailed_prompt(
+                    topic, slide_number, SLIDES_COUNT, slide_type, slide_structure, outline=slide_outline
+                ))
+    return prompts
+
+
+def _code_prompts(compaction):
+    content_generator = ContentGenerator()
+    code_generator = CodeGenerator()
+    prompt_template = get_code_prompt(compaction)
+
+    prompts = []
+    for slide_number in range(1, SLIDES_COUNT + 1):
+        slide_content = content_generator._get_fallback_content(TOPICS[0], slide_number, SLIDES_COUNT)
+        slide_type = code_generator._determine_slide_type(slide_content)
+        prompts.append(prompt_template.render(
+            slide_content=slide_content,
+            slide_type=slide_type,
+            layout=code_generator._select_layout_for_slide(slide_type),
+            theme=code_generator._select_theme_for_slide(slide_type),
+        ))
+    return prompts
+
+
+def _assert_pieces_match(tokenizer, prompts):
+    # Сверка отключена: каждый промпт сравнивается с полной токенизацией здесь
+    cache = PromptTokenCache(tokenizer, verify_uses=0)
+    for prompt in prompts:
+        assert cache.encode(prompt) == tokenizer.encode(str(prompt)), str(prompt)[:200]
+
+
+@pytest.mark.parametrize("compaction", PROMPT_COMPACTION_LEVELS)
+def test_content_prompt_pieces_match_full_tokenization(local_model_dir, compaction):
+    _assert_pieces_match(_load_tokenizer(local_model_dir, CONTENT_MODEL), _content_prompts(compaction))
+
+
+@pytest.mark.parametrize("compaction", PROMPT_COMPACTION_LEVELS)
+def test_code_prompt_pieces_match_full_tokenization(local_model_dir, compaction):
+    _assert_pieces_match(_load_tokenizer(local_model_dir, CODE_MODEL), _code_prompts(compaction))
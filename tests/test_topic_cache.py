@@ -0,0 +1,36 @@
+import pytest
+
+from app.services.topic_similarity import cosine_similarity, same_topic_terms, topic_signature
+
+THRESHOLD = 0.85
+
+# Темы с разным смыслом, у которых сходство n-грамм выше порога
+DIFFERENT_TOPICS = [
+    ("История России XVIII века", "История России XVII века"),
+    ("Экономика Германии 2020 года", "Экономика Германии 2023 года"),
+    ("Windows 10 для бизнеса", "Windows 11 для бизнеса"),
+    ("Python 2", "Python 3"),
+    ("Искусственный интеллект в медицине и образовании", "Искусственный интеллект в медицине"),
+]
+
+SAME_TOPICS = [
+    ("ИИ в образовании", "Искусственный интеллект в образовании"),
+    ("Искусственный интеллект в образовании", "искусственного интеллекта в образование"),
+    ("Образование и ИИ", "ИИ в образовании"),
+    ("История России ХVIII века", "История России XVIII века"),
+]
+
+
+def _matches(left, right):
+    left, right = topic_signature(left), topic_signature(right)
+    return cosine_similarity(left[0], right[0]) >= THRESHOLD and same_topic_terms(left, right, THRESHOLD)
+
+
+@pytest.mark.parametrize("left, right", DIFFERENT_TOPICS)
+def test_different_topics_do_not_match(left, right):
+    assert not _matches(left, right)
+
+
+@pytest.mark.parametrize("left, right", SAME_TOPICS)
+def test_same_topics_match(left, right):
+    assert _matches(left, right)